@@ -0,0 +1,75 @@
+"""Aggregations backing the dashboard endpoint.
+
+Totals, category spending and the monthly chart are read from the
+``monthly_rollups`` table (see rollups.py), so a dashboard request touches
+O(months x categories) rows however long the user's history is. Only the
+recent-transactions list reads raw rows, via ORDER BY ... LIMIT. The
+forecast block is this month's projection from forecast.py, computed from
+the same rollup rows. Totals are summed as integer cents and converted
+once at the end.
+"""
+from datetime import date
+
+from models import db, Transaction, MonthlyRollup
+from money import cents, cents_to_number
+from serialization import transaction_dicts, transaction_rows
+import forecast
+
+
+def dashboard_months(today):
+    """Return the six calendar months ("YYYY-MM") shown in the dashboard charts, oldest first."""
+    return forecast.months_back(today, 6)
+
+
+def rollup_rows(user_id):
+    """Return (month, type, category, total_cents) rows for a user."""
+    return db.session.query(
+        MonthlyRollup.month, MonthlyRollup.type, MonthlyRollup.category, cents(MonthlyRollup.total)
+    ).filter(MonthlyRollup.user_id == user_id).order_by(MonthlyRollup.month).all()
+
+
+def recent_transactions(user_id, limit=5):
+    return transaction_dicts(transaction_rows(Transaction.query.filter_by(user_id=user_id)).order_by(
+        Transaction.date.desc(), Transaction.id.asc()
+    ).limit(limit))
+
+
+def dashboard_summary(user_id, today=None):
+    """Build the /api/dashboard payload for a user."""
+    today = today or date.today()
+    months = dashboard_months(today)
+    wanted = set(months)
+
+    total_income = 0
+    total_expenses = 0
+    category_spending = {}
+    by_month = {}
+    rows = rollup_rows(user_id)
+    for month, txn_type, category, amount in rows:
+        if txn_type == "income":
+            total_income += amount
+        elif txn_type == "expense":
+            total_expenses += amount
+            category_spending[category] = category_spending.get(category, 0) + amount
+        if month in wanted:
+            by_month[(month, txn_type)] = by_month.get((month, txn_type), 0) + amount
+    balance = total_income - total_expenses
+
+    monthly_data = [
+        {"month": m, "income": cents_to_number(by_month.get((m, "income"), 0)), "expenses": cents_to_number(by_month.get((m, "expense"), 0))}
+        for m in months
+    ]
+
+    # Key names predate the forecasting engine and are kept for API compatibility.
+    income, expenses = forecast.current_month_forecast(rows, today)
+    projection = {"avg_monthly_income": income, "avg_monthly_expenses": expenses, "projected_savings": round(income - expenses, 2)}
+
+    return {
+        "balance": cents_to_number(balance),
+        "income": cents_to_number(total_income),
+        "expenses": cents_to_number(total_expenses),
+        "category_spending": {k: cents_to_number(v) for k, v in category_spending.items()},
+        "recent_transactions": recent_transactions(user_id),
+        "monthly_data": monthly_data,
+        "forecast": projection,
+    }
@@ -0,0 +1,219 @@
+"""Budget alerts raised as spending crosses a budget's thresholds.
+
+Every write that changes spending already passes its rollup deltas through
+rollups.record_many; :func:`evaluate` is called with the same deltas, in the
+same database transaction. For each (user, month, category) whose expense
+total went up and has a budget, it reads the new total from
+``monthly_rollups``, so the spend before the write is that minus the delta.
+Every threshold (a percentage of the limit, 80 and 100 by default) between
+the two raises one ``budget_alerts`` row: one query per write batch, however
+many transactions the user has. Budget creates and limit changes go
+through :func:`evaluate_budget`.
+
+``budget_alerts`` is an outbox read by cursor: GET /api/alerts returns the
+rows after ``?after=<id>`` and, with ``?wait=<seconds>``, holds the request
+open until there are some. Writers in this process wake waiting requests
+as soon as they commit (:class:`AlertNotifier`); alerts committed by other
+processes, e.g. run_recurring.py, are picked up within POLL_SECONDS.
+
+A waiting request holds a worker thread (an ASGI pool thread under
+asgi.py), so at most ALERTS_MAX_WAITERS (16 by default, and never more than
+half the ASGI pool) wait at once per process. Beyond that :func:`wait_for`
+raises :class:`TooManyWaiters` and the route answers 204 with Retry-After
+straight away, leaving the remaining threads to ordinary requests.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from models import db, Budget, BudgetAlert, MonthlyRollup, RoutingSession
+from money import cents, from_cents, to_cents
+import metrics
+
+EXTENSION_KEY = "alerts"
+MAX_THRESHOLD = 1000
+MAX_WAIT_SECONDS = 30
+POLL_SECONDS = 1.0
+MAX_WAITERS = 16
+_PENDING = "alerts_pending_users"
+
+
+def parse_thresholds(value):
+    """Return the stored form ("80,100") of a list of percentages; raises ValueError."""
+    if not isinstance(value, list) or not value:
+        raise ValueError("alert_thresholds must be a non-empty list of percentages")
+    for p in value:
+        if isinstance(p, bool) or not isinstance(p, int) or not 1 <= p <= MAX_THRESHOLD:
+            raise ValueError(f"alert_thresholds must be whole percentages from 1 to {MAX_THRESHOLD}")
+    return ",".join(str(p) for p in sorted(set(value)))
+
+
+def _crossed(thresholds, limit, before, after):
+    """Thresholds reached by ``after`` cents of spending but not by ``before``."""
+    return [t for t in thresholds if before * 100 < t * limit <= after * 100]
+
+
+def _alerts(budget, thresholds, spent):
+    if thresholds:
+        # Delivered to waiting requests once this transaction commits.
+        db.session().info.setdefault(_PENDING, set()).add(budget.user_id)
+    return [
+        {
+            "user_id": budget.user_id, "budget_id": budget.id, "category": budget.category, "month": budget.month,
+            "threshold": threshold, "spent": from_cents(spent), "limit_amount": budget.limit_amount,
+        }
+        for threshold in thresholds
+    ]
+
+
+def _store(alerts):
+    if alerts:
+        db.session.execute(BudgetAlert.__table__.insert(), alerts)
+    return len(alerts)
+
+
+def evaluate(deltas):
+    """Raise alerts for {(user_id, month, type, category): (cents, count)} rollup deltas already applied.
+
+    Returns the number of alerts raised. Caller commits.
+    """
+    increases = {(k[0], k[1], k[3]): total for k, (total, _) in deltas.items() if k[2] == "expense" and total > 0}
+    if not increases:
+        return 0
+    spent_col = db.func.coalesce(cents(MonthlyRollup.total), 0)
+    rows = db.session.query(Budget, spent_col).outerjoin(MonthlyRollup, db.and_(
+        MonthlyRollup.user_id == Budget.user_id,
+        MonthlyRollup.month == Budget.month,
+        MonthlyRollup.category == Budget.category,
+        MonthlyRollup.type == "expense",
+    )).filter(
+        Budget.user_id.in_({k[0] for k in increases}),
+        Budget.month.in_({k[1] for k in increases}),
+    )
+    alerts = []
+    for budget, spent in rows:
+        increase = increases.get((budget.user_id, budget.month, budget.category))
+        if increase is None:
+            continue
+        crossed = _crossed(budget.thresholds, to_cents(budget.limit_amount), spent - increase, spent)
+        alerts.extend(_alerts(budget, crossed, spent))
+    return _store(alerts)
+
+
+def evaluate_budget(budget, previous_limit=None):
+    """Raise alerts for thresholds a new budget, or a lowered limit, puts spending past. Caller commits."""
+    spent = db.session.query(db.func.coalesce(cents(MonthlyRollup.total), 0)).filter_by(
+        user_id=budget.user_id, month=budget.month, category=budget.category, type="expense",
+    ).scalar() or 0
+    limit = to_cents(budget.limit_amount)
+    crossed = [t for t in budget.thresholds if t * limit <= spent * 100]
+    if previous_limit is not None:
+        previous = to_cents(previous_limit)
+        crossed = [t for t in crossed if t * previous > spent * 100]
+    return _store(_alerts(budget, crossed, spent))
+
+
+# ── Delivery ─────────────────────────────────────────────────────────
+
+class TooManyWaiters(Exception):
+    pass
+
+
+class AlertNotifier:
+    """Wakes requests waiting on a user's alerts when a commit in this process raised some."""
+
+    def __init__(self, max_waiters=MAX_WAITERS):
+        self.max_waiters = max_waiters
+        self.waiters = 0
+        self.refused = 0
+        self._condition = threading.Condition()
+        self._versions = defaultdict(int)
+
+    @contextmanager
+    def waiting(self):
+        """Hold one of the ``max_waiters`` slots; raises TooManyWaiters when none is free."""
+        with self._condition:
+            if self.waiters >= self.max_waiters:
+                self.refused += 1
+                raise TooManyWaiters("Too many requests waiting for alerts")
+            self.waiters += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.waiters -= 1
+
+    def samples(self):
+        with self._condition:
+            return [
+                ("alerts_waiters", "gauge", "Requests holding a thread while waiting for alerts.", self.waiters),
+                ("alerts_waiters_refused_total", "counter", "Waits answered early because every slot was taken.", self.refused),
+            ]
+
+    def version(self, user_id):
+        with self._condition:
+            return self._versions[user_id]
+
+    def notify(self, user_ids):
+        with self._condition:
+            for user_id in user_ids:
+                self._versions[user_id] += 1
+            self._condition.notify_all()
+
+    def wait(self, user_id, seen, timeout):
+        """Block until ``user_id`` is notified after version ``seen`` or ``timeout`` passes."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._versions[user_id] != seen, timeout)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _notify_committed(session):
+    user_ids = session.info.pop(_PENDING, None)
+    if user_ids and has_app_context():
+        notifier = current_app.extensions.get(EXTENSION_KEY)
+        if notifier is not None:
+            notifier.notify(user_ids)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
+
+
+def init_alerts(app):
+    max_waiters = int(app.config.get("ALERTS_MAX_WAITERS", os.environ.get("ALERTS_MAX_WAITERS", MAX_WAITERS)))
+    notifier = app.extensions[EXTENSION_KEY] = AlertNotifier(max_waiters)
+    metrics.register_collector(app, notifier.samples)
+    return notifier
+
+
+def _after(user_id, after, limit):
+    return BudgetAlert.query.filter(BudgetAlert.user_id == user_id, BudgetAlert.id > after).order_by(BudgetAlert.id).limit(limit).all()
+
+
+def wait_for(user_id, after=0, wait=0, limit=100):
+    """Return up to ``limit`` of the user's alerts after id ``after``, waiting up to ``wait`` seconds for one.
+
+    Raises TooManyWaiters, without waiting, if there are none yet and every wait slot is taken.
+    """
+    notifier = current_app.extensions[EXTENSION_KEY]
+    deadline = time.monotonic() + wait
+    # Read the version before querying, so a commit in between still wakes the wait below.
+    seen = notifier.version(user_id)
+    alerts = _after(user_id, after, limit)
+    if alerts or wait <= 0:
+        return alerts
+    with notifier.waiting():
+        while True:
+            # Give the connection back to the pool while idle.
+            db.session.close()
+            notifier.wait(user_id, seen, min(deadline - time.monotonic(), POLL_SECONDS))
+            seen = notifier.version(user_id)
+            alerts = _after(user_id, after, limit)
+            if alerts or deadline - time.monotonic() <= 0:
+                return alerts
@@ -0,0 +1,487 @@
+"""Columnar per-user transaction store for ad-hoc reports.
+
+A user's transactions are loaded once into parallel numpy arrays: int32
+days since 1970-01-01, int64 cents in the user's base currency (fx.py),
+int64 ids, and dictionary-encoded
+int16 type and int32 category/description codes (about 30 bytes per
+transaction, ~3 MB per 100k). :func:`run_query` answers filter /
+group-by / time-bucket / aggregate questions over them with vectorized
+numpy instead of building ORM objects.
+
+Each app owns an :class:`AnalyticsStore`, an LRU of loaded users capped at
+ANALYTICS_MAX_USERS. Entries are tagged with the user's ``data_version``
+(versioning.py). Transaction routes note their changes with :func:`record`;
+once the response succeeds, an entry exactly one version behind the bump
+is patched in place and any other is dropped. A read whose version
+differs from the entry's reloads it, so writes handled by other workers
+are picked up too.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import numpy as np
+
+from flask import current_app, g
+
+from models import db, Transaction
+from money import DEFAULT_CURRENCY, SCALE, cents, cents_to_number, to_cents, to_decimal
+import fx
+
+EXTENSION_KEY = "analytics"
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+DIMENSIONS = ("category", "type", "description", "weekday", "day", "week", "month", "year")
+METRICS = ("sum", "count", "mean", "min", "max")
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+# Above this many possible groups, group keys are compacted with np.unique instead of bincount.
+DENSE_GROUP_LIMIT = 1 << 20
+MAX_GROUP_BY = 3
+# Filters keeping at most this share of rows compress the columns before grouping.
+COMPRESS_BELOW = 0.25
+
+
+class QueryError(ValueError):
+    pass
+
+
+def to_day(d):
+    return d.toordinal() - EPOCH_ORDINAL
+
+
+def from_day(day):
+    return EPOCH + timedelta(days=int(day))
+
+
+class Dictionary:
+    """Maps strings to dense integer codes, in first-seen order."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value):
+        return self._codes.get(value)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class UserColumns:
+    """One user's transactions as growable parallel arrays."""
+
+    COLUMNS = {
+        "id": np.int64, "day": np.int32, "cents": np.int64,
+        # Categories are free text, so a user can have more than int16 holds.
+        "type": np.int16, "category": np.int32, "description": np.int32,
+    }
+
+    def __init__(self, version=None, capacity=64, base_currency=DEFAULT_CURRENCY):
+        self.version = version
+        self.base_currency = base_currency
+        self.size = 0
+        self._data = {name: np.empty(capacity, dtype) for name, dtype in self.COLUMNS.items()}
+        self.dictionaries = {"type": Dictionary(), "category": Dictionary(), "description": Dictionary()}
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self._data[name][:self.size]
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self._data.values())
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        capacity = len(self._data["id"])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self._data.items():
+            grown = np.empty(capacity, column.dtype)
+            grown[:self.size] = column[:self.size]
+            self._data[name] = grown
+
+    def append(self, rows):
+        """Add (id, date, amount_cents, type, category, description) tuples."""
+        rows = list(rows)
+        self._reserve(len(rows))
+        encode = {name: d.encode for name, d in self.dictionaries.items()}
+        start, end = self.size, self.size + len(rows)
+        if rows:
+            ids, dates, amounts, types, categories, descriptions = zip(*rows)
+            self._data["id"][start:end] = ids
+            self._data["day"][start:end] = [to_day(d) for d in dates]
+            self._data["cents"][start:end] = amounts
+            self._data["type"][start:end] = [encode["type"](v) for v in types]
+            self._data["category"][start:end] = [encode["category"](v) for v in categories]
+            self._data["description"][start:end] = [encode["description"](v or "") for v in descriptions]
+        self.size = end
+
+    def remove(self, ids):
+        """Drop rows by id, into new arrays so existing views stay intact."""
+        keep = ~np.isin(self["id"], np.asarray(ids, dtype=np.int64))
+        data = {}
+        for name, column in self._data.items():
+            data[name] = np.empty(len(column), column.dtype)
+            data[name][:keep.sum()] = column[:self.size][keep]
+        self._data, self.size = data, int(keep.sum())
+
+    def view(self):
+        """Return a read-only snapshot; later appends and removes don't affect it."""
+        return ColumnsView(self.size, dict(self._data), self.dictionaries)
+
+    @classmethod
+    def load(cls, user_id, version=None):
+        base = fx.base_currency(user_id)
+        rows = db.session.query(
+            Transaction.id, Transaction.date, cents(Transaction.amount),
+            Transaction.type, Transaction.category, Transaction.description, Transaction.currency,
+        ).filter(Transaction.user_id == user_id).all()
+        columns = cls(version, capacity=max(64, len(rows)), base_currency=base)
+        columns.append(row[:6] for row in rows)
+        columns._data["cents"][:len(rows)] = fx.to_base(columns["cents"], [row[6] for row in rows], columns["day"], base)
+        return columns
+
+
+class ColumnsView:
+    def __init__(self, size, data, dictionaries):
+        self.size = size
+        self._data = data
+        # Dictionaries only grow, so codes below ``size`` rows keep their labels.
+        self.dictionaries = dictionaries
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self._data[name][:self.size]
+
+
+class AnalyticsStore:
+    """Per-app LRU of loaded users, kept current by write routes."""
+
+    def __init__(self, max_users=256):
+        self.max_users = max_users
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "loads": 0, "patches": 0, "drops": 0}
+
+    def __len__(self):
+        return len(self._users)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(columns.nbytes for columns in self._users.values())
+
+    def columns(self, user_id, version=None):
+        """Return a view of the user's columns, loading them if absent or not at ``version``."""
+        with self._lock:
+            columns = self._users.get(user_id)
+            if columns is not None and (version is None or columns.version == version):
+                self._users.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return columns.view()
+        # Loading runs outside the lock; a concurrent load of the same user just wins last.
+        columns = UserColumns.load(user_id, version)
+        with self._lock:
+            self.stats["loads"] += 1
+            self._users[user_id] = columns
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+            return columns.view()
+
+    def patch(self, user_id, version, added=(), removed=()):
+        """Apply one committed write that moved the user to ``version``.
+
+        ``added`` holds (id, date, amount_cents, type, category, description) tuples
+        and ``removed`` ids. An entry at any other version than the one
+        before is dropped, to be reloaded on the next read.
+        """
+        with self._lock:
+            columns = self._users.get(user_id)
+            if columns is None:
+                return
+            if version is None or columns.version != version - 1:
+                del self._users[user_id]
+                self.stats["drops"] += 1
+                return
+            if removed:
+                columns.remove(removed)
+            if added:
+                columns.append(added)
+            columns.version = version
+            self.stats["patches"] += 1
+
+    def base_currency(self, user_id):
+        """The currency a loaded user's amounts are in, or None if not loaded."""
+        with self._lock:
+            columns = self._users.get(user_id)
+            return None if columns is None else columns.base_currency
+
+    def drop(self, user_id):
+        with self._lock:
+            if self._users.pop(user_id, None) is not None:
+                self.stats["drops"] += 1
+
+
+def init_analytics(app):
+    max_users = int(app.config.get("ANALYTICS_MAX_USERS", os.environ.get("ANALYTICS_MAX_USERS", 256)))
+    store = AnalyticsStore(max_users=max_users)
+    app.extensions[EXTENSION_KEY] = store
+    app.after_request(_apply_changes)
+    return store
+
+
+# ── Write tracking ───────────────────────────────────────────────────
+
+def record(txn, sign=1):
+    """Note a transaction this request adds (sign=1) or deletes (sign=-1).
+
+    Mirrors rollups.record; the change reaches the store once the request
+    has committed and versioning.bump has reported the new version.
+    """
+    g.setdefault("analytics_changes", []).append((sign, txn if sign > 0 else txn.id))
+
+
+def record_bulk():
+    """Note a write too large to patch in; the user is reloaded on the next read."""
+    g.analytics_reload = True
+
+
+def _apply_changes(response):
+    # Popped, not read: g outlives the request when an app context is already pushed.
+    bumped = g.pop("bumped_version", None)
+    changes = g.pop("analytics_changes", [])
+    reload = g.pop("analytics_reload", False)
+    store = current_app.extensions.get(EXTENSION_KEY)
+    if bumped is None or store is None:
+        return response
+    user_id, version = bumped
+    if response.status_code >= 400 or reload:
+        store.drop(user_id)
+        return response
+    txns = [t for sign, t in changes if sign > 0]
+    base = store.base_currency(user_id)
+    amounts = fx.to_base(
+        [to_cents(t.amount) for t in txns], [t.currency for t in txns], fx.to_days([t.date for t in txns]), base,
+    ).tolist() if txns and base else []
+    added = [(t.id, t.date, amount, t.type, t.category, t.description) for t, amount in zip(txns, amounts)]
+    store.patch(user_id, version, added=added, removed=[txn_id for sign, txn_id in changes if sign < 0])
+    return response
+
+
+# ── Queries ──────────────────────────────────────────────────────────
+
+def _list_arg(args, name):
+    return [v.strip() for v in args.get(name, "").split(",") if v.strip()]
+
+
+def parse_query(args):
+    """Turn /api/analytics query-string arguments into run_query keyword arguments."""
+    query = {
+        "group_by": _list_arg(args, "group_by"),
+        "metrics": _list_arg(args, "metrics") or ["sum", "count"],
+        "order": args.get("order") or None,
+        "types": _list_arg(args, "type"),
+        "categories": _list_arg(args, "category"),
+    }
+    if len(query["group_by"]) > MAX_GROUP_BY or len(set(query["group_by"])) != len(query["group_by"]):
+        raise QueryError(f"group_by takes up to {MAX_GROUP_BY} distinct dimensions")
+    try:
+        for name, key in (("start_date", "start"), ("end_date", "end")):
+            if args.get(name):
+                query[key] = date.fromisoformat(args[name])
+        for name in ("min_amount", "max_amount"):
+            if args.get(name):
+                query[name] = to_decimal(args[name])
+        if args.get("limit"):
+            query["limit"] = int(args["limit"])
+    except ValueError as exc:
+        raise QueryError(f"Invalid filter: {exc}") from None
+    if query.get("limit", 1) < 1:
+        raise QueryError("limit must be positive")
+    return query
+
+
+def _month_table(first_day, last_day):
+    """Months since 1970-01 for each day in [first_day, last_day]; a gather beats datetime64 casts."""
+    span = np.arange(first_day, last_day + 1, dtype=np.int32)
+    return span.astype("datetime64[D]").astype("datetime64[M]").astype(np.int32)
+
+
+def _dimension(columns, name, mask, days):
+    """Return (codes, labels) for a group-by dimension over the selected rows."""
+    if name in columns.dictionaries:
+        return _take(columns[name], mask), columns.dictionaries[name].values
+    if name == "weekday":
+        return (days + 3) % 7, WEEKDAYS  # 1970-01-01 was a Thursday
+    if not len(days):
+        return days, None
+    first_day = int(days.min())
+    if name == "day":
+        return days - first_day, lambda code: from_day(first_day + code).isoformat()
+    if name == "week":
+        first = (first_day + 3) // 7  # Monday-based weeks
+        return (days + 3) // 7 - first, lambda code: from_day((first + code) * 7 - 3).isoformat()
+    table = _month_table(first_day, int(days.max()))
+    if name == "year":
+        table //= 12
+    table -= table[0]
+    months = table[days - first_day]
+    first = int(_month_table(first_day, first_day)[0])
+    if name == "month":
+        return months, lambda code: f"{(first + code) // 12 + 1970:04d}-{(first + code) % 12 + 1:02d}"
+    return months, lambda code: int(first // 12 + code + 1970)
+
+
+def _label(labels, code):
+    return labels(code) if callable(labels) else labels[code]
+
+
+def _take(column, mask):
+    return column if mask is None else column[mask]
+
+
+def _select(columns, start=None, end=None, types=None, categories=None, min_amount=None, max_amount=None):
+    """Return a boolean row mask for the filters, or None when nothing is filtered out."""
+    mask = None
+
+    def narrow(condition):
+        nonlocal mask
+        mask = condition if mask is None else mask & condition
+
+    if start is not None:
+        narrow(columns["day"] >= to_day(start))
+    if end is not None:
+        narrow(columns["day"] <= to_day(end))
+    if min_amount is not None:
+        narrow(columns["cents"] >= to_cents(min_amount))
+    if max_amount is not None:
+        narrow(columns["cents"] <= to_cents(max_amount))
+    for name, wanted in (("type", types), ("category", categories)):
+        if wanted:
+            # A per-code lookup table is much cheaper than np.isin.
+            allowed = np.zeros(len(columns.dictionaries[name]) + 1, dtype=bool)
+            for value in wanted:
+                code = columns.dictionaries[name].lookup(value)
+                if code is not None:
+                    allowed[code] = True
+            narrow(allowed[columns[name]])
+    return mask
+
+
+def run_query(columns, group_by=(), metrics=("sum", "count"), order=None, limit=None, **filters):
+    """Aggregate a user's transactions.
+
+    ``group_by`` names dimensions from DIMENSIONS, ``metrics`` names from
+    METRICS, ``order`` is a metric or dimension (prefix "-" for descending)
+    and ``filters`` are keyword arguments of :func:`_select` (start/end
+    dates, types, categories, min_amount/max_amount). Returns a list of
+    dicts with one key per dimension and per metric.
+    """
+    for name in group_by:
+        if name not in DIMENSIONS:
+            raise QueryError(f"Unknown dimension '{name}'")
+    for name in metrics:
+        if name not in METRICS:
+            raise QueryError(f"Unknown metric '{name}'")
+    if order and order.lstrip("-") not in (*metrics, *group_by):
+        raise QueryError("order must name a selected metric or dimension")
+
+    mask = _select(columns, **filters)
+    # A selective filter compresses the columns first; a broad one is cheaper
+    # to apply by sending excluded rows to an extra group that is dropped.
+    excluded = None
+    if mask is not None and np.count_nonzero(mask) > len(mask) * COMPRESS_BELOW:
+        excluded, mask = ~mask, None
+    days = _take(columns["day"], mask)
+    amounts = _take(columns["cents"], mask)
+
+    # Combine the dimensions into one mixed-radix key per row.
+    key = np.zeros(len(amounts), dtype=np.intp)
+    dimensions = []
+    size = 1
+    for name in group_by:
+        codes, labels = _dimension(columns, name, mask, days)
+        radix = int(codes.max()) + 1 if len(codes) else 1
+        key = codes.astype(np.intp) if not dimensions else key * radix + codes
+        dimensions.append((name, radix, labels))
+        size *= radix
+    if size > DENSE_GROUP_LIMIT:
+        groups, key = np.unique(key, return_inverse=True)
+        size = len(groups)
+    else:
+        groups = None
+    if excluded is not None:
+        key[excluded] = size
+
+    counts = np.bincount(key, minlength=size)[:size]
+    present = np.flatnonzero(counts)
+    values = {"count": counts[present]}
+    if {"sum", "mean"} & set(metrics):
+        # bincount sums in float64, which is exact for integer cents below 2**53.
+        values["sum"] = np.rint(np.bincount(key, weights=amounts, minlength=size)[:size][present]).astype(np.int64)
+        values["mean"] = values["sum"] / values["count"]
+    if "min" in metrics:
+        lowest = np.full(size + 1, np.iinfo(np.int64).max)
+        np.minimum.at(lowest, key, amounts)
+        values["min"] = lowest[present]
+    if "max" in metrics:
+        highest = np.full(size + 1, np.iinfo(np.int64).min)
+        np.maximum.at(highest, key, amounts)
+        values["max"] = highest[present]
+
+    codes = [_dimension_codes(groups, present, dimensions, p) for p in range(len(dimensions))]
+    if order:
+        name = order.lstrip("-")
+        if name in values:
+            sort_key = values[name]
+        else:
+            # Time-bucket and weekday codes are already chronological; dictionary codes are not.
+            p = group_by.index(name)
+            labels = dimensions[p][2]
+            sort_key = np.array([labels[c] for c in codes[p]]) if name in columns.dictionaries else codes[p]
+        positions = np.argsort(sort_key, kind="stable")
+        if order.startswith("-"):
+            positions = positions[::-1]
+    else:
+        positions = np.arange(len(present))
+    if limit is not None:
+        positions = positions[:limit]
+
+    rows = []
+    for i in positions:
+        row = {name: _label(labels, int(codes[p][i])) for p, (name, _radix, labels) in enumerate(dimensions)}
+        for name in metrics:
+            value = values[name][i]
+            if name == "count":
+                row[name] = int(value)
+            elif name == "mean":
+                row[name] = round(float(value) / SCALE, 2)
+            else:
+                row[name] = cents_to_number(int(value))
+        rows.append(row)
+    return rows
+
+
+def _dimension_codes(groups, present, dimensions, position):
+    """Recover one dimension's codes from combined group keys."""
+    keys = present if groups is None else groups[present]
+    for _name, radix, _labels in dimensions[position + 1:]:
+        keys = keys // radix
+    return keys % dimensions[position][1]
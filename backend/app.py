@@ -2,28 +2,124 @@ import os
 import sys
 import csv
 import io
-from datetime import datetime, date, timedelta
-from collections import defaultdict
+import zlib
+from itertools import islice
+from datetime import date, timedelta
 
-from flask import Flask, request, jsonify, Response
+from flask import Flask, g, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 
-from models import db, User, Transaction, Budget, Goal
+from models import db, DEFAULT_ALERT_THRESHOLDS, User, Transaction, Budget, Goal, MonthlyRollup, RecurringRule
 from database import init_db
-from auth import hash_password, check_password, create_token, token_required
+from aggregates import dashboard_summary
+import rollups
+import importer
+import forecast
+import analytics
+import alerts
+import fx
+import goals
+import metrics
+import recurring
+from pagination import keyset_page, InvalidCursor
+from search import apply_search
+from serialization import TRANSACTION_FIELDS, init_json, response_format, serialize_transactions, to_columns, transaction_rows
+from validation import is_month, parse_rule, parse_transaction, ValidationError
+from money import DEFAULT_CURRENCY, cents, cents_to_number, currency_code, to_cents, to_decimal
+from auth import create_token, token_required, init_auth, bearer_token
+from hashing import init_hasher, HasherSaturated
+from cache import init_cache, cached, invalidates_cache
+from versioning import conditional
+import versioning
+
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def filter_transactions(query, user_id, args, rank=False):
+    """Apply the user scope and the category/type/date/search filters shared by listing and export."""
+    query = query.filter(Transaction.user_id == user_id)
+    category = args.get("category")
+    if category:
+        query = query.filter(Transaction.category == category)
+    txn_type = args.get("type")
+    if txn_type:
+        query = query.filter(Transaction.type == txn_type)
+    start_date = args.get("start_date")
+    if start_date:
+        query = query.filter(Transaction.date >= date.fromisoformat(start_date))
+    end_date = args.get("end_date")
+    if end_date:
+        query = query.filter(Transaction.date <= date.fromisoformat(end_date))
+    search = args.get("search", "").strip()
+    if search:
+        query = apply_search(query, search, rank=rank, user_id=user_id)
+    return query
+
+
+def _with_base_amounts(rows, base):
+    """Append each row's amount in ``base`` cents, converting a batch of EXPORT_BATCH_SIZE rows at a time."""
+    rows = iter(rows)
+    while batch := list(islice(rows, EXPORT_BATCH_SIZE)):
+        days = fx.to_days([row[1] for row in batch])
+        converted = fx.to_base([row[4] for row in batch], [row[5] for row in batch], days, base).tolist()
+        for row, amount in zip(batch, converted):
+            yield (*row, amount)
+
+
+def _csv_chunks(rows, base):
+    """Yield CSV text in roughly EXPORT_CHUNK_BYTES pieces as rows stream in."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["ID", "Date", "Type", "Category", "Amount", "Currency", f"Amount ({base})", "Description"])
+    for txn_id, txn_date, txn_type, category, amount_cents, currency, description, base_cents in _with_base_amounts(rows, base):
+        writer.writerow([
+            txn_id, txn_date.isoformat(), txn_type, category,
+            cents_to_number(amount_cents), currency, cents_to_number(base_cents), description,
+        ])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
 
 
 def create_app(config=None):
     app = Flask(__name__)
-    CORS(app)
+    CORS(app, expose_headers=["ETag", "X-Cache"])
 
     if config:
         app.config.update(config)
 
+    init_json(app)
     init_db(app)
+    # First, so its after_request hook runs last and the timings cover the others.
+    metrics.init_metrics(app)
+    init_cache(app)
+    auth_state = init_auth(app)
+    hasher = init_hasher(app)
+    analytics.init_analytics(app)
+    fx.init_fx(app)
+    alerts.init_alerts(app)
+    recurring.init_scheduler(app)
 
     # ── Auth Routes ──────────────────────────────────────────────────────
 
+    def _too_busy():
+        response = jsonify({"error": "Too many login attempts in progress, try again shortly"})
+        response.headers["Retry-After"] = "1"
+        return response, 429
+
     @app.route("/api/signup", methods=["POST"])
     def signup():
         data = request.get_json()
@@ -35,12 +131,21 @@ def create_app(config=None):
             return jsonify({"error": "Username must be at least 3 characters"}), 400
         if len(password) < 6:
             return jsonify({"error": "Password must be at least 6 characters"}), 400
+        try:
+            base_currency = currency_code(data.get("base_currency") or DEFAULT_CURRENCY)
+        except ValueError:
+            return jsonify({"error": "Invalid currency code"}), 400
         existing = User.query.filter_by(username=username).first()
         if existing:
             return jsonify({"error": "Username already exists"}), 409
-        user = User(username=username, password_hash=hash_password(password))
+        try:
+            password_hash = hasher.hash(password)
+        except HasherSaturated:
+            return _too_busy()
+        user = User(username=username, password_hash=password_hash, base_currency=base_currency)
         db.session.add(user)
         db.session.commit()
+        auth_state.remember_user(user)
         token = create_token(user.id, user.username)
         return jsonify({"token": token, "user": user.to_dict()}), 201
 
@@ -50,62 +155,121 @@ def create_app(config=None):
         if not data or not data.get("username") or not data.get("password"):
             return jsonify({"error": "Username and password are required"}), 400
         user = User.query.filter_by(username=data["username"]).first()
-        if not user or not check_password(data["password"], user.password_hash):
-            return jsonify({"error": "Invalid credentials"}), 401
+        try:
+            if not user or not hasher.check(data["password"], user.password_hash):
+                return jsonify({"error": "Invalid credentials"}), 401
+        except HasherSaturated:
+            return _too_busy()
+        if hasher.needs_rehash(user.password_hash):
+            # Upgrade hashes made at an older BCRYPT_ROUNDS; retried next login if busy.
+            try:
+                user.password_hash = hasher.hash(data["password"])
+                db.session.commit()
+            except HasherSaturated:
+                pass
+        auth_state.remember_user(user)
         token = create_token(user.id, user.username)
         return jsonify({"token": token, "user": user.to_dict()}), 200
 
+    @app.route("/api/logout", methods=["POST"])
+    @token_required
+    def logout():
+        auth_state.revoke(bearer_token(), request.token_payload)
+        return jsonify({"message": "Logged out"}), 200
+
     @app.route("/api/me", methods=["GET"])
     @token_required
+    @conditional
     def get_me():
-        user = User.query.get(request.user_id)
+        # token_required has already confirmed the user exists via the registry.
+        user = auth_state.get_user(request.user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
+        return jsonify({"user": user}), 200
+
+    @app.route("/api/me", methods=["PUT"])
+    @token_required
+    @invalidates_cache
+    def update_me():
+        data = request.get_json()
+        if not data or "base_currency" not in data:
+            return jsonify({"error": "base_currency is required"}), 400
+        try:
+            base_currency = currency_code(data["base_currency"])
+        except ValueError:
+            return jsonify({"error": "Invalid currency code"}), 400
+        user = db.session.get(User, request.user_id)
+        if base_currency != user.base_currency:
+            rates = fx.rates()
+            held = {c for (c,) in db.session.query(Transaction.currency).filter(Transaction.user_id == user.id).distinct()}
+            if Budget.query.filter_by(user_id=user.id).first() or Goal.query.filter_by(user_id=user.id).first():
+                held.add(user.base_currency)
+            missing = sorted(c for c in held if not rates.can_convert(c, base_currency))
+            if missing:
+                return jsonify({"error": f"No exchange rates to convert {', '.join(missing)} to {base_currency}"}), 400
+            # Rollups, analytics, budget limits and goal amounts are all held in the base currency.
+            fx.rebase_amounts(user.id, user.base_currency, base_currency)
+            user.base_currency = base_currency
+            goals.rebuild(user.id)
+            rollups.rebuild(user.id)
+            analytics.record_bulk()
+            versioning.bump(user.id)
+            db.session.commit()
+            auth_state.remember_user(user)
         return jsonify({"user": user.to_dict()}), 200
 
     # ── Transaction Routes ───────────────────────────────────────────────
 
     @app.route("/api/transactions", methods=["GET"])
     @token_required
+    @conditional
     def get_transactions():
-        query = Transaction.query.filter_by(user_id=request.user_id)
-
-        # Filtering
-        category = request.args.get("category")
-        if category:
-            query = query.filter_by(category=category)
-        txn_type = request.args.get("type")
-        if txn_type:
-            query = query.filter_by(type=txn_type)
-        start_date = request.args.get("start_date")
-        if start_date:
-            query = query.filter(Transaction.date >= date.fromisoformat(start_date))
-        end_date = request.args.get("end_date")
-        if end_date:
-            query = query.filter(Transaction.date <= date.fromisoformat(end_date))
-
-        # Sorting
+        # Filtering; sort_by=relevance ranks search matches best first
         sort_by = request.args.get("sort_by", "date")
         sort_order = request.args.get("sort_order", "desc")
+        search = request.args.get("search", "").strip()
+        rank = sort_by == "relevance" and "cursor" not in request.args
+        try:
+            fmt = response_format(request.args)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        query = transaction_rows(filter_transactions(Transaction.query, request.user_id, request.args, rank=rank))
+        per_page = min(request.args.get("per_page", 20, type=int), 100)
+
+        # Keyset pagination (opt-in by passing a cursor, empty for the first page)
+        if "cursor" in request.args:
+            try:
+                items, next_cursor = keyset_page(query, sort_by, sort_order, request.args["cursor"], per_page)
+            except InvalidCursor as exc:
+                return jsonify({"error": str(exc)}), 400
+            body = {
+                "transactions": serialize_transactions(items, fmt),
+                "next_cursor": next_cursor,
+                "per_page": per_page,
+            }
+            if request.args.get("include_total", "").lower() in ("1", "true"):
+                body["total"] = query.order_by(None).count()
+            return jsonify(body), 200
+
         if sort_by == "amount":
             sort_col = Transaction.amount
         elif sort_by == "category":
             sort_col = Transaction.category
         else:
             sort_col = Transaction.date
-        if sort_order == "asc":
+        if sort_by == "relevance" and search:
+            query = query.order_by(Transaction.date.desc())
+        elif sort_order == "asc":
             query = query.order_by(sort_col.asc())
         else:
             query = query.order_by(sort_col.desc())
 
         # Pagination
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
-        per_page = min(per_page, 100)
         paginated = query.paginate(page=page, per_page=per_page, error_out=False)
 
         return jsonify({
-            "transactions": [t.to_dict() for t in paginated.items],
+            "transactions": serialize_transactions(paginated.items, fmt),
             "total": paginated.total,
             "page": paginated.page,
             "per_page": paginated.per_page,
@@ -114,118 +278,187 @@ def create_app(config=None):
 
     @app.route("/api/transactions", methods=["POST"])
     @token_required
+    @invalidates_cache
     def create_transaction():
         data = request.get_json()
         if not data:
             return jsonify({"error": "Request body is required"}), 400
-        required = ["amount", "category", "date", "type"]
-        for field in required:
-            if field not in data:
-                return jsonify({"error": f"{field} is required"}), 400
-        if data["type"] not in ("income", "expense"):
-            return jsonify({"error": "Type must be income or expense"}), 400
         try:
-            amount = float(data["amount"])
-            if amount <= 0:
-                return jsonify({"error": "Amount must be positive"}), 400
-        except (ValueError, TypeError):
-            return jsonify({"error": "Invalid amount"}), 400
-        try:
-            txn_date = date.fromisoformat(data["date"])
-        except ValueError:
-            return jsonify({"error": "Invalid date format, use YYYY-MM-DD"}), 400
-        txn = Transaction(
-            user_id=request.user_id,
-            amount=amount,
-            category=data["category"],
-            description=data.get("description", ""),
-            date=txn_date,
-            type=data["type"],
-        )
+            values = parse_transaction(data, fx.base_currency(request.user_id))
+        except ValidationError as exc:
+            return jsonify({"error": str(exc)}), 400
+        goal_id = data.get("goal_id")
+        if goal_id is not None:
+            # bool is an int subclass: ``true`` would otherwise resolve to goal 1.
+            goal = db.session.get(Goal, goal_id) if isinstance(goal_id, int) and not isinstance(goal_id, bool) else None
+            if not goal or goal.user_id != request.user_id:
+                return jsonify({"error": "Goal not found"}), 400
+        txn = Transaction(user_id=request.user_id, goal_id=goal_id, **values)
         db.session.add(txn)
+        rollups.record(txn)
+        goals.record(txn)
+        analytics.record(txn)
+        versioning.bump(request.user_id)
         db.session.commit()
         return jsonify({"transaction": txn.to_dict()}), 201
 
+    @app.route("/api/transactions/import", methods=["POST"])
+    @token_required
+    @invalidates_cache
+    def import_transactions():
+        if request.mimetype == "text/csv":
+            records = importer.iter_csv_records(request.stream)
+        elif request.mimetype == "application/json":
+            records = importer.iter_json_records(request.stream)
+        else:
+            return jsonify({"error": "Content-Type must be text/csv or application/json"}), 415
+        try:
+            imported, errors, error_count = importer.import_transactions(request.user_id, records)
+        except (ValueError, csv.Error) as exc:
+            db.session.rollback()
+            return jsonify({"error": f"Could not parse upload: {exc}"}), 400
+        analytics.record_bulk()
+        versioning.bump(request.user_id)
+        db.session.commit()
+        return jsonify({"imported": imported, "failed": error_count, "errors": errors}), 200
+
     @app.route("/api/transactions/<int:txn_id>", methods=["DELETE"])
     @token_required
+    @invalidates_cache
     def delete_transaction(txn_id):
-        txn = Transaction.query.get(txn_id)
+        txn = db.session.get(Transaction, txn_id)
         if not txn:
             return jsonify({"error": "Transaction not found"}), 404
         if txn.user_id != request.user_id:
             return jsonify({"error": "Unauthorized"}), 403
+        rollups.record(txn, sign=-1)
+        goals.record(txn, sign=-1)
+        analytics.record(txn, sign=-1)
         db.session.delete(txn)
+        versioning.bump(request.user_id)
         db.session.commit()
         return jsonify({"message": "Transaction deleted"}), 200
 
+    # ── Recurring Rules ──────────────────────────────────────────────────
+
+    @app.route("/api/recurring", methods=["GET"])
+    @token_required
+    @conditional
+    def get_recurring_rules():
+        rules = RecurringRule.query.filter_by(user_id=request.user_id).order_by(RecurringRule.id).all()
+        return jsonify({"rules": [r.to_dict() for r in rules]}), 200
+
+    @app.route("/api/recurring", methods=["POST"])
+    @token_required
+    @invalidates_cache
+    def create_recurring_rule():
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+        try:
+            values = parse_rule(data, fx.base_currency(request.user_id))
+        except ValidationError as exc:
+            return jsonify({"error": str(exc)}), 400
+        rule = RecurringRule(user_id=request.user_id, **values)
+        rule.next_date = recurring.first_occurrence(rule)
+        db.session.add(rule)
+        versioning.bump(request.user_id)
+        db.session.commit()
+        # Occurrences already due (a start date today or earlier) appear straight away.
+        recurring.materialize(user_id=request.user_id)
+        return jsonify({"rule": rule.to_dict()}), 201
+
+    @app.route("/api/recurring/<int:rule_id>", methods=["DELETE"])
+    @token_required
+    @invalidates_cache
+    def delete_recurring_rule(rule_id):
+        rule = db.session.get(RecurringRule, rule_id)
+        if not rule or rule.user_id != request.user_id:
+            return jsonify({"error": "Rule not found"}), 404
+        # Transactions already materialized stay, detached from the rule.
+        Transaction.query.filter_by(rule_id=rule.id).update({"rule_id": None})
+        db.session.delete(rule)
+        versioning.bump(request.user_id)
+        db.session.commit()
+        return jsonify({"message": "Rule deleted"}), 200
+
     # ── Dashboard Route ──────────────────────────────────────────────────
 
     @app.route("/api/dashboard", methods=["GET"])
     @token_required
+    @conditional
+    @cached("dashboard")
     def get_dashboard():
-        transactions = Transaction.query.filter_by(user_id=request.user_id).all()
-
-        total_income = sum(t.amount for t in transactions if t.type == "income")
-        total_expenses = sum(t.amount for t in transactions if t.type == "expense")
-        balance = total_income - total_expenses
-
-        # Category spending (expenses only)
-        category_spending = defaultdict(float)
-        for t in transactions:
-            if t.type == "expense":
-                category_spending[t.category] += t.amount
-        category_spending = dict(category_spending)
-
-        # Recent transactions (last 5)
-        recent = sorted(transactions, key=lambda t: t.date, reverse=True)[:5]
-
-        # Monthly data (last 6 months)
-        today = date.today()
-        monthly_data = []
-        for i in range(5, -1, -1):
-            m_date = today.replace(day=1) - timedelta(days=i * 30)
-            month_str = m_date.strftime("%Y-%m")
-            m_income = sum(t.amount for t in transactions if t.type == "income" and t.date.strftime("%Y-%m") == month_str)
-            m_expense = sum(t.amount for t in transactions if t.type == "expense" and t.date.strftime("%Y-%m") == month_str)
-            monthly_data.append({"month": month_str, "income": m_income, "expenses": m_expense})
-
-        # Simple forecast: average monthly expense
-        if monthly_data:
-            avg_expense = sum(m["expenses"] for m in monthly_data) / len(monthly_data)
-            avg_income = sum(m["income"] for m in monthly_data) / len(monthly_data)
-        else:
-            avg_expense = 0
-            avg_income = 0
-        forecast = {"avg_monthly_income": round(avg_income, 2), "avg_monthly_expenses": round(avg_expense, 2), "projected_savings": round(avg_income - avg_expense, 2)}
-
-        return jsonify({
-            "balance": round(balance, 2),
-            "income": round(total_income, 2),
-            "expenses": round(total_expenses, 2),
-            "category_spending": {k: round(v, 2) for k, v in category_spending.items()},
-            "recent_transactions": [t.to_dict() for t in recent],
-            "monthly_data": monthly_data,
-            "forecast": forecast,
-        }), 200
+        try:
+            fmt = response_format(request.args)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        summary = dashboard_summary(request.user_id)
+        if fmt == "columns":
+            summary["monthly_data"] = to_columns(summary["monthly_data"], ("month", "income", "expenses"))
+            summary["recent_transactions"] = to_columns(summary["recent_transactions"], TRANSACTION_FIELDS)
+        return jsonify(summary), 200
+
+    @app.route("/api/forecast", methods=["GET"])
+    @token_required
+    @conditional
+    @cached("forecast")
+    def get_forecast():
+        granularity = request.args.get("granularity", "month")
+        if granularity not in forecast.MAX_HORIZON:
+            return jsonify({"error": "granularity must be 'month' or 'day'"}), 400
+        try:
+            horizon = int(request.args.get("horizon", 3 if granularity == "month" else 14))
+            confidence = float(request.args.get("confidence", 0.8))
+        except ValueError:
+            return jsonify({"error": "horizon and confidence must be numbers"}), 400
+        if not 1 <= horizon <= forecast.MAX_HORIZON[granularity]:
+            return jsonify({"error": f"horizon must be between 1 and {forecast.MAX_HORIZON[granularity]}"}), 400
+        if not 0 < confidence < 1:
+            return jsonify({"error": "confidence must be between 0 and 1"}), 400
+        return jsonify(forecast.forecast_user(request.user_id, horizon=horizon, granularity=granularity, confidence=confidence)), 200
+
+    @app.route("/api/analytics", methods=["GET"])
+    @token_required
+    @conditional
+    def get_analytics():
+        try:
+            query = analytics.parse_query(request.args)
+            columns = app.extensions[analytics.EXTENSION_KEY].columns(request.user_id, g.get("data_version"))
+            rows = analytics.run_query(columns, **query)
+        except analytics.QueryError as exc:
+            return jsonify({"error": str(exc)}), 400
+        return jsonify({"group_by": query["group_by"], "metrics": query["metrics"], "rows": rows}), 200
 
     # ── Budget Routes ────────────────────────────────────────────────────
 
     @app.route("/api/budgets", methods=["GET"])
     @token_required
+    @conditional
+    @cached("budgets")
     def get_budgets():
-        budgets = Budget.query.filter_by(user_id=request.user_id).all()
+        # Spend for every budget comes from one outer join against the
+        # monthly rollups, keyed on the same "YYYY-MM" string budgets use.
+        spent_col = db.func.coalesce(cents(MonthlyRollup.total), 0)
+        query = db.session.query(Budget, spent_col).outerjoin(MonthlyRollup, db.and_(
+            MonthlyRollup.user_id == Budget.user_id,
+            MonthlyRollup.month == Budget.month,
+            MonthlyRollup.category == Budget.category,
+            MonthlyRollup.type == "expense",
+        )).filter(Budget.user_id == request.user_id)
+        month = request.args.get("month")
+        if month:
+            if not is_month(month):
+                return jsonify({"error": "Invalid month format, use YYYY-MM"}), 400
+            query = query.filter(Budget.month == month)
+        rows = query.order_by(Budget.id).all()
         result = []
-        for b in budgets:
-            spent = db.session.query(db.func.coalesce(db.func.sum(Transaction.amount), 0)).filter(
-                Transaction.user_id == request.user_id,
-                Transaction.category == b.category,
-                Transaction.type == "expense",
-                db.func.strftime("%Y-%m", Transaction.date) == b.month,
-            ).scalar()
+        for b, spent in rows:
             budget_dict = b.to_dict()
-            budget_dict["spent"] = round(float(spent), 2)
-            if b.limit_amount > 0:
-                budget_dict["percentage"] = round((float(spent) / b.limit_amount) * 100, 1)
+            budget_dict["spent"] = cents_to_number(spent)
+            limit = to_cents(b.limit_amount)
+            if limit > 0:
+                budget_dict["percentage"] = round(spent / limit * 100, 1)
             else:
                 budget_dict["percentage"] = 0
             if budget_dict["percentage"] >= 100:
@@ -239,6 +472,7 @@ def create_app(config=None):
 
     @app.route("/api/budgets", methods=["POST"])
     @token_required
+    @invalidates_cache
     def create_budget():
         data = request.get_json()
         if not data:
@@ -247,12 +481,18 @@ def create_app(config=None):
         for field in required:
             if field not in data:
                 return jsonify({"error": f"{field} is required"}), 400
+        if not is_month(data["month"]):
+            return jsonify({"error": "Invalid month format, use YYYY-MM"}), 400
         try:
-            limit_amount = float(data["limit_amount"])
+            limit_amount = to_decimal(data["limit_amount"])
             if limit_amount <= 0:
                 return jsonify({"error": "Limit amount must be positive"}), 400
         except (ValueError, TypeError):
             return jsonify({"error": "Invalid limit_amount"}), 400
+        try:
+            thresholds = alerts.parse_thresholds(data["alert_thresholds"]) if "alert_thresholds" in data else DEFAULT_ALERT_THRESHOLDS
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
         existing = Budget.query.filter_by(
             user_id=request.user_id, category=data["category"], month=data["month"]
         ).first()
@@ -263,15 +503,20 @@ def create_app(config=None):
             category=data["category"],
             limit_amount=limit_amount,
             month=data["month"],
+            alert_thresholds=thresholds,
         )
         db.session.add(budget)
+        db.session.flush()
+        alerts.evaluate_budget(budget)
+        versioning.bump(request.user_id)
         db.session.commit()
         return jsonify({"budget": budget.to_dict()}), 201
 
     @app.route("/api/budgets/<int:budget_id>", methods=["PUT"])
     @token_required
+    @invalidates_cache
     def update_budget(budget_id):
-        budget = Budget.query.get(budget_id)
+        budget = db.session.get(Budget, budget_id)
         if not budget:
             return jsonify({"error": "Budget not found"}), 404
         if budget.user_id != request.user_id:
@@ -279,9 +524,15 @@ def create_app(config=None):
         data = request.get_json()
         if not data:
             return jsonify({"error": "Request body is required"}), 400
+        previous = (budget.category, budget.month, budget.limit_amount)
+        if "alert_thresholds" in data:
+            try:
+                budget.alert_thresholds = alerts.parse_thresholds(data["alert_thresholds"])
+            except ValueError as exc:
+                return jsonify({"error": str(exc)}), 400
         if "limit_amount" in data:
             try:
-                limit_amount = float(data["limit_amount"])
+                limit_amount = to_decimal(data["limit_amount"])
                 if limit_amount <= 0:
                     return jsonify({"error": "Limit amount must be positive"}), 400
                 budget.limit_amount = limit_amount
@@ -290,96 +541,195 @@ def create_app(config=None):
         if "category" in data:
             budget.category = data["category"]
         if "month" in data:
+            if not is_month(data["month"]):
+                db.session.rollback()
+                return jsonify({"error": "Invalid month format, use YYYY-MM"}), 400
             budget.month = data["month"]
+        with db.session.no_autoflush:
+            clash = Budget.query.filter(
+                Budget.user_id == request.user_id,
+                Budget.category == budget.category,
+                Budget.month == budget.month,
+                Budget.id != budget.id,
+            ).first()
+        if clash:
+            db.session.rollback()
+            return jsonify({"error": "Budget already exists for this category and month"}), 409
+        # Only a lower limit on the same category and month can cross thresholds already passed.
+        moved = previous[:2] != (budget.category, budget.month)
+        alerts.evaluate_budget(budget, previous_limit=None if moved else previous[2])
+        versioning.bump(request.user_id)
         db.session.commit()
         return jsonify({"budget": budget.to_dict()}), 200
 
     @app.route("/api/budgets/<int:budget_id>", methods=["DELETE"])
     @token_required
+    @invalidates_cache
     def delete_budget(budget_id):
-        budget = Budget.query.get(budget_id)
+        budget = db.session.get(Budget, budget_id)
         if not budget:
             return jsonify({"error": "Budget not found"}), 404
         if budget.user_id != request.user_id:
             return jsonify({"error": "Unauthorized"}), 403
         db.session.delete(budget)
+        versioning.bump(request.user_id)
         db.session.commit()
         return jsonify({"message": "Budget deleted"}), 200
 
+    # ── Alerts ───────────────────────────────────────────────────────────
+
+    @app.route("/api/alerts", methods=["GET"])
+    @token_required
+    def get_alerts():
+        try:
+            after = int(request.args.get("after", 0))
+            wait = float(request.args.get("wait", 0))
+        except ValueError:
+            return jsonify({"error": "after must be an alert id and wait a number of seconds"}), 400
+        if not 0 <= wait <= alerts.MAX_WAIT_SECONDS:
+            return jsonify({"error": f"wait must be from 0 to {alerts.MAX_WAIT_SECONDS} seconds"}), 400
+        # Waiters are woken by commits on the primary; a lagging replica would miss them.
+        g.use_replica = False
+        try:
+            found = alerts.wait_for(request.user_id, after, wait)
+        except alerts.TooManyWaiters:
+            # Nothing yet, and no thread to spare for waiting: the client polls again shortly.
+            return "", 204, {"Retry-After": "1"}
+        return jsonify({
+            "alerts": [a.to_dict() for a in found],
+            "cursor": found[-1].id if found else after,
+        }), 200
+
     # ── CSV Export ───────────────────────────────────────────────────────
 
     @app.route("/api/transactions/export", methods=["GET"])
     @token_required
     def export_transactions():
-        transactions = Transaction.query.filter_by(user_id=request.user_id).order_by(Transaction.date.desc()).all()
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["ID", "Date", "Type", "Category", "Amount", "Description"])
-        for t in transactions:
-            writer.writerow([t.id, t.date.isoformat(), t.type, t.category, t.amount, t.description])
-        csv_content = output.getvalue()
-        output.close()
-        return Response(
-            csv_content,
-            mimetype="text/csv",
-            headers={"Content-Disposition": "attachment; filename=transactions.csv"},
+        columns = (
+            Transaction.id, Transaction.date, Transaction.type, Transaction.category,
+            cents(Transaction.amount), Transaction.currency, Transaction.description,
         )
+        base = fx.base_currency(request.user_id)
+        query = filter_transactions(db.session.query(*columns), request.user_id, request.args)
+        rows = query.order_by(Transaction.date.desc()).yield_per(EXPORT_BATCH_SIZE)
+        chunks = _csv_chunks(rows, base)
+        headers = {"Content-Disposition": "attachment; filename=transactions.csv"}
+        if request.accept_encodings["gzip"]:
+            chunks = _gzip_chunks(chunks)
+            headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+        return Response(stream_with_context(chunks), mimetype="text/csv", headers=headers)
 
     # ── Goals ──────────────────────────────────────────
     @app.route("/api/goals", methods=["GET"])
     @token_required
+    @conditional
     def get_goals():
-        goals = Goal.query.filter_by(user_id=request.user_id).order_by(Goal.created_at.desc()).all()
-        return jsonify({"goals": [g.to_dict() for g in goals]})
+        return jsonify({"goals": goals.summaries(request.user_id)})
 
     @app.route("/api/goals", methods=["POST"])
     @token_required
+    @invalidates_cache
     def create_goal():
         data = request.get_json()
         if not data or not data.get("name") or not data.get("target_amount"):
             return jsonify({"error": "Name and target amount are required"}), 400
+        try:
+            target_amount = to_decimal(data["target_amount"])
+            current_amount = to_decimal(data.get("current_amount", 0))
+        except ValueError:
+            return jsonify({"error": "Invalid amount"}), 400
         goal = Goal(
             user_id=request.user_id,
             name=data["name"],
-            target_amount=float(data["target_amount"]),
-            current_amount=float(data.get("current_amount", 0)),
+            target_amount=target_amount,
+            current_amount=current_amount,
+            opening_amount=current_amount,
             deadline=data.get("deadline"),
             icon=data.get("icon", "⭐"),
         )
         db.session.add(goal)
+        versioning.bump(request.user_id)
         db.session.commit()
         return jsonify(goal.to_dict()), 201
 
     @app.route("/api/goals/<int:goal_id>", methods=["PUT"])
     @token_required
+    @invalidates_cache
     def update_goal(goal_id):
-        goal = Goal.query.get(goal_id)
+        goal = db.session.get(Goal, goal_id)
         if not goal or goal.user_id != request.user_id:
             return jsonify({"error": "Goal not found"}), 404
         data = request.get_json()
         if data.get("name"):
             goal.name = data["name"]
-        if data.get("target_amount") is not None:
-            goal.target_amount = float(data["target_amount"])
-        if data.get("current_amount") is not None:
-            goal.current_amount = float(data["current_amount"])
+        try:
+            if data.get("target_amount") is not None:
+                goal.target_amount = to_decimal(data["target_amount"])
+            current_amount = to_decimal(data["current_amount"]) if data.get("current_amount") is not None else None
+        except ValueError:
+            return jsonify({"error": "Invalid amount"}), 400
         if "deadline" in data:
             goal.deadline = data["deadline"]
         if data.get("icon"):
             goal.icon = data["icon"]
+        # Clients that still PUT a whole goal resend the total they read; only a changed one is applied.
+        if current_amount is not None and current_amount != goal.current_amount:
+            goals.set_current(goal, current_amount)
+        versioning.bump(request.user_id)
         db.session.commit()
         return jsonify(goal.to_dict())
 
     @app.route("/api/goals/<int:goal_id>", methods=["DELETE"])
     @token_required
+    @invalidates_cache
     def delete_goal(goal_id):
-        goal = Goal.query.get(goal_id)
+        goal = db.session.get(Goal, goal_id)
         if not goal or goal.user_id != request.user_id:
             return jsonify({"error": "Goal not found"}), 404
+        # Contributions stay as ordinary transactions.
+        Transaction.query.filter_by(goal_id=goal.id).update({"goal_id": None})
         db.session.delete(goal)
+        versioning.bump(request.user_id)
         db.session.commit()
         return jsonify({"message": "Goal deleted"})
 
+    @app.route("/api/goals/<int:goal_id>/contributions", methods=["POST"])
+    @token_required
+    @invalidates_cache
+    def add_goal_contribution(goal_id):
+        goal = db.session.get(Goal, goal_id)
+        if not goal or goal.user_id != request.user_id:
+            return jsonify({"error": "Goal not found"}), 404
+        data = request.get_json()
+        if not data or "amount" not in data:
+            return jsonify({"error": "amount is required"}), 400
+        try:
+            amount = to_decimal(data["amount"])
+        except ValueError:
+            return jsonify({"error": "Invalid amount"}), 400
+        # A negative amount withdraws from the goal.
+        try:
+            values = parse_transaction({
+                "amount": abs(amount),
+                "type": goals.SAVING if amount > 0 else goals.WITHDRAWAL,
+                "category": data.get("category", goals.CONTRIBUTION_CATEGORY),
+                "date": data.get("date", date.today().isoformat()),
+                "currency": data.get("currency"),
+                "description": data.get("description") or f"{'Saved towards' if amount > 0 else 'Withdrawn from'} {goal.name}",
+            }, fx.base_currency(request.user_id), types=goals.CONTRIBUTION_TYPES)
+        except ValidationError as exc:
+            return jsonify({"error": str(exc)}), 400
+        txn = Transaction(user_id=request.user_id, goal_id=goal.id, **values)
+        db.session.add(txn)
+        rollups.record(txn)
+        goals.record(txn)
+        analytics.record(txn)
+        versioning.bump(request.user_id)
+        db.session.commit()
+        [summary] = goals.summaries(request.user_id, goal_id=goal.id)
+        return jsonify({"goal": summary, "transaction": txn.to_dict()}), 201
+
     return app
 
 
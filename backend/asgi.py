@@ -0,0 +1,158 @@
+"""ASGI entry point serving the same Flask routes.
+
+    uvicorn asgi:create_asgi_app --factory --workers 2    # from backend/
+
+The ASGI server owns the sockets on an event loop, so idle keep-alive and
+slow connections cost a coroutine rather than a thread; only requests that
+are actually executing occupy one of ASGI_THREADS pool threads. Views stay
+synchronous (and keep using the regular SQLAlchemy engine): each request
+runs the Flask WSGI app on the pool, its body is pulled from the ASGI
+receive channel on demand, and streamed responses such as the CSV export
+are sent chunk by chunk as the generator produces them, with backpressure
+from the client. bcrypt already runs on its own process pool (hashing.py).
+An /api/alerts long-poll holds its thread while it waits, so at most half
+the pool may be waiting (see alerts.py); further polls get an immediate 204.
+"""
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import create_app
+import alerts
+
+DEFAULT_THREADS = 64
+
+
+class _RequestBody(io.RawIOBase):
+    """Blocking file object over ASGI ``http.request`` messages, read from a pool thread."""
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = b""
+        self._more = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self._buffer and self._more:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message["type"] == "http.disconnect":
+                self._more = False
+                break
+            self._buffer = message.get("body", b"")
+            self._more = message.get("more_body", False)
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def build_environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BufferedReader(body),
+        # The body ends where the ASGI stream ends, with or without Content-Length.
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class ASGIAdapter:
+    """Serve a WSGI app over ASGI, running each request on a bounded thread pool."""
+
+    def __init__(self, wsgi_app, threads=DEFAULT_THREADS, on_shutdown=None):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="asgi")
+        self.on_shutdown = on_shutdown
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            loop = asyncio.get_running_loop()
+            environ = build_environ(scope, _RequestBody(receive, loop))
+            await loop.run_in_executor(self.executor, self._run, environ, send, loop)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.on_shutdown is not None:
+                    self.on_shutdown()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _run(self, environ, send, loop):
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+        def start():
+            emit({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            started = False
+            for chunk in result:
+                if not chunk:
+                    continue
+                if not started:
+                    start()
+                    started = True
+                emit({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not started:
+                start()
+            emit({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+
+def create_asgi_app(config=None, threads=None):
+    app = create_app(config)
+    threads = threads or int(os.environ.get("ASGI_THREADS", DEFAULT_THREADS))
+    notifier = app.extensions[alerts.EXTENSION_KEY]
+    notifier.max_waiters = min(notifier.max_waiters, max(threads // 2, 1))
+    adapter = ASGIAdapter(app.wsgi_app, threads=threads, on_shutdown=app.extensions["password_hasher"].shutdown)
+    adapter.flask_app = app
+    return adapter
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("asgi:create_asgi_app", factory=True, host="0.0.0.0", port=5001)
@@ -1,19 +1,35 @@
 import os
 import jwt
-import bcrypt
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from functools import wraps
-from flask import request, jsonify
+from flask import current_app, request, jsonify
+
+from sqlalchemy import delete, select
+
+from models import db, User, RevokedToken
+import hashing
+import metrics
 
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "dev-secret-key-change-in-production")
+TOKEN_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", 10_000))
+# How long a worker trusts its registry entry before re-checking that the user still exists.
+USER_RECHECK_SECONDS = int(os.environ.get("AUTH_USER_RECHECK_SECONDS", 60))
+EXTENSION_KEY = "auth"
 
 
-def hash_password(password):
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+def hash_password(password, rounds=None):
+    """Hash inline; request handlers go through the app's hashing.PasswordHasher instead."""
+    rounds = rounds or int(os.environ.get("BCRYPT_ROUNDS", hashing.DEFAULT_ROUNDS))
+    return hashing._hash(password, rounds)
 
 
 def check_password(password, password_hash):
-    return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+    return hashing._check(password, password_hash)
 
 
 def create_token(user_id, username):
@@ -22,6 +38,7 @@ def create_token(user_id, username):
         "username": username,
         "exp": datetime.now(timezone.utc) + timedelta(hours=24),
         "iat": datetime.now(timezone.utc),
+        "jti": secrets.token_urlsafe(8),
     }
     return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
 
@@ -35,19 +52,163 @@ def decode_token(token):
         return None
 
 
+def token_digest(token):
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def revocation_id(digest, payload):
+    """The ``revoked_tokens`` key: the token's ``jti``, or the hex digest of a token issued without one."""
+    return payload.get("jti") or digest.hex()
+
+
+class AuthState:
+    """Per-app verified-token LRU, user registry and revocation set.
+
+    Verified payloads are cached under the token's SHA-256 digest until
+    their ``exp``, so repeat requests skip the signature check. The registry
+    maps user ids to their public profile; entries are re-checked against
+    the database every USER_RECHECK_SECONDS, and :meth:`forget_user` drops
+    one immediately.
+
+    Logouts are stored by ``jti`` in the ``revoked_tokens`` table so every
+    worker and every instance sharing the database honours them on the very
+    next request: every verify, cached or not, does one primary-key lookup
+    there. Digests found revoked (or revoked here) are kept locally until
+    the token would have expired, so a revoked token costs no query.
+    Tokens issued before ``jti`` was added are recorded under their digest.
+    """
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE, recheck_seconds=USER_RECHECK_SECONDS):
+        self.maxsize = maxsize
+        self.recheck_seconds = recheck_seconds
+        self._tokens = OrderedDict()
+        self._users = {}
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self.stats = {"token_hits": 0, "token_misses": 0, "revoked": 0, "user_hits": 0, "user_misses": 0}
+
+    def verify(self, token):
+        """Return the token's payload, or None if it is invalid, expired or revoked."""
+        digest = token_digest(token)
+        now = time.time()
+        with self._lock:
+            if digest in self._revoked:
+                self.stats["revoked"] += 1
+                return None
+            payload = self._tokens.get(digest)
+            if payload is not None and payload["exp"] <= now:
+                del self._tokens[digest]
+                payload = None
+            if payload is None:
+                self.stats["token_misses"] += 1
+            else:
+                self._tokens.move_to_end(digest)
+                self.stats["token_hits"] += 1
+        if payload is None:
+            payload = decode_token(token)
+            if payload is None:
+                return None
+            with self._lock:
+                self._tokens[digest] = payload
+                while len(self._tokens) > self.maxsize:
+                    self._tokens.popitem(last=False)
+        if self._is_revoked(digest, payload):
+            with self._lock:
+                self._tokens.pop(digest, None)
+                self._revoked[digest] = payload["exp"]
+                self.stats["revoked"] += 1
+            return None
+        return payload
+
+    def _is_revoked(self, digest, payload):
+        # The primary, like get_user: a lagging replica would miss a logout made moments ago.
+        query = select(RevokedToken.jti).where(RevokedToken.jti == revocation_id(digest, payload))
+        return db.session.execute(query, bind_arguments={"bind": db.engine}).first() is not None
+
+    def revoke(self, token, payload):
+        """Revoke ``token`` in every worker; expired revocations are pruned. Commits."""
+        digest = token_digest(token)
+        now = time.time()
+        with self._lock:
+            self._tokens.pop(digest, None)
+            self._revoked = {d: exp for d, exp in self._revoked.items() if exp > now}
+            self._revoked[digest] = payload["exp"]
+        db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.fromtimestamp(now, timezone.utc)))
+        db.session.merge(RevokedToken(
+            jti=revocation_id(digest, payload), user_id=payload["user_id"],
+            expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc),
+        ))
+        db.session.commit()
+
+    def remember_user(self, user):
+        with self._lock:
+            self._users[user.id] = (user.to_dict(), time.monotonic())
+
+    def forget_user(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def get_user(self, user_id):
+        """Return the user's public profile, or None if the account no longer exists."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and time.monotonic() - entry[1] < self.recheck_seconds:
+                self.stats["user_hits"] += 1
+                return entry[0]
+            self.stats["user_misses"] += 1
+        # Always ask the primary: a lagging replica would reject brand-new users.
+        user = db.session.get(User, user_id, bind_arguments={"bind": db.engine})
+        if user is None:
+            self.forget_user(user_id)
+            return None
+        self.remember_user(user)
+        return user.to_dict()
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def samples(self):
+        """Cache and revocation counters for /metrics."""
+        with self._lock:
+            stats = dict(self.stats)
+            size = len(self._tokens)
+        return [
+            ("auth_token_cache_hits_total", "counter", "Requests whose token was already verified.", stats["token_hits"]),
+            ("auth_token_cache_misses_total", "counter", "Requests whose token signature was checked.", stats["token_misses"]),
+            ("auth_token_cache_size", "gauge", "Verified tokens cached.", size),
+            ("auth_revoked_tokens_rejected_total", "counter", "Requests rejected for a revoked token.", stats["revoked"]),
+            ("auth_user_registry_hits_total", "counter", "User lookups served by the registry.", stats["user_hits"]),
+            ("auth_user_registry_misses_total", "counter", "User lookups that queried the database.", stats["user_misses"]),
+        ]
+
+
+def init_auth(app):
+    state = app.extensions[EXTENSION_KEY] = AuthState()
+    metrics.register_collector(app, state.samples)
+    return state
+
+
+def bearer_token():
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        return auth_header.split(" ")[1]
+    return None
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
+        token = bearer_token()
         if not token:
             return jsonify({"error": "Token is missing"}), 401
-        payload = decode_token(token)
+        state = current_app.extensions.get(EXTENSION_KEY)
+        payload = state.verify(token) if state is not None else decode_token(token)
         if not payload:
             return jsonify({"error": "Token is invalid or expired"}), 401
+        if state is not None and state.get_user(payload["user_id"]) is None:
+            return jsonify({"error": "Token is invalid or expired"}), 401
         request.user_id = payload["user_id"]
         request.username = payload["username"]
+        request.token_payload = payload
         return f(*args, **kwargs)
     return decorated
@@ -0,0 +1,102 @@
+"""Memory and query latency of the columnar analytics store.
+
+Usage (from backend/):
+    python -m benchmarks.analytics [ROWS ...]
+
+Each size gets a fresh SQLite database holding one user with ROWS
+transactions over three years. Reports the load time, the bytes held per
+user, and the median time of a few typical reports run directly against
+the columns (no HTTP or JSON), next to the equivalent SQL GROUP BY.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app import create_app
+from models import db, User, Transaction
+import analytics
+
+DEFAULT_SIZES = [10_000, 100_000]
+REPEATS = 50
+MERCHANTS = [f"Merchant {i}" for i in range(500)]
+CATEGORIES = ["Food", "Transport", "Entertainment", "Utilities", "Shopping", "Rent", "Salary"]
+
+REPORTS = {
+    "spend by weekday": dict(group_by=["weekday"], types=["expense"]),
+    "category x month": dict(group_by=["category", "month"], types=["expense"]),
+    "top 10 merchants": dict(group_by=["description"], types=["expense"], order="-sum", limit=10),
+    "last 90 days, mean/max": dict(metrics=["mean", "max"], start=date.today() - timedelta(days=90)),
+}
+
+
+def _load_rows(user_id, rows):
+    today = date.today()
+    batch = []
+    for i in range(rows):
+        category = random.choice(CATEGORIES)
+        batch.append({
+            "user_id": user_id,
+            "amount": round(random.uniform(5, 500), 2),
+            "category": category,
+            "description": random.choice(MERCHANTS),
+            "date": today - timedelta(days=random.randint(0, 3 * 365)),
+            "type": "income" if category == "Salary" else "expense",
+        })
+        if len(batch) == 10_000:
+            db.session.execute(Transaction.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Transaction.__table__.insert(), batch)
+    db.session.commit()
+
+
+def _median_ms(fn):
+    fn()
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def measure(rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app({"TESTING": True})
+        with app.app_context():
+            db.session.add(User(username="bench", password_hash="x"))
+            db.session.commit()
+            user_id = User.query.filter_by(username="bench").one().id
+            _load_rows(user_id, rows)
+
+            store = app.extensions[analytics.EXTENSION_KEY]
+            start = time.perf_counter()
+            columns = store.columns(user_id)
+            load_ms = (time.perf_counter() - start) * 1000
+            results = {name: _median_ms(lambda q=query: analytics.run_query(columns, **q)) for name, query in REPORTS.items()}
+            sql_ms = _median_ms(lambda: db.session.query(
+                Transaction.category, db.func.strftime("%Y-%m", Transaction.date), db.func.sum(Transaction.amount)
+            ).filter(Transaction.user_id == user_id, Transaction.type == "expense").group_by(
+                Transaction.category, db.func.strftime("%Y-%m", Transaction.date)
+            ).all())
+            nbytes = store.nbytes
+            db.engine.dispose()
+        return load_ms, nbytes, results, sql_ms
+
+
+def main(sizes):
+    for rows in sizes:
+        load_ms, nbytes, results, sql_ms = measure(rows)
+        print(f"{rows:,} transactions: loaded in {load_ms:.0f} ms, {nbytes / 2**20:.2f} MB")
+        for name, ms in results.items():
+            print(f"  {name:<24} {ms:8.3f} ms")
+        print(f"  {'category x month (SQL)':<24} {sql_ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
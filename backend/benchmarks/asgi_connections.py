@@ -0,0 +1,121 @@
+"""Hold many idle keep-alive connections open against the ASGI entry point.
+
+Usage (from backend/):
+    python -m benchmarks.asgi_connections [--connections 2000] [--threads 32] [--polls 64]
+
+Starts uvicorn on asgi.create_asgi_app, opens CONNECTIONS keep-alive
+connections that each fetch the dashboard once and then sit idle, and
+measures dashboard latency over a fresh connection while they are held.
+Meanwhile POLLS clients long-poll /api/alerts (``wait=5``) in a loop,
+retrying a second after each 204, so the latency shows whether waiting
+polls leave pool threads for ordinary requests. Needs uvicorn installed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import uvicorn
+
+from asgi import create_asgi_app
+from models import db
+
+
+async def _http(reader, writer, method, path, headers, body=b""):
+    head = f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n"
+    head += "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    writer.write(head.encode("latin-1") + b"\r\n" + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    payload = await reader.readexactly(length)
+    return int(status_line.split()[1]), payload
+
+
+async def _long_poll(port, headers, statuses, stop):
+    conn = await asyncio.open_connection("127.0.0.1", port)
+    while not stop.is_set():
+        status, _ = await _http(*conn, "GET", "/api/alerts?wait=5", headers)
+        statuses[status] = statuses.get(status, 0) + 1
+        if status == 204:
+            await asyncio.sleep(1)
+    conn[1].close()
+
+
+async def _scenario(port, connections, polls):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps({"username": "bench", "password": "benchpass"}).encode()
+    _, payload = await _http(reader, writer, "POST", "/api/signup", {"Content-Type": "application/json"}, body)
+    headers = {"Authorization": f"Bearer {json.loads(payload)['token']}"}
+
+    idle = []
+    start = time.perf_counter()
+    for _ in range(connections):
+        conn = await asyncio.open_connection("127.0.0.1", port)
+        status, _ = await _http(*conn, "GET", "/api/dashboard", headers)
+        assert status == 200
+        idle.append(conn)
+    open_seconds = time.perf_counter() - start
+
+    statuses, stop = {}, asyncio.Event()
+    pollers = [asyncio.create_task(_long_poll(port, headers, statuses, stop)) for _ in range(polls)]
+    await asyncio.sleep(0.5)
+    timings = []
+    for _ in range(200):
+        t0 = time.perf_counter()
+        await _http(reader, writer, "GET", "/api/dashboard", headers)
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+    stop.set()
+    await asyncio.gather(*pollers)
+    for _, conn_writer in idle:
+        conn_writer.close()
+    writer.close()
+    return open_seconds, statistics.median(timings) * 1000, timings[int(len(timings) * 0.99)] * 1000, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--polls", type=int, default=64, help="concurrent /api/alerts long-poll clients")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        application = create_asgi_app({"TESTING": True, "RESPONSE_CACHE": "none", "BCRYPT_ROUNDS": 4}, threads=args.threads)
+        config = uvicorn.Config(application, host="127.0.0.1", port=0, log_level="warning",
+                                timeout_keep_alive=600, backlog=args.connections)
+        server = uvicorn.Server(config)
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+        port = server.servers[0].sockets[0].getsockname()[1]
+
+        open_seconds, p50, p99, statuses = asyncio.run(_scenario(port, args.connections, args.polls))
+        waiting = application.flask_app.extensions["alerts"].max_waiters
+        print(f"idle connections:   {args.connections} (opened in {open_seconds:.2f}s)")
+        print(f"long-poll clients:  {args.polls} (at most {waiting} waiting; responses {dict(sorted(statuses.items()))})")
+        print(f"process threads:    {threading.active_count()}")
+        print(f"dashboard p50/p99:  {p50:.2f} / {p99:.2f} ms")
+
+        server.should_exit = True
+        thread.join()
+        with application.flask_app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
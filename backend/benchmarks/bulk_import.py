@@ -0,0 +1,62 @@
+"""Measure POST /api/transactions/import throughput on SQLite.
+
+Usage (from backend/):
+    python -m benchmarks.bulk_import [ROWS ...]
+
+Each size posts a CSV in the export layout to a fresh database and reports
+rows per second for the whole request (parse, validate, insert, rollups,
+search index triggers, commit).
+"""
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app import create_app
+from models import db
+from seed_data import CATEGORIES, EXPENSE_DESCRIPTIONS
+
+DEFAULT_SIZES = [20_000, 100_000]
+
+
+def make_csv(rows):
+    today = date.today()
+    out = io.StringIO()
+    out.write("ID,Date,Type,Category,Amount,Description\n")
+    for i in range(rows):
+        category = random.choice(CATEGORIES["expense"])
+        txn_date = today - timedelta(days=random.randint(0, 3 * 365))
+        out.write(f"{i},{txn_date.isoformat()},expense,{category},{random.uniform(5, 500):.2f},{random.choice(EXPENSE_DESCRIPTIONS[category])}\n")
+    return out.getvalue().encode("utf-8")
+
+
+def measure(rows):
+    body = make_csv(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app({"TESTING": True})
+        client = app.test_client()
+        token = client.post("/api/signup", json={"username": "bench", "password": "benchpass"}).get_json()["token"]
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "text/csv"}
+        start = time.perf_counter()
+        resp = client.post("/api/transactions/import", data=io.BytesIO(body), headers=headers)
+        elapsed = time.perf_counter() - start
+        assert resp.get_json()["imported"] == rows, resp.get_json()
+        with app.app_context():
+            db.engine.dispose()
+        return elapsed
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    print(f"{'rows':>10} {'seconds':>9} {'rows/s':>10}")
+    for rows in sizes:
+        elapsed = measure(rows)
+        print(f"{rows:>10} {elapsed:>9.2f} {rows / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,68 @@
+"""Diff two benchmarks.suite result files.
+
+Usage (from backend/):
+    python -m benchmarks.compare BASE.json NEW.json [--threshold 10] [--stat median]
+
+Prints each benchmark present in both files with the change in the chosen
+statistic, and exits 1 if any got slower by more than THRESHOLD percent,
+so it can gate CI. Benchmarks present in only one file are listed but
+never fail the comparison.
+"""
+import argparse
+import json
+import sys
+
+DEFAULT_THRESHOLD = 10.0
+
+
+def _load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {bench["name"]: bench["stats"] for bench in report["benchmarks"]}
+
+
+def compare(base, new, stat="median"):
+    """Yield (name, base seconds, new seconds, percent change) for benchmarks in both runs."""
+    for name, stats in base.items():
+        if name in new:
+            before, after = stats[stat], new[name][stat]
+            yield name, before, after, (after - before) / before * 100 if before else 0.0
+
+
+def _commit(report):
+    info = report.get("commit_info") or {}
+    commit = (info.get("id") or "unknown")[:12]
+    return commit + (" (dirty)" if info.get("dirty") else "")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="percent slowdown that fails")
+    parser.add_argument("--stat", default="median", choices=("min", "median", "mean", "max"))
+    args = parser.parse_args(argv)
+    base_report, base = _load(args.base)
+    new_report, new = _load(args.new)
+
+    print(f"{args.stat}: {_commit(base_report)} -> {_commit(new_report)}")
+    print(f"{'benchmark':<34} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    regressions = []
+    for name, before, after, change in compare(base, new, args.stat):
+        flag = ""
+        if change > args.threshold:
+            regressions.append(name)
+            flag = "  SLOWER"
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"{name:<34} {before * 1000:>10.2f} {after * 1000:>10.2f} {change:>+7.1f}%{flag}")
+    for name in sorted(set(base) ^ set(new)):
+        print(f"{name:<34} only in {'base' if name in base else 'new'}")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower by more than {args.threshold:g}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,91 @@
+"""Measure /api/dashboard latency as a user's transaction history grows.
+
+Usage (from backend/):
+    python -m benchmarks.dashboard [ROWS ...]
+
+Each size gets a fresh SQLite database holding one user with ROWS
+transactions spread over three years; the reported figures are the median
+of several warm requests with the response cache disabled (aggregation
+cost) and enabled (repeat loads served from the cache).
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app import create_app
+from models import db, User, Transaction
+import rollups
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000, 100_000]
+REPEATS = 15
+
+
+def _load_rows(user_id, rows):
+    today = date.today()
+    categories = ["Food", "Transport", "Entertainment", "Utilities", "Shopping", "Rent"]
+    batch = []
+    for i in range(rows):
+        income = i % 10 == 0
+        batch.append({
+            "user_id": user_id,
+            "amount": round(random.uniform(10, 500), 2),
+            "category": "Salary" if income else random.choice(categories),
+            "description": "",
+            "date": today - timedelta(days=random.randint(0, 3 * 365)),
+            "type": "income" if income else "expense",
+        })
+        if len(batch) == 10_000:
+            db.session.execute(Transaction.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Transaction.__table__.insert(), batch)
+    rollups.rebuild(user_id)
+    db.session.commit()
+
+
+def _median_ms(client, headers):
+    client.get("/api/dashboard", headers=headers)
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        resp = client.get("/api/dashboard", headers=headers)
+        timings.append(time.perf_counter() - start)
+        assert resp.status_code == 200
+    return statistics.median(timings) * 1000
+
+
+def measure(rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app({"TESTING": True, "RESPONSE_CACHE": "none"})
+        client = app.test_client()
+        token = client.post("/api/signup", json={"username": "bench", "password": "benchpass"}).get_json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        with app.app_context():
+            _load_rows(User.query.filter_by(username="bench").one().id, rows)
+
+        uncached = _median_ms(client, headers)
+        with app.app_context():
+            db.engine.dispose()
+
+        app = create_app({"TESTING": True, "RESPONSE_CACHE": "memory"})
+        cached = _median_ms(app.test_client(), headers)
+        with app.app_context():
+            db.engine.dispose()
+        return uncached, cached
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    print(f"{'rows':>10}  {'uncached ms':>12}  {'cached ms':>10}")
+    for rows in sizes:
+        uncached, cached = measure(rows)
+        print(f"{rows:>10}  {uncached:>12.2f}  {cached:>10.3f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
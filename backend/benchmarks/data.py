@@ -0,0 +1,189 @@
+"""Synthetic users and transactions for benchmarks and load tests.
+
+Usage (from backend/):
+    python -m benchmarks.data USERS TRANSACTIONS_PER_USER [--seed N]
+
+fills the database named by DATABASE_URL. Benchmarks call :func:`load`.
+
+Histories reuse seed_data's categories and descriptions over the last
+MONTHS months: a monthly salary and rent, occasional other income, and
+day-to-day spending drawn with per-category weights and log-normal
+amounts, so a few large purchases sit among many small ones. The same
+seed gives the same rows. Rows are inserted as raw cents with multi-row
+executemany batches, and the table's indexes, the search index and the
+rollups are each built once at the end.
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import date, timedelta
+
+from sqlalchemy import BigInteger, bindparam
+
+from auth import hash_password
+from models import db, User, Transaction, Budget, Goal
+from seed_data import EXPENSE_DESCRIPTIONS, INCOME_ENTRIES
+import rollups
+import search
+
+PASSWORD = "benchpass"
+MONTHS = 36
+BATCH_SIZE = 20_000
+# Share of day-to-day spending, and the median amount in dollars.
+SPENDING = {
+    "Food": (0.38, 22),
+    "Transport": (0.16, 18),
+    "Entertainment": (0.11, 30),
+    "Shopping": (0.14, 55),
+    "Utilities": (0.08, 75),
+    "Healthcare": (0.06, 60),
+    "Education": (0.03, 110),
+}
+SPREAD = 0.7
+_SPENDING_CATEGORIES = list(SPENDING)
+_SPENDING_WEIGHTS = [weight for weight, _ in SPENDING.values()]
+_OTHER_INCOME = INCOME_ENTRIES[1:]
+
+
+def username(n):
+    return f"bench{n:07d}"
+
+
+def _cents(rng, median):
+    return max(100, round(rng.lognormvariate(math.log(median), SPREAD) * 100))
+
+
+def _history(user_id, count, rng, today):
+    months = [date(today.year + (today.month - 1 - i) // 12, (today.month - 1 - i) % 12 + 1, 1) for i in range(MONTHS)]
+    salary = _cents(rng, 5000)
+    rent = _cents(rng, 1400)
+    # Two fixed rows a month while the history is long enough; the rest is day-to-day.
+    fixed = min(count // 10, 2 * MONTHS)
+    for i in range(fixed):
+        month = months[i // 2]
+        if i % 2 == 0:
+            yield {"user_id": user_id, "amount_cents": salary, "category": "Salary", "description": "Monthly salary",
+                   "date": min(month + timedelta(days=rng.randint(0, 2)), today), "type": "income"}
+        else:
+            yield {"user_id": user_id, "amount_cents": rent, "category": "Rent", "description": "Monthly rent",
+                   "date": min(month + timedelta(days=rng.randint(0, 4)), today), "type": "expense"}
+    span = (today - months[-1]).days
+    for category in rng.choices(_SPENDING_CATEGORIES, _SPENDING_WEIGHTS, k=count - fixed):
+        day = today - timedelta(days=rng.randint(0, span))
+        if rng.random() < 0.04:
+            entry = rng.choice(_OTHER_INCOME)
+            yield {"user_id": user_id, "amount_cents": rng.randint(*entry["amount_range"]) * 100,
+                   "category": entry["category"], "description": entry["description"], "date": day, "type": "income"}
+        else:
+            yield {"user_id": user_id, "amount_cents": _cents(rng, SPENDING[category][1]), "category": category,
+                   "description": rng.choice(EXPENSE_DESCRIPTIONS[category]), "date": day, "type": "expense"}
+
+
+def transactions(user_id, count, rng, today=None):
+    """Return ``count`` transaction rows (amounts in ``amount_cents``) for one user, oldest first.
+
+    Date order keeps the (user_id, date...) index inserts appending rather than scattered.
+    """
+    return sorted(_history(user_id, count, rng, today or date.today()), key=lambda row: row["date"])
+
+
+def _insert_transactions(rows):
+    table = Transaction.__table__
+    # Amounts are already cents: bind them as integers instead of through the Money type.
+    stmt = table.insert().values(amount=bindparam("amount_cents", type_=BigInteger))
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            db.session.execute(stmt, batch)
+            batch = []
+    if batch:
+        db.session.execute(stmt, batch)
+
+
+@contextmanager
+def _indexes_deferred(table):
+    """Drop ``table``'s indexes for the block and rebuild each with one sort afterwards.
+
+    Maintaining five secondary indexes row by row is most of the cost of a
+    large load; the DDL is transactional, so a failure restores them.
+    """
+    conn = db.session.connection()
+    indexes = sorted(table.indexes, key=lambda index: index.name)
+    for index in indexes:
+        index.drop(conn)
+    yield
+    for index in indexes:
+        index.create(conn)
+
+
+def create_users(count, start=0, password=PASSWORD):
+    """Insert users ``bench<start>`` .. and return their ids; they all share one password hash."""
+    password_hash = hash_password(password)
+    rows = [{"username": username(start + i), "password_hash": password_hash} for i in range(count)]
+    db.session.execute(User.__table__.insert(), rows)
+    names = [row["username"] for row in rows]
+    ids = dict(db.session.query(User.username, User.id).filter(User.username.in_(names)))
+    return [ids[name] for name in names]
+
+
+def add_budgets_and_goals(user_ids, today=None):
+    month = (today or date.today()).strftime("%Y-%m")
+    budgets = [
+        {"user_id": user_id, "category": category, "limit_amount": limit, "month": month}
+        for user_id in user_ids
+        for category, limit in (("Food", 600), ("Transport", 300), ("Entertainment", 200), ("Shopping", 400))
+    ]
+    goals = [
+        {"user_id": user_id, "name": name, "target_amount": target, "current_amount": 0, "opening_amount": 0}
+        for user_id in user_ids
+        for name, target in (("Emergency Fund", 10000), ("Vacation", 3000))
+    ]
+    db.session.execute(Budget.__table__.insert(), budgets)
+    db.session.execute(Goal.__table__.insert(), goals)
+
+
+def load(users, per_user, seed=0, start=0, today=None):
+    """Create ``users`` users with ``per_user`` transactions each; return the user ids. Commits.
+
+    Into an empty table the indexes are rebuilt once at the end; appending
+    to existing rows keeps them and only rebuilds the new users' rollups.
+    """
+    rng = random.Random(seed)
+    empty = db.session.query(Transaction.id).first() is None
+    user_ids = create_users(users, start)
+    rows = (row for user_id in user_ids for row in transactions(user_id, per_user, rng, today))
+    with _indexes_deferred(Transaction.__table__) if empty else nullcontext(), search.deferred_indexing():
+        _insert_transactions(rows)
+    add_budgets_and_goals(user_ids, today)
+    if empty:
+        rollups.rebuild()
+    else:
+        for user_id in user_ids:
+            rollups.rebuild(user_id)
+    db.session.commit()
+    return user_ids
+
+
+def main(app, argv=None):
+    parser = argparse.ArgumentParser(description="Fill the database with synthetic users and transactions.")
+    parser.add_argument("users", type=int)
+    parser.add_argument("per_user", type=int, metavar="TRANSACTIONS_PER_USER")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    with app.app_context():
+        start = db.session.query(db.func.count(User.id)).scalar()
+        began = time.perf_counter()
+        load(args.users, args.per_user, args.seed, start=start)
+        elapsed = time.perf_counter() - began
+    total = args.users * args.per_user
+    print(f"Loaded {args.users} users x {args.per_user} transactions ({total} rows) in {elapsed:.1f}s; password {PASSWORD!r}")
+    return 0
+
+
+if __name__ == "__main__":
+    from app import create_app
+    sys.exit(main(create_app()))
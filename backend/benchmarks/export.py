@@ -0,0 +1,58 @@
+"""Measure peak Python memory and time-to-first-byte of the CSV export.
+
+Usage (from backend/):
+    python -m benchmarks.export [ROWS ...]
+
+Peak memory is traced with tracemalloc while the streamed response is
+consumed chunk by chunk, so it should stay roughly constant as ROWS grows.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app import create_app
+from models import db, User
+from benchmarks.dashboard import _load_rows
+
+DEFAULT_SIZES = [10_000, 100_000, 300_000]
+
+
+def measure(rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app({"TESTING": True})
+        client = app.test_client()
+        token = client.post("/api/signup", json={"username": "bench", "password": "benchpass"}).get_json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        with app.app_context():
+            _load_rows(User.query.filter_by(username="bench").one().id, rows)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        resp = client.get("/api/transactions/export", headers=headers, buffered=False)
+        chunks = iter(resp.response)
+        size = len(next(chunks))
+        first_byte = time.perf_counter() - start
+        for chunk in chunks:
+            size += len(chunk)
+        total = time.perf_counter() - start
+        resp.close()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with app.app_context():
+            db.engine.dispose()
+        return first_byte * 1000, total * 1000, size / 2**20, peak / 2**20
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    print(f"{'rows':>10} {'ttfb ms':>9} {'total ms':>9} {'csv MiB':>8} {'peak MiB':>9}")
+    for rows in sizes:
+        ttfb, total, size, peak = measure(rows)
+        print(f"{rows:>10} {ttfb:>9.1f} {total:>9.0f} {size:>8.1f} {peak:>9.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,85 @@
+"""Time the batch forecast (forecast.forecast_all) over many users.
+
+Usage (from backend/):
+    python -m benchmarks.forecast [USERS ...]
+
+Each size gets a fresh SQLite database whose monthly_rollups table holds
+three years of income and expense rows per user (seasonal, trending and
+noisy), written directly rather than through transactions. The figures are
+the time to read the rollups and fit every user's series, and for
+comparison the per-user loop the API uses (forecast_user) on a sample.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+from app import create_app
+from models import db, User, MonthlyRollup
+import forecast
+
+DEFAULT_SIZES = [1_000, 10_000]
+SAMPLE_USERS = 50
+
+
+def _load_users(users):
+    rng = np.random.default_rng(0)
+    months = forecast.months_back(forecast.add_months(date.today(), -1), forecast.HISTORY_MONTHS)
+    t = np.arange(len(months))
+    db.session.execute(User.__table__.insert(), [
+        {"username": f"user{i}", "password_hash": "x"} for i in range(users)
+    ])
+    user_ids = [row[0] for row in db.session.query(User.id).order_by(User.id)]
+    batch = []
+    for user_id in user_ids:
+        base = rng.uniform(1500, 8000)
+        income = base * (1 + rng.uniform(0, 0.01) * t) + rng.normal(0, base * 0.03, len(t))
+        expenses = base * 0.8 * (1 + 0.15 * np.sin(2 * np.pi * t / 12)) + rng.normal(0, base * 0.05, len(t))
+        for i, month in enumerate(months):
+            batch.append({"user_id": user_id, "month": month, "type": "income", "category": "Salary",
+                          "total": round(float(income[i]), 2), "count": 1})
+            batch.append({"user_id": user_id, "month": month, "type": "expense", "category": "Food",
+                          "total": round(float(expenses[i]), 2), "count": 20})
+        if len(batch) >= 50_000:
+            db.session.execute(MonthlyRollup.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(MonthlyRollup.__table__.insert(), batch)
+    db.session.commit()
+    return user_ids
+
+
+def measure(users):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app({"TESTING": True})
+        with app.app_context():
+            user_ids = _load_users(users)
+            start = time.perf_counter()
+            ids, result = forecast.forecast_all(horizon=3)
+            batch = time.perf_counter() - start
+            assert len(ids) == users and result.shape == (users, 2, 3)
+
+            timings = []
+            for user_id in user_ids[:SAMPLE_USERS]:
+                start = time.perf_counter()
+                forecast.forecast_user(user_id, horizon=3)
+                timings.append(time.perf_counter() - start)
+            per_user = statistics.mean(timings)
+            db.engine.dispose()
+        return batch, per_user
+
+
+def main(sizes):
+    print(f"{'users':>8}  {'batch s':>9}  {'per-user loop s (est.)':>22}")
+    for users in sizes:
+        batch, per_user = measure(users)
+        print(f"{users:>8}  {batch:>9.2f}  {per_user * users:>22.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,332 @@
+"""Concurrent user sessions against a locally started server, ramped in stages.
+
+Usage (from backend/):
+    python -m benchmarks.load [--server werkzeug|gunicorn|uvicorn] [--workers 4]
+                              [--users 50] [--transactions 2000] [--stages 1 4 16 32]
+                              [--duration 15] [--think 0] [--output FILE]
+    python -m benchmarks.load --url http://127.0.0.1:5001 ...   # an already running server
+
+A fresh SQLite database is filled by benchmarks.data (USERS users with
+TRANSACTIONS each, password ``benchpass``) and served by the chosen server:
+werkzeug's threaded server in this process, or gunicorn/uvicorn started as
+a subprocess with WORKERS processes. With --url the database is left alone,
+so load it first with ``python -m benchmarks.data``.
+
+Each virtual user plays sessions: log in, then SESSION_LENGTH actions drawn
+from MIX (dashboard, transaction list pages, adding a transaction, budgets)
+with an exponential think time averaging THINK seconds; 0 keeps every
+virtual user busy, which measures capacity. Every stage runs that many
+virtual users for DURATION seconds and reports throughput plus p50/p95/p99
+latency and the error rate per route. Any response other than 2xx counts as
+an error, including 429s from a saturated password-hash pool.
+
+The load generator is threaded Python; with the in-process werkzeug server
+both share one GIL, so use gunicorn or uvicorn for capacity figures.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+from werkzeug.serving import make_server
+
+from app import create_app
+from models import db
+from benchmarks import data
+from benchmarks.suite import commit_info, machine_info
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STAGES = [1, 4, 16, 32]
+SESSION_LENGTH = 20
+STARTUP_TIMEOUT = 30
+REQUEST_TIMEOUT = 60
+PERCENTILES = (50, 95, 99)
+# Weighted actions of a logged-in session.
+MIX = [
+    ("dashboard", 30),
+    ("transactions", 30),
+    ("add_transaction", 10),
+    ("budgets", 15),
+]
+_ACTIONS = [name for name, _ in MIX]
+_WEIGHTS = [weight for _, weight in MIX]
+_LIST_CATEGORIES = ["", "", "Food", "Transport", "Shopping"]
+
+
+class Client:
+    """One keep-alive HTTP connection, reopened whenever the server closes it."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.token = None
+        self._conn = None
+
+    def request(self, method, path, body=None):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        try:
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=REQUEST_TIMEOUT)
+            self._conn.request(method, path, body=payload, headers=headers)
+            resp = self._conn.getresponse()
+            content = resp.read()
+            if resp.will_close:
+                self.close()
+            return resp.status, content
+        except (OSError, http.client.HTTPException):
+            self.close()
+            return 0, b""
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _action(name, rng, today):
+    """(method, path, body) of one session action."""
+    if name == "dashboard":
+        return "GET", "/api/dashboard", None
+    if name == "budgets":
+        return "GET", "/api/budgets", None
+    if name == "transactions":
+        path = f"/api/transactions?page={rng.choice((1, 1, 1, 2, 3))}"
+        category = rng.choice(_LIST_CATEGORIES)
+        return "GET", path + (f"&category={category}" if category else ""), None
+    category = rng.choice(("Food", "Transport", "Shopping", "Entertainment"))
+    return "POST", "/api/transactions", {
+        "amount": round(rng.lognormvariate(3, 0.7), 2),
+        "category": category,
+        "description": rng.choice(data.EXPENSE_DESCRIPTIONS[category]),
+        "date": (today - timedelta(days=rng.randint(0, 30))).isoformat(),
+        "type": "expense",
+    }
+
+
+def virtual_user(client, username, rng, think, stop, record):
+    """Play sessions until ``stop`` is set, passing (route, status, seconds) to ``record``."""
+    today = date.today()
+
+    def call(route, method, path, body=None):
+        start = time.perf_counter()
+        status, content = client.request(method, path, body)
+        record(route, status, time.perf_counter() - start)
+        return status, content
+
+    while not stop.is_set():
+        status, content = call("login", "POST", "/api/login", {"username": username, "password": data.PASSWORD})
+        if status != 200:
+            # Back off briefly so a failing login does not spin.
+            stop.wait(0.1)
+            continue
+        client.token = json.loads(content)["token"]
+        for name in rng.choices(_ACTIONS, _WEIGHTS, k=SESSION_LENGTH):
+            if think:
+                stop.wait(rng.expovariate(1 / think))
+            if stop.is_set():
+                break
+            call(name, *_action(name, rng, today))
+        client.token = None
+
+
+def _percentile(ordered, pct):
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def summarize(samples, seconds):
+    """Per-route and overall figures of one stage's (route, status, seconds) samples."""
+    by_route = defaultdict(list)
+    for route, status, elapsed in samples:
+        by_route[route].append((status, elapsed))
+    by_route["all"] = [(status, elapsed) for _, status, elapsed in samples]
+    routes = {}
+    for route, rows in by_route.items():
+        if not rows:
+            continue
+        latencies = sorted(elapsed for _, elapsed in rows)
+        statuses = Counter(status for status, _ in rows)
+        errors = sum(count for status, count in statuses.items() if not 200 <= status < 300)
+        routes[route] = {
+            "count": len(rows),
+            "rps": len(rows) / seconds,
+            **{f"p{pct}": _percentile(latencies, pct) for pct in PERCENTILES},
+            "error_rate": errors / len(rows),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        }
+    return routes
+
+
+def run_stage(host, port, usernames, concurrency, duration, think, seed):
+    samples = []
+    stop = threading.Event()
+    clients = [Client(host, port) for _ in range(concurrency)]
+    threads = [
+        threading.Thread(
+            target=virtual_user,
+            args=(client, usernames[i % len(usernames)], random.Random(seed + i), think, stop,
+                  lambda *sample: samples.append(sample)),
+            daemon=True,
+        )
+        for i, client in enumerate(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        client.close()
+    return {"concurrency": concurrency, "seconds": elapsed, "routes": summarize(samples, elapsed)}
+
+
+# ── Servers ──────────────────────────────────────────────────────────
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(host, port, process):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not listen on {host}:{port} within {STARTUP_TIMEOUT}s")
+
+
+def start_server(kind, workers, threads):
+    """Start ``kind`` on a free local port; return (port, stop callable)."""
+    if kind == "werkzeug":
+        app = create_app({"SLOW_REQUEST_MS": 0})
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        def stop():
+            server.shutdown()
+            app.extensions["password_hasher"].shutdown()
+            with app.app_context():
+                db.engine.dispose()
+        return server.server_port, stop
+
+    port = _free_port()
+    if kind == "gunicorn":
+        command = ["-m", "gunicorn", "--workers", str(workers), "--threads", str(threads),
+                   "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "app:create_app()"]
+    else:
+        command = ["-m", "uvicorn", "asgi:create_asgi_app", "--factory", "--workers", str(workers),
+                   "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    process = subprocess.Popen([sys.executable, *command], cwd=BACKEND_DIR, env={**os.environ, "SLOW_REQUEST_MS": "0"})
+    try:
+        _wait_until_up("127.0.0.1", port, process)
+    except RuntimeError:
+        process.kill()
+        raise
+
+    def stop():
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return port, stop
+
+
+def _load_data(users, transactions):
+    app = create_app()
+    with app.app_context():
+        start = time.perf_counter()
+        data.load(users, transactions)
+        print(f"Loaded {users} users x {transactions} transactions in {time.perf_counter() - start:.1f}s")
+        db.engine.dispose()
+    app.extensions["password_hasher"].shutdown()
+
+
+def _print_stage(stage):
+    for route in [*_ACTIONS, "login", "all"]:
+        r = stage["routes"].get(route)
+        if r is None:
+            continue
+        print(f"{stage['concurrency']:>5} {route:<16} {r['count']:>7} {r['rps']:>8.1f} "
+              + " ".join(f"{r[f'p{pct}'] * 1000:>8.1f}" for pct in PERCENTILES)
+              + f" {r['error_rate'] * 100:>6.1f}")
+
+
+def main(argv):
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=("werkzeug", "gunicorn", "uvicorn"), default="werkzeug")
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn/uvicorn worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="threads per gunicorn worker")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--transactions", type=int, default=2000, help="per user")
+    parser.add_argument("--stages", type=int, nargs="+", default=DEFAULT_STAGES, metavar="CONCURRENCY")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per stage")
+    parser.add_argument("--think", type=float, default=0, help="mean seconds between a session's actions")
+    parser.add_argument("--bcrypt-rounds", type=int, help="BCRYPT_ROUNDS for the loaded users")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    usernames = [data.username(i) for i in range(args.users)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port, stop = url.hostname, url.port or 80, lambda: None
+        else:
+            os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+            _load_data(args.users, args.transactions)
+            host = "127.0.0.1"
+            port, stop = start_server(args.server, args.workers, args.threads)
+        # Warm up the password-hash pool so its start-up is not timed as a slow login.
+        warmup = Client(host, port)
+        warmup.request("POST", "/api/login", {"username": usernames[0], "password": data.PASSWORD})
+        warmup.close()
+        stages = []
+        print(f"{'conc':>5} {'route':<16} {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err %':>6}")
+        try:
+            for concurrency in args.stages:
+                stage = run_stage(host, port, usernames, concurrency, args.duration, args.think, args.seed)
+                stages.append(stage)
+                _print_stage(stage)
+        finally:
+            stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "machine_info": machine_info(),
+                "commit_info": commit_info(),
+                "config": {k: v for k, v in vars(args).items() if k != "output"},
+                "stages": stages,
+            }, f, indent=2)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,116 @@
+"""Dashboard latency while a burst of logins hits the same server.
+
+Usage (from backend/):
+    python -m benchmarks.login_burst [--logins 200] [--workers 2] [--rounds 12]
+
+Runs the app on a local threaded WSGI server, polls /api/dashboard from one
+client thread, and fires LOGINS concurrent logins half way through. The
+burst is run once with hashing on the process pool and once inline in the
+request threads (PASSWORD_HASH_WORKERS=0) for comparison.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from werkzeug.serving import make_server
+
+from app import create_app
+from models import db
+
+
+def _request(url, body=None, headers=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json", **(headers or {})})
+    try:
+        with urllib.request.urlopen(req, timeout=120) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read()
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)] * 1000
+
+
+def run(logins, workers, rounds):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app({
+            "TESTING": True,
+            "RESPONSE_CACHE": "none",
+            "BCRYPT_ROUNDS": rounds,
+            "PASSWORD_HASH_WORKERS": workers,
+            "PASSWORD_HASH_QUEUE_LIMIT": logins if workers == 0 else max(workers, 1) * 8,
+        })
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}/api"
+
+        _, body = _request(f"{base}/signup", {"username": "bench", "password": "benchpass"})
+        headers = {"Authorization": f"Bearer {json.loads(body)['token']}"}
+        # Warm the pool so process start-up is not part of the burst.
+        _request(f"{base}/login", {"username": "bench", "password": "benchpass"})
+
+        def poll(seconds):
+            timings, end = [], time.perf_counter() + seconds
+            while time.perf_counter() < end:
+                start = time.perf_counter()
+                _request(f"{base}/dashboard", headers=headers)
+                timings.append(time.perf_counter() - start)
+            return timings
+
+        idle = poll(2)
+        statuses = []
+
+        def login():
+            statuses.append(_request(f"{base}/login", {"username": "bench", "password": "benchpass"})[0])
+
+        threads = [threading.Thread(target=login) for _ in range(logins)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        busy = []
+        while any(thread.is_alive() for thread in threads):
+            busy.extend(poll(0.5))
+        burst_seconds = time.perf_counter() - start
+        for thread in threads:
+            thread.join()
+
+        server.shutdown()
+        app.extensions["password_hasher"].shutdown()
+        with app.app_context():
+            db.engine.dispose()
+        return {
+            "idle_p99": _percentile(idle, 99),
+            "busy_p50": _percentile(busy, 50),
+            "busy_p99": _percentile(busy, 99),
+            "ok": statuses.count(200),
+            "throttled": statuses.count(429),
+            "burst_s": burst_seconds,
+        }
+
+
+def main():
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+    print(f"{'mode':>8}  {'idle p99':>9}  {'burst p50':>9}  {'burst p99':>9}  {'ok':>5}  {'429':>5}  {'burst s':>8}")
+    for label, workers in (("pool", args.workers), ("inline", 0)):
+        r = run(args.logins, workers, args.rounds)
+        print(f"{label:>8}  {r['idle_p99']:>9.2f}  {r['busy_p50']:>9.2f}  {r['busy_p99']:>9.2f}  "
+              f"{r['ok']:>5}  {r['throttled']:>5}  {r['burst_s']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
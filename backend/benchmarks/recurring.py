@@ -0,0 +1,65 @@
+"""Measure a scheduler pass over many users' recurring rules on SQLite.
+
+Usage (from backend/):
+    python -m benchmarks.recurring [USERS ...]
+
+Each size creates that many users with one monthly rule apiece, all due
+today, then times recurring.materialize() (insert, rollups, search index
+triggers, next_date updates, version bumps, commits) and an immediate
+rerun, which finds nothing due. Statements are counted at the cursor, in
+total and for the transaction INSERTs alone, to show the per-chunk cost.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import event
+
+from app import create_app
+from models import db, RecurringRule, User
+import recurring
+
+DEFAULT_SIZES = [10_000, 100_000]
+
+
+def measure(users):
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app({"TESTING": True})
+        with app.app_context():
+            db.session.execute(User.__table__.insert(), [{"username": f"user{i}", "password_hash": "x"} for i in range(users)])
+            db.session.execute(RecurringRule.__table__.insert(), [
+                {"user_id": i + 1, "amount": 1200, "category": "Housing", "description": "Rent", "type": "expense",
+                 "frequency": "monthly", "interval": 1, "start_date": today, "next_date": today}
+                for i in range(users)
+            ])
+            db.session.commit()
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(db.engine, "before_cursor_execute", listener)
+            start = time.perf_counter()
+            rules, inserted = recurring.materialize(today)
+            elapsed = time.perf_counter() - start
+            event.remove(db.engine, "before_cursor_execute", listener)
+            inserts = sum(s.startswith("INSERT INTO transactions ") for s in statements)
+            assert (rules, inserted) == (users, users), (rules, inserted)
+            start = time.perf_counter()
+            assert recurring.materialize(today) == (0, 0)
+            rerun = time.perf_counter() - start
+            db.engine.dispose()
+        return elapsed, rerun, len(statements), inserts
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    print(f"{'users':>10} {'seconds':>9} {'rules/s':>10} {'rerun s':>9} {'stmts':>7} {'inserts':>8}")
+    for users in sizes:
+        elapsed, rerun, statements, inserts = measure(users)
+        print(f"{users:>10} {elapsed:>9.2f} {users / elapsed:>10.0f} {rerun:>9.3f} {statements:>7} {inserts:>8}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
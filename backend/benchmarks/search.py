@@ -0,0 +1,103 @@
+"""Measure transaction search latency on a large synthetic dataset.
+
+Usage (from backend/):
+    python -m benchmarks.search [--rows 1000000] [--users 10]
+
+Rows are spread evenly over USERS users. For each query the script reports
+the median latency of GET /api/transactions?search=... for one user
+(full-text index) next to the equivalent LIKE '%term%' scan.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app import create_app
+from models import db, User, Transaction
+from seed_data import CATEGORIES, EXPENSE_DESCRIPTIONS, INCOME_ENTRIES
+
+QUERIES = ["groceries", "uber", "monthly", "conc", "dental checkup", "electric bill"]
+REPEATS = 9
+
+
+def _load(user_ids, rows):
+    today = date.today()
+    table = Transaction.__table__
+    batch = []
+    for i in range(rows):
+        if random.random() < 0.1:
+            entry = random.choice(INCOME_ENTRIES)
+            category, description, txn_type = entry["category"], entry["description"], "income"
+        else:
+            category = random.choice(CATEGORIES["expense"])
+            description, txn_type = random.choice(EXPENSE_DESCRIPTIONS[category]), "expense"
+        batch.append({
+            "user_id": user_ids[i % len(user_ids)],
+            "amount": round(random.uniform(5, 500), 2),
+            "category": category,
+            "description": f"{description} #{random.randint(1, 9999)}",
+            "date": today - timedelta(days=random.randint(0, 5 * 365)),
+            "type": txn_type,
+        })
+        if len(batch) == 20_000:
+            db.session.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+    db.session.commit()
+
+
+def _median_ms(fn):
+    fn()
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app({"TESTING": True})
+        client = app.test_client()
+        tokens = [
+            client.post("/api/signup", json={"username": f"bench{i}", "password": "benchpass"}).get_json()["token"]
+            for i in range(args.users)
+        ]
+        headers = {"Authorization": f"Bearer {tokens[0]}"}
+        with app.app_context():
+            user_ids = [u.id for u in User.query.order_by(User.id)]
+            start = time.perf_counter()
+            _load(user_ids, args.rows)
+            print(f"loaded {args.rows} rows for {args.users} users in {time.perf_counter() - start:.1f}s")
+
+            print(f"{'query':<16} {'matches':>8} {'fts ms':>8} {'like ms':>8}")
+            for q in QUERIES:
+                url = f"/api/transactions?search={q}"
+                total = client.get(url, headers=headers).get_json()["total"]
+                fts_ms = _median_ms(lambda: client.get(url, headers=headers))
+
+                def like():
+                    query = Transaction.query.filter(Transaction.user_id == user_ids[0])
+                    for term in q.split():
+                        pattern = f"%{term}%"
+                        query = query.filter(db.or_(Transaction.description.ilike(pattern), Transaction.category.ilike(pattern)))
+                    query.order_by(Transaction.date.desc()).limit(20).all()
+                    query.count()
+                like_ms = _median_ms(like)
+                print(f"{q:<16} {total:>8} {fts_ms:>8.2f} {like_ms:>8.2f}")
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
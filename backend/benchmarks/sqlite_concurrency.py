@@ -0,0 +1,97 @@
+"""Throughput of concurrent writer and reader processes sharing one SQLite file.
+
+Usage (from backend/):
+    python -m benchmarks.sqlite_concurrency [--writers 4] [--readers 4] [--seconds 10]
+
+Each writer process POSTs transactions and each reader GETs the dashboard
+(response cache off) for SECONDS. The run is repeated with the legacy
+rollback journal (journal_mode=DELETE, synchronous=FULL) and with the
+defaults from database.py (WAL, synchronous=NORMAL, mmap), reporting
+operations per second and "database is locked" failures.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from models import db
+
+LEGACY = {"SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL", "SQLITE_MMAP_SIZE": 0}
+TUNED = {}
+
+
+def _config(path, pragmas):
+    return {
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "RESPONSE_CACHE": "none",
+        "BCRYPT_ROUNDS": 4,
+        "PASSWORD_HASH_WORKERS": 0,
+        **pragmas,
+    }
+
+
+def _worker(args):
+    role, path, pragmas, token, seconds = args
+    app = create_app(_config(path, pragmas))
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    done = locked = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        try:
+            if role == "writer":
+                resp = client.post("/api/transactions", json={
+                    "amount": 12.5, "category": "Food", "date": "2025-01-15", "type": "expense", "description": "bench",
+                }, headers=headers)
+            else:
+                resp = client.get("/api/dashboard", headers=headers)
+            assert resp.status_code in (200, 201)
+            done += 1
+        except OperationalError as exc:
+            if "locked" not in str(exc):
+                raise
+            locked += 1
+            with app.app_context():
+                db.session.rollback()
+    with app.app_context():
+        db.engine.dispose()
+    return role, done, locked
+
+
+def run(pragmas, writers, readers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        app = create_app(_config(path, pragmas))
+        client = app.test_client()
+        token = client.post("/api/signup", json={"username": "bench", "password": "benchpass"}).get_json()["token"]
+        with app.app_context():
+            db.engine.dispose()
+        jobs = [("writer", path, pragmas, token, seconds)] * writers + [("reader", path, pragmas, token, seconds)] * readers
+        with multiprocessing.get_context("fork").Pool(len(jobs)) as pool:
+            results = pool.map(_worker, jobs)
+    totals = {"writer": [0, 0], "reader": [0, 0]}
+    for role, done, locked in results:
+        totals[role][0] += done
+        totals[role][1] += locked
+    return {role: (done / seconds, locked) for role, (done, locked) in totals.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    print(f"{'mode':>8}  {'writes/s':>9}  {'reads/s':>9}  {'locked':>7}")
+    for label, pragmas in (("legacy", LEGACY), ("tuned", TUNED)):
+        r = run(pragmas, args.writers, args.readers, args.seconds)
+        print(f"{label:>8}  {r['writer'][0]:>9.1f}  {r['reader'][0]:>9.1f}  {r['writer'][1] + r['reader'][1]:>7}")
+
+
+if __name__ == "__main__":
+    main()
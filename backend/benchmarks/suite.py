@@ -0,0 +1,197 @@
+"""Time every read route, and login, against synthetic histories of growing size.
+
+Usage (from backend/):
+    python -m benchmarks.suite [--sizes 1000 10000 ...] [-k dashboard] [--output FILE]
+
+Each size gets a fresh SQLite database holding one user with ROWS
+transactions from benchmarks.data (seed 0, so every run and every commit
+sees the same rows). Each scenario is warmed up once and then repeated for
+at least MIN_ROUNDS rounds and until MAX_TIME seconds have passed, with
+the response cache off so the aggregation itself is timed. Writes run last
+so the read scenarios all see the loaded data.
+
+Results are written as JSON shaped like pytest-benchmark's (a list of
+``benchmarks`` with ``name``, ``group``, ``params`` and ``stats`` in
+seconds, plus ``machine_info`` and ``commit_info``), by default to
+``benchmark-<commit>.json``; compare two runs with benchmarks.compare.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from app import create_app
+from models import db
+from benchmarks import data
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+MIN_ROUNDS = 5
+MAX_ROUNDS = 200
+MAX_TIME = 2.0
+PER_PAGE = 50
+
+# (name, method, path, json body); ``{deep_page}`` is a page near the end of the history.
+SCENARIOS = [
+    ("dashboard", "GET", "/api/dashboard", None),
+    ("forecast", "GET", "/api/forecast", None),
+    ("analytics", "GET", "/api/analytics?group_by=month,category&metrics=sum,count", None),
+    ("transactions_page", "GET", f"/api/transactions?per_page={PER_PAGE}", None),
+    ("transactions_deep_page", "GET", f"/api/transactions?per_page={PER_PAGE}&page={{deep_page}}", None),
+    ("transactions_keyset", "GET", f"/api/transactions?per_page={PER_PAGE}&cursor=", None),
+    ("transactions_filtered", "GET", f"/api/transactions?per_page={PER_PAGE}&category=Food&type=expense", None),
+    ("transactions_search", "GET", f"/api/transactions?per_page={PER_PAGE}&search=coffee", None),
+    ("export", "GET", "/api/transactions/export", None),
+    ("budgets", "GET", "/api/budgets", None),
+    ("goals", "GET", "/api/goals", None),
+    ("recurring", "GET", "/api/recurring", None),
+    ("alerts", "GET", "/api/alerts", None),
+    ("me", "GET", "/api/me", None),
+    ("login", "POST", "/api/login", {"username": data.username(0), "password": data.PASSWORD}),
+    ("create_transaction", "POST", "/api/transactions",
+     {"amount": 12.5, "category": "Food", "description": "Benchmark lunch", "date": "2026-01-15", "type": "expense"}),
+]
+
+
+def _label(rows):
+    for unit, size in (("M", 1_000_000), ("k", 1_000)):
+        if rows >= size and rows % size == 0:
+            return f"{rows // size}{unit}"
+    return str(rows)
+
+
+def _stats(timings):
+    ordered = sorted(timings)
+    quartiles = statistics.quantiles(ordered, n=4) if len(ordered) > 1 else [ordered[0]] * 3
+    mean = statistics.fmean(ordered)
+    return {
+        "min": ordered[0],
+        "max": ordered[-1],
+        "mean": mean,
+        "median": statistics.median(ordered),
+        "stddev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "iqr": quartiles[2] - quartiles[0],
+        "rounds": len(ordered),
+        "ops": 1 / mean if mean else 0.0,
+    }
+
+
+def _call(client, method, path, body, headers):
+    # buffered=False plus reading every chunk times a streamed export end to end.
+    resp = client.open(path, method=method, json=body, headers=headers, buffered=False)
+    size = sum(len(chunk) for chunk in resp.response)
+    resp.close()
+    if resp.status_code >= 400:
+        raise RuntimeError(f"{method} {path} returned {resp.status_code}")
+    return size
+
+
+def _time(client, method, path, body, headers, min_rounds, max_time):
+    _call(client, method, path, body, headers)
+    timings = []
+    deadline = time.perf_counter() + max_time
+    while len(timings) < min_rounds or (len(timings) < MAX_ROUNDS and time.perf_counter() < deadline):
+        start = time.perf_counter()
+        _call(client, method, path, body, headers)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_size(rows, names, min_rounds=MIN_ROUNDS, max_time=MAX_TIME, log=print):
+    """Load one user with ``rows`` transactions into a fresh database and time each scenario in ``names``."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app({"TESTING": True, "RESPONSE_CACHE": "none", "SLOW_REQUEST_MS": 0})
+        with app.app_context():
+            start = time.perf_counter()
+            data.load(1, rows)
+            log(f"{_label(rows)}: loaded {rows} rows in {time.perf_counter() - start:.1f}s")
+        client = app.test_client()
+        token = client.post("/api/login", json={"username": data.username(0), "password": data.PASSWORD}).get_json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        deep_page = max(rows // PER_PAGE - 1, 1)
+        for name, method, path, body in SCENARIOS:
+            if name not in names:
+                continue
+            path = path.format(deep_page=deep_page)
+            timings = _time(client, method, path, body, headers, min_rounds, max_time)
+            stats = _stats(timings)
+            results.append({
+                "name": f"{name}[{_label(rows)}]",
+                "group": name,
+                "params": {"rows": rows},
+                "extra_info": {"method": method, "path": path},
+                "stats": stats,
+            })
+            log(f"  {name:<24} median {stats['median'] * 1000:9.2f}ms  min {stats['min'] * 1000:9.2f}ms  rounds {stats['rounds']}")
+        with app.app_context():
+            db.engine.dispose()
+    return results
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def commit_info():
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "id": _git("rev-parse", "HEAD"),
+        "branch": _git("rev-parse", "--abbrev-ref", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+    }
+
+
+def machine_info():
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "release": platform.release(),
+        "cpu_count": os.cpu_count(),
+        "python_implementation": platform.python_implementation(),
+        "python_version": platform.python_version(),
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Run the route benchmarks and write the results as JSON.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, metavar="ROWS")
+    parser.add_argument("-k", dest="only", nargs="+", metavar="SCENARIO", help="only these scenarios")
+    parser.add_argument("--min-rounds", type=int, default=MIN_ROUNDS)
+    parser.add_argument("--max-time", type=float, default=MAX_TIME, help="seconds per scenario after min rounds")
+    parser.add_argument("--output", help="JSON file (default benchmark-<commit>.json)")
+    args = parser.parse_args(argv)
+    known = [name for name, *_ in SCENARIOS]
+    names = set(args.only or known)
+    if names - set(known):
+        parser.error(f"unknown scenarios: {', '.join(sorted(names - set(known)))} (choose from {', '.join(known)})")
+
+    commit = commit_info()
+    results = []
+    for rows in args.sizes:
+        results += run_size(rows, names, args.min_rounds, args.max_time)
+    output = args.output or f"benchmark-{(commit['id'] or 'unknown')[:12]}.json"
+    with open(output, "w") as f:
+        json.dump({
+            "machine_info": machine_info(),
+            "commit_info": commit,
+            "datetime": datetime.now(timezone.utc).isoformat(),
+            "benchmarks": results,
+        }, f, indent=2)
+    print(f"Wrote {len(results)} results to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,194 @@
+"""Per-user response cache for read-heavy endpoints.
+
+Cached entries are keyed on (user_id, generation, data version, endpoint,
+day, query string). Write routes invalidate a user by bumping their
+generation counter, which makes every older key unreachable at once; stale
+entries are then aged out by the backend's LRU/TTL policy. A request that
+computes a response while a write lands stores it under the old generation,
+so it can never be served afterwards. When the route is also wrapped in
+``versioning.conditional`` the user's ``data_version`` is part of the key,
+so a write handled by another worker also retires this worker's entries.
+
+Two backends are provided: :class:`LRUCache` (in-process, per worker) and
+:class:`RedisCache`, which wraps any client exposing Redis' ``get``,
+``set(..., ex=)`` and ``incr`` so it can be swapped for a fake in tests.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, g, request, Response
+
+import metrics
+
+EXTENSION_KEY = "response_cache"
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with a per-entry TTL."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        # Counters live outside the LRU: evicting one would resurrect old keys.
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCache:
+    """Backend over a Redis-compatible client, shared by every worker."""
+
+    def __init__(self, client, ttl=60, prefix="findash:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def counter(self, key):
+        value = self.client.get(self.prefix + key)
+        return int(value) if value is not None else 0
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def key(self, user_id, endpoint, args, version=None):
+        generation = self.backend.counter(f"gen:{user_id}")
+        query = urlencode(sorted(args.items(multi=True)))
+        return f"resp:{user_id}:{generation}:{version}:{endpoint}:{date.today().isoformat()}:{query}"
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, body):
+        self.backend.set(key, body)
+
+    def invalidate(self, user_id):
+        self.invalidations += 1
+        self.backend.incr(f"gen:{user_id}")
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def samples(self):
+        """This worker's lookup and invalidation counters for /metrics."""
+        samples = [
+            ("response_cache_hits_total", "counter", "Cached responses served.", self.hits),
+            ("response_cache_misses_total", "counter", "Cacheable responses computed.", self.misses),
+            ("response_cache_invalidations_total", "counter", "Per-user invalidations after writes.", self.invalidations),
+        ]
+        if isinstance(self.backend, LRUCache):
+            samples.append(("response_cache_entries", "gauge", "Entries in this worker's cache.", len(self.backend)))
+        return samples
+
+
+def init_cache(app):
+    """Configure the response cache from RESPONSE_CACHE ("memory", "redis" or "none")."""
+    def setting(name, default):
+        return app.config.get(name, os.environ.get(name, default))
+
+    kind = setting("RESPONSE_CACHE", "memory")
+    ttl = int(setting("RESPONSE_CACHE_TTL", 60))
+    if kind == "memory":
+        backend = LRUCache(maxsize=int(setting("RESPONSE_CACHE_SIZE", 1024)), ttl=ttl)
+    elif kind == "redis":
+        import redis
+        backend = RedisCache(redis.Redis.from_url(setting("REDIS_URL", "redis://localhost:6379/0")), ttl=ttl)
+    else:
+        return None
+    cache = app.extensions[EXTENSION_KEY] = ResponseCache(backend)
+    metrics.register_collector(app, cache.samples)
+    return cache
+
+
+def cached(endpoint):
+    """Serve a token-protected GET route from the per-user cache. Place below @conditional."""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            cache = current_app.extensions.get(EXTENSION_KEY)
+            if cache is None:
+                return f(*args, **kwargs)
+            key = cache.key(request.user_id, endpoint, request.args, g.get("data_version"))
+            body = cache.get(key)
+            if body is not None:
+                return Response(body, status=200, mimetype="application/json", headers={"X-Cache": "HIT"})
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                cache.set(key, response.get_data())
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return decorated
+    return decorator
+
+
+def invalidates_cache(f):
+    """Drop the user's cached responses after a successful write. Place below @token_required."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        response = current_app.make_response(f(*args, **kwargs))
+        cache = current_app.extensions.get(EXTENSION_KEY)
+        if cache is not None and response.status_code < 400:
+            cache.invalidate(request.user_id)
+        return response
+    return decorated
@@ -1,13 +1,108 @@
+"""Database setup: engine configuration from the environment, then schema.
+
+Every setting can come from app config or an environment variable of the
+same name (config wins):
+
+    DATABASE_URL              primary database (default sqlite:///finance.db)
+    DATABASE_REPLICA_URL      optional read replica; GET/HEAD requests read from it
+    DB_POOL_SIZE              PostgreSQL pool size (10)
+    DB_MAX_OVERFLOW           extra connections beyond the pool (20)
+    DB_POOL_TIMEOUT           seconds to wait for a free connection (10)
+    DB_POOL_RECYCLE           seconds before a connection is replaced (1800)
+    DB_STATEMENT_TIMEOUT_MS   PostgreSQL statement_timeout (30000, 0 disables)
+    SQLITE_JOURNAL_MODE       WAL
+    SQLITE_SYNCHRONOUS        NORMAL
+    SQLITE_MMAP_SIZE          bytes of the file to memory-map (268435456)
+    SQLITE_BUSY_TIMEOUT_MS    how long a writer waits for the lock (5000)
+
+WAL lets readers proceed while one writer commits, and synchronous=NORMAL
+only fsyncs at checkpoints (a power loss can drop the last commits but not
+corrupt the file). Reads served by a replica may lag the primary.
+"""
 import os
+from functools import partial
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
 from models import db
+import migrations
+import rollups
+
+
+def _setting(app, name, default):
+    return app.config.get(name, os.environ.get(name, default))
+
+
+def _normalize_url(url):
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+def engine_options(app, url):
+    """Return SQLALCHEMY_ENGINE_OPTIONS for ``url``."""
+    backend = make_url(url).get_backend_name()
+    if backend != "postgresql":
+        return {}
+    options = {
+        "pool_size": int(_setting(app, "DB_POOL_SIZE", 10)),
+        "max_overflow": int(_setting(app, "DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": int(_setting(app, "DB_POOL_TIMEOUT", 10)),
+        "pool_recycle": int(_setting(app, "DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": True,
+    }
+    statement_timeout = int(_setting(app, "DB_STATEMENT_TIMEOUT_MS", 30000))
+    if statement_timeout:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
+
+def sqlite_pragmas(app, url):
+    """Return the PRAGMA statements run on every new SQLite connection to ``url``."""
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(_setting(app, 'SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"PRAGMA synchronous = {_setting(app, 'SQLITE_SYNCHRONOUS', 'NORMAL')}",
+    ]
+    if make_url(url).database not in (None, "", ":memory:"):
+        pragmas += [
+            f"PRAGMA journal_mode = {_setting(app, 'SQLITE_JOURNAL_MODE', 'WAL')}",
+            f"PRAGMA mmap_size = {int(_setting(app, 'SQLITE_MMAP_SIZE', 256 * 2**20))}",
+        ]
+    return pragmas
+
+
+def _apply_pragmas(dbapi_connection, connection_record, pragmas):
+    cursor = dbapi_connection.cursor()
+    for pragma in pragmas:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def _route_reads_to_replica():
+    g.use_replica = request.method in ("GET", "HEAD")
 
 
 def init_db(app):
-    database_url = os.environ.get("DATABASE_URL", "sqlite:///finance.db")
-    if database_url.startswith("postgres://"):
-        database_url = database_url.replace("postgres://", "postgresql://", 1)
+    database_url = _normalize_url(app.config.get("SQLALCHEMY_DATABASE_URI") or os.environ.get("DATABASE_URL", "sqlite:///finance.db"))
     app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app, database_url))
+    replica_url = _setting(app, "DATABASE_REPLICA_URL", None)
+    if replica_url:
+        replica_url = _normalize_url(replica_url)
+        app.config.setdefault("SQLALCHEMY_BINDS", {})["replica"] = {"url": replica_url, **engine_options(app, replica_url)}
+        app.before_request(_route_reads_to_replica)
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     db.init_app(app)
+    # init_app adds an empty metadata for every bind, and db is shared by every
+    # app in the process; without one for the replica, create_all/drop_all never touch it.
+    db.metadatas.pop("replica", None)
     with app.app_context():
-        db.create_all()
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", partial(_apply_pragmas, pragmas=sqlite_pragmas(app, str(engine.url))))
+        # The schema lives on the primary; a replica is a copy of it.
+        db.create_all(bind_key=None)
+        migrations.upgrade(db.engine)
+        rollups.ensure_populated()
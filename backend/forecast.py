@@ -0,0 +1,391 @@
+"""Cash-flow forecasting over per-user monthly and daily series.
+
+Income and expenses are forecast separately with damped additive
+Holt-Winters exponential smoothing: yearly seasonality on monthly series
+(weekly on daily ones) once a series covers two full seasons, level and
+damped trend only before that. Smoothing parameters are picked per series
+from a small grid by one-step-ahead squared error. Every series in a batch
+advances through time together as NumPy arrays of shape (series, grid), so
+the cost is a few dozen array operations per time step whether the batch
+holds one user or ten thousand. Confidence bands come from the one-step
+residual spread, widened with the square root of the horizon.
+
+Recurring transactions (salary, rent, subscriptions) are found separately
+by grouping a user's recent rows on (type, category, description) and
+keeping groups with a regular weekly, fortnightly or monthly cadence and a
+stable amount.
+
+    python forecast.py [--horizon 3]    # batch forecast for every user
+"""
+import itertools
+import time
+from datetime import date, timedelta
+from statistics import NormalDist
+
+import numpy as np
+
+from models import db, Transaction, MonthlyRollup
+from money import SCALE, cents
+import fx
+
+HISTORY_MONTHS = 36
+HISTORY_DAYS = 182
+RECURRING_LOOKBACK_DAYS = 400
+SEASON = {"month": 12, "day": 7}
+MAX_HORIZON = {"month": 24, "day": 90}
+DAMPING = 0.98
+GRID = np.array(list(itertools.product((0.1, 0.3, 0.5, 0.8), (0.0, 0.1, 0.3), (0.0, 0.2))))
+CHUNK_SIZE = 2048
+
+# Cadence name -> (period in days, allowed deviation of the mean gap).
+CADENCES = {"weekly": (7, 1.5), "biweekly": (14, 2.5), "monthly": (30.44, 4.5)}
+MIN_OCCURRENCES = 3
+MAX_AMOUNT_CV = 0.15
+
+
+# ── Calendar helpers ─────────────────────────────────────────────────
+
+def add_months(d, months):
+    """Return the first day of the month ``months`` after ``d``'s month."""
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_back(today, count):
+    """Return ``count`` month keys ("YYYY-MM") ending with ``today``'s month, oldest first."""
+    return [add_months(today, -i).strftime("%Y-%m") for i in range(count - 1, -1, -1)]
+
+
+def month_ahead(d, months):
+    """Return ``d`` moved by whole calendar months, clamping the day to the month's end."""
+    first = add_months(d, months)
+    last_day = (add_months(first, 1) - timedelta(days=1)).day
+    return first.replace(day=min(d.day, last_day))
+
+
+# ── Holt-Winters ─────────────────────────────────────────────────────
+
+def _fit_chunk(Y, start, season, horizon):
+    n, T = Y.shape
+    m = season
+    rows = np.arange(n)
+    nobs = T - start
+    seasonal = nobs >= 2 * m
+    alpha, beta, gamma = (GRID[:, i][None, :] for i in range(3))
+
+    # Classical initialisation from the first two seasons where available,
+    # otherwise the first observation with no trend.
+    window = Y[rows[:, None], np.minimum(start[:, None] + np.arange(2 * m), T - 1)]
+    first_mean = window[:, :m].mean(axis=1)
+    second_mean = window[:, m:].mean(axis=1)
+    trend = np.where(seasonal, (second_mean - first_mean) / m, 0.0)
+    # first_mean is the level half way through the first season; step back
+    # to just before it so the first update predicts column ``start``.
+    level = np.where(seasonal, first_mean - trend * (m + 1) / 2, window[:, 0])
+    level = np.where(nobs > 0, level, 0.0)
+    ramp = trend[:, None, None] * (np.arange(m) - (m - 1) / 2)[None, None, :]
+    season_means = np.stack([first_mean, second_mean], axis=1)[:, :, None]
+    deviations = (window.reshape(n, 2, m) - season_means - ramp).mean(axis=1)
+    season0 = np.zeros((n, m))
+    season0[rows[:, None], (start[:, None] + np.arange(m)) % m] = deviations
+    season0[~seasonal] = 0.0
+
+    C = len(GRID)
+    L = np.repeat(level[:, None], C, axis=1)
+    B = np.repeat(trend[:, None], C, axis=1)
+    S = np.repeat(season0[:, None, :], C, axis=1)
+    g = gamma * seasonal[:, None]
+    sse = np.zeros((n, C))
+    for t in range(T):
+        active = (t >= start)[:, None]
+        k = t % m
+        s_k = S[:, :, k]
+        y = Y[:, t][:, None]
+        base = L + DAMPING * B
+        err = y - (base + s_k)
+        sse += np.where(active, err * err, 0.0)
+        new_level = alpha * (y - s_k) + (1 - alpha) * base
+        new_trend = beta * (new_level - L) + (1 - beta) * DAMPING * B
+        S[:, :, k] = np.where(active, g * (y - new_level) + (1 - g) * s_k, s_k)
+        L = np.where(active, new_level, L)
+        B = np.where(active, new_trend, B)
+
+    best = sse.argmin(axis=1)
+    steps = np.arange(1, horizon + 1)
+    damped = np.cumsum(DAMPING ** steps)
+    forecast = (
+        L[rows, best][:, None]
+        + B[rows, best][:, None] * damped[None, :]
+        + S[rows, best][:, (T - 1 + steps) % m]
+    )
+    sigma = np.sqrt(sse[rows, best] / np.maximum(nobs, 1))
+    return forecast, sigma
+
+
+def holt_winters(Y, start, season, horizon):
+    """Fit every row of ``Y`` (series x time) from column ``start[row]`` on.
+
+    Returns (forecast of shape (series, horizon), one-step residual sigma).
+    """
+    Y = np.asarray(Y, dtype=float)
+    start = np.asarray(start, dtype=int)
+    forecasts, sigmas = [], []
+    for lo in range(0, len(Y), CHUNK_SIZE):
+        forecast, sigma = _fit_chunk(Y[lo:lo + CHUNK_SIZE], start[lo:lo + CHUNK_SIZE], season, horizon)
+        forecasts.append(forecast)
+        sigmas.append(sigma)
+    if not forecasts:
+        return np.zeros((0, horizon)), np.zeros(0)
+    return np.concatenate(forecasts), np.concatenate(sigmas)
+
+
+def first_active(Y):
+    """Index of each row's first non-zero column (the row length if none)."""
+    nonzero = Y != 0
+    return np.where(nonzero.any(axis=1), nonzero.argmax(axis=1), Y.shape[1])
+
+
+# ── Series ───────────────────────────────────────────────────────────
+
+def monthly_series(rollup_rows, months):
+    """Return a (2, len(months)) income/expense matrix from (month, type, category, total_cents) rows."""
+    index = {m: i for i, m in enumerate(months)}
+    Y = np.zeros((2, len(months)))
+    for month, txn_type, _category, total in rollup_rows:
+        i = index.get(month)
+        if i is not None and txn_type in ("income", "expense"):
+            Y[0 if txn_type == "income" else 1, i] += total
+    return Y / SCALE
+
+
+def _in_base(user_id, dates, currencies, amounts):
+    """Convert one user's cent amounts, dated ``dates``, into the user's base currency."""
+    if not amounts:
+        return []
+    return fx.to_base(amounts, currencies, fx.to_days(dates), fx.base_currency(user_id)).tolist()
+
+
+def daily_series(user_id, days):
+    """Return a (2, len(days)) income/expense matrix in the user's base currency."""
+    first = days[0]
+    rows = db.session.query(
+        Transaction.date, Transaction.type, Transaction.currency, db.func.sum(cents(Transaction.amount))
+    ).filter(
+        Transaction.user_id == user_id, Transaction.date >= first, Transaction.date <= days[-1]
+    ).group_by(Transaction.date, Transaction.type, Transaction.currency).all()
+    # A day's sum per currency converts at that day's rate like each of its rows would.
+    totals = _in_base(user_id, [r[0] for r in rows], [r[2] for r in rows], [r[3] for r in rows])
+    Y = np.zeros((2, len(days)))
+    for (txn_date, txn_type, _currency, _total), total in zip(rows, totals):
+        if txn_type in ("income", "expense"):
+            Y[0 if txn_type == "income" else 1, (txn_date - first).days] += total
+    return Y / SCALE
+
+
+def _user_rollups(user_id):
+    return db.session.query(
+        MonthlyRollup.month, MonthlyRollup.type, MonthlyRollup.category, cents(MonthlyRollup.total)
+    ).filter(MonthlyRollup.user_id == user_id).all()
+
+
+def _bands(forecast, sigma, confidence):
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    widths = z * sigma[:, None] * np.sqrt(np.arange(1, forecast.shape[1] + 1))[None, :]
+    return widths
+
+
+def project(Y, season, horizon, confidence):
+    """Forecast a (2, T) income/expense history; return a list of per-period dicts (without labels)."""
+    Y = np.asarray(Y, dtype=float)
+    start = np.full(2, first_active(Y).min())
+    forecast, sigma = holt_winters(Y, start, season, horizon)
+    forecast = np.maximum(forecast, 0.0)
+    widths = _bands(forecast, sigma, confidence)
+    net = forecast[0] - forecast[1]
+    net_width = _bands(net[None, :], np.array([np.hypot(*sigma)]), confidence)[0]
+    points = []
+    for h in range(horizon):
+        income, expenses = forecast[0, h], forecast[1, h]
+        points.append({
+            "income": round(float(income), 2),
+            "income_lower": round(float(max(income - widths[0, h], 0.0)), 2),
+            "income_upper": round(float(income + widths[0, h]), 2),
+            "expenses": round(float(expenses), 2),
+            "expenses_lower": round(float(max(expenses - widths[1, h], 0.0)), 2),
+            "expenses_upper": round(float(expenses + widths[1, h]), 2),
+            "net": round(float(net[h]), 2),
+            "net_lower": round(float(net[h] - net_width[h]), 2),
+            "net_upper": round(float(net[h] + net_width[h]), 2),
+        })
+    return points
+
+
+def current_month_forecast(rollup_rows, today):
+    """Forecast income/expenses for ``today``'s month from complete months before it."""
+    months = months_back(add_months(today, -1), HISTORY_MONTHS)
+    point = project(monthly_series(rollup_rows, months), SEASON["month"], 1, 0.8)[0]
+    return point["income"], point["expenses"]
+
+
+# ── Recurring transactions ───────────────────────────────────────────
+
+def detect_recurring(keys, ordinals, amounts, today):
+    """Find regular series among transactions.
+
+    ``keys`` are integer group ids, ``ordinals`` dates as day numbers and
+    ``amounts`` values, one entry per transaction. Returns a list of
+    (key, cadence, mean_amount, last_ordinal, count) tuples.
+    """
+    keys, ordinals, amounts = (np.asarray(a) for a in (keys, ordinals, amounts))
+    if len(keys) == 0:
+        return []
+    order = np.lexsort((ordinals, keys))
+    keys, ordinals, amounts = keys[order], ordinals[order], amounts[order].astype(float)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    counts = np.diff(np.r_[starts, len(keys)])
+    last = ordinals[np.r_[starts[1:], len(keys)] - 1]
+
+    gaps = np.diff(ordinals).astype(float)
+    same = keys[1:] == keys[:-1]
+    gaps = np.where(same, gaps, 0.0)
+    # Gap i belongs to the group of transaction i + 1; sum per group.
+    gap_owner = np.searchsorted(starts, np.arange(1, len(keys)), side="right") - 1
+    n_gaps = np.maximum(counts - 1, 1)
+    gap_mean = np.bincount(gap_owner, weights=gaps, minlength=len(starts)) / n_gaps
+    gap_sq = np.bincount(gap_owner, weights=gaps * gaps, minlength=len(starts)) / n_gaps
+    gap_std = np.sqrt(np.maximum(gap_sq - gap_mean ** 2, 0.0))
+
+    amount_mean = np.add.reduceat(amounts, starts) / counts
+    amount_sq = np.add.reduceat(amounts * amounts, starts) / counts
+    amount_cv = np.sqrt(np.maximum(amount_sq - amount_mean ** 2, 0.0)) / np.maximum(np.abs(amount_mean), 1e-9)
+
+    today_ordinal = today.toordinal()
+    found = []
+    eligible = (counts >= MIN_OCCURRENCES) & (amount_cv <= MAX_AMOUNT_CV)
+    for cadence, (period, tolerance) in CADENCES.items():
+        match = (
+            eligible
+            & (np.abs(gap_mean - period) <= tolerance)
+            & (gap_std <= tolerance * 1.5)
+            & (today_ordinal - last <= period * 1.5)
+        )
+        for i in np.flatnonzero(match):
+            found.append((int(keys[starts[i]]), cadence, float(amount_mean[i]), int(last[i]), int(counts[i])))
+        eligible &= ~match
+    return found
+
+
+def recurring_transactions(user_id, today):
+    rows = db.session.query(
+        Transaction.type, Transaction.category, Transaction.description, Transaction.date, Transaction.currency,
+        cents(Transaction.amount),
+    ).filter(
+        Transaction.user_id == user_id, Transaction.date >= today - timedelta(days=RECURRING_LOOKBACK_DAYS),
+        Transaction.type.in_(("income", "expense")),
+    ).all()
+    # Compared and reported in the base currency, so a series paid in several currencies still matches.
+    base_amounts = _in_base(user_id, [r[3] for r in rows], [r[4] for r in rows], [r[5] for r in rows])
+    groups, descriptions, keys, ordinals, amounts = {}, {}, [], [], []
+    for (txn_type, category, description, txn_date, _currency, _amount), amount in zip(rows, base_amounts):
+        group = (txn_type, category, (description or "").strip().lower())
+        key = groups.setdefault(group, len(groups))
+        descriptions.setdefault(key, description or "")
+        keys.append(key)
+        ordinals.append(txn_date.toordinal())
+        amounts.append(amount)
+    labels = {key: group for group, key in groups.items()}
+    result = []
+    for key, cadence, amount, last, count in detect_recurring(keys, ordinals, amounts, today):
+        txn_type, category, _ = labels[key]
+        last_date = date.fromordinal(last)
+        if cadence == "monthly":
+            next_date = month_ahead(last_date, 1)
+        else:
+            next_date = last_date + timedelta(days=CADENCES[cadence][0])
+        result.append({
+            "type": txn_type,
+            "category": category,
+            "description": descriptions[key],
+            "cadence": cadence,
+            "amount": round(amount / SCALE, 2),
+            "occurrences": count,
+            "last_date": last_date.isoformat(),
+            "next_date": next_date.isoformat(),
+        })
+    result.sort(key=lambda r: (r["next_date"], r["category"]))
+    return result
+
+
+# ── Entry points ─────────────────────────────────────────────────────
+
+def forecast_user(user_id, today=None, horizon=3, granularity="month", confidence=0.8):
+    """Build the /api/forecast payload for a user."""
+    today = today or date.today()
+    if granularity == "day":
+        days = [today - timedelta(days=i) for i in range(HISTORY_DAYS, 0, -1)]
+        Y = daily_series(user_id, days)
+        history_labels = [d.isoformat() for d in days]
+        labels = [(today + timedelta(days=h)).isoformat() for h in range(horizon)]
+    else:
+        months = months_back(add_months(today, -1), HISTORY_MONTHS)
+        Y = monthly_series(_user_rollups(user_id), months)
+        history_labels = months
+        labels = [add_months(today, h).strftime("%Y-%m") for h in range(horizon)]
+    points = project(Y, SEASON[granularity], horizon, confidence)
+    begin = int(first_active(Y).min())
+    return {
+        "granularity": granularity,
+        "horizon": horizon,
+        "confidence": confidence,
+        "history": [
+            {"period": label, "income": round(float(Y[0, i]), 2), "expenses": round(float(Y[1, i]), 2)}
+            for i, label in enumerate(history_labels) if i >= begin
+        ],
+        "forecast": [{"period": label, **point} for label, point in zip(labels, points)],
+        "recurring": recurring_transactions(user_id, today),
+    }
+
+
+def forecast_all(today=None, horizon=3):
+    """Forecast monthly income and expenses for every user in one vectorized pass.
+
+    Returns (user_ids, forecast) with forecast shaped (users, 2, horizon).
+    """
+    today = today or date.today()
+    months = months_back(add_months(today, -1), HISTORY_MONTHS)
+    rows = db.session.query(
+        MonthlyRollup.user_id, MonthlyRollup.month, MonthlyRollup.type, db.func.sum(cents(MonthlyRollup.total))
+    ).filter(
+        MonthlyRollup.month >= months[0], MonthlyRollup.month <= months[-1], MonthlyRollup.type.in_(("income", "expense"))
+    ).group_by(
+        MonthlyRollup.user_id, MonthlyRollup.month, MonthlyRollup.type
+    ).all()
+    if not rows:
+        return np.zeros(0, dtype=int), np.zeros((0, 2, horizon))
+    user_col, month_col, type_col, totals = zip(*rows)
+    user_ids, user_index = np.unique(np.array(user_col), return_inverse=True)
+    month_index = np.searchsorted(np.array(months), np.array(month_col))
+    series = np.array([0 if t == "income" else 1 for t in type_col])
+    Y = np.zeros((len(user_ids), 2, len(months)))
+    np.add.at(Y, (user_index, series, month_index), np.array(totals, dtype=float) / SCALE)
+    # Both of a user's series start at the user's first active month.
+    start = np.repeat(first_active((Y != 0).any(axis=1)), 2)
+    forecast, _ = holt_winters(Y.reshape(-1, len(months)), start, SEASON["month"], horizon)
+    return user_ids, np.maximum(forecast, 0.0).reshape(len(user_ids), 2, horizon)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description="Forecast monthly cash flow for every user.")
+    parser.add_argument("--horizon", type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        user_ids, forecast = forecast_all(horizon=args.horizon)
+        elapsed = time.perf_counter() - started
+    print(f"Forecast {len(user_ids)} users x {args.horizon} months in {elapsed:.2f}s")
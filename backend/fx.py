@@ -0,0 +1,265 @@
+"""Exchange rates and conversion into each user's base currency.
+
+Rates live in the ``fx_rates`` table and come from a local CSV file
+(``python load_fx_rates.py rates.csv``); no live rate service is involved.
+A rate is the number of units of a currency per one unit of the reference
+currency (FX_REFERENCE_CURRENCY, EUR by default as in the ECB reference
+rates), so any two listed currencies convert through it. An amount is
+converted at the latest rate on or before its date; dates before a
+currency's first rate use that first rate.
+
+Each app holds a :class:`RateTable` in memory: per currency, sorted int32
+day numbers and float64 rates, so finding the rate for a date is a binary
+search, and :meth:`RateTable.convert` converts a whole batch with one
+``np.searchsorted`` per currency pair. Results are rounded half-up to the
+cent per amount, so rollups, reports and exports agree to the cent. Each
+load stamps the rows it writes with the next rates ``version``; before
+using its table a worker reads the highest version (an indexed MAX) and
+rereads ``fx_rates`` if another process has loaded rates since.
+
+Changing a user's base currency converts their budget limits (at the rate
+of the budget's month) and goal amounts (at today's rate) with
+:func:`rebase_amounts`.
+"""
+import csv
+import math
+import os
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Budget, FxRate, Goal, Transaction, User
+from money import DEFAULT_CURRENCY, currency_code, from_cents, to_cents
+
+EXTENSION_KEY = "fx"
+DEFAULT_REFERENCE = "EUR"
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class MissingRate(ValueError):
+    pass
+
+
+def to_days(dates):
+    """Return int64 days since 1970-01-01 for dates or ISO date strings."""
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+class RateTable:
+    """Per-currency rate series with vectorized as-of lookups."""
+
+    def __init__(self, series=None, reference=DEFAULT_REFERENCE):
+        self.reference = reference
+        self._series = series or {}
+
+    @classmethod
+    def from_rows(cls, rows, reference=DEFAULT_REFERENCE):
+        """Build from (currency, date, rate) rows in any order."""
+        grouped = defaultdict(lambda: ([], []))
+        for currency, day, rate in rows:
+            grouped[currency][0].append(day)
+            grouped[currency][1].append(rate)
+        series = {}
+        for currency, (dates, rates) in grouped.items():
+            days = to_days(dates).astype(np.int32)
+            order = np.argsort(days, kind="stable")
+            series[currency] = (days[order], np.asarray(rates, dtype=np.float64)[order])
+        return cls(series, reference)
+
+    @property
+    def currencies(self):
+        return sorted({self.reference, *self._series})
+
+    def has(self, currency):
+        return currency == self.reference or currency in self._series
+
+    def can_convert(self, source, target):
+        return source == target or (self.has(source) and self.has(target))
+
+    def rates(self, currency, days):
+        """Return the rate of ``currency`` in force on each of ``days``."""
+        days = np.asarray(days)
+        if currency == self.reference:
+            return np.ones(days.shape)
+        try:
+            known_days, rates = self._series[currency]
+        except KeyError:
+            raise MissingRate(f"No exchange rates for {currency}") from None
+        index = np.searchsorted(known_days, days, side="right") - 1
+        return rates[np.maximum(index, 0)]
+
+    def convert(self, cents, sources, days, targets):
+        """Convert integer cents from ``sources`` into ``targets`` at each day's rates.
+
+        Arguments are parallel sequences (``targets`` may be one code); days
+        count from 1970-01-01. Returns int64 cents.
+        """
+        cents = np.asarray(cents, dtype=np.int64)
+        sources = np.asarray(sources, dtype="U3")
+        targets = np.broadcast_to(np.asarray(targets, dtype="U3"), sources.shape)
+        days = np.asarray(days)
+        result = cents.copy()
+        foreign = np.flatnonzero(sources != targets)
+        if not len(foreign):
+            return result
+        pairs, pair_of = np.unique(np.char.add(sources[foreign], targets[foreign]), return_inverse=True)
+        for i, pair in enumerate(pairs):
+            rows = foreign[pair_of == i]
+            source, target = str(pair[:3]), str(pair[3:])
+            factor = self.rates(target, days[rows]) / self.rates(source, days[rows])
+            amounts = cents[rows]
+            result[rows] = np.sign(amounts) * np.floor(np.abs(amounts) * factor + 0.5)
+        return result
+
+
+def rates_version():
+    return db.session.query(db.func.max(FxRate.version)).scalar() or 0
+
+
+class RateCache:
+    """Per-app holder of the current RateTable, reread when the rates version moves."""
+
+    def __init__(self, reference=DEFAULT_REFERENCE):
+        self.reference = reference
+        self._table = None
+        self._version = None
+
+    def get(self):
+        version = rates_version()
+        table = self._table
+        return table if table is not None and version == self._version else self.reload(version)
+
+    def reload(self, version=None):
+        # Read the version first: a load committed in between just triggers another reload.
+        version = rates_version() if version is None else version
+        rows = db.session.query(FxRate.currency, FxRate.date, FxRate.rate).all()
+        self._table, self._version = RateTable.from_rows(rows, self.reference), version
+        return self._table
+
+
+def init_fx(app):
+    reference = app.config.get("FX_REFERENCE_CURRENCY", os.environ.get("FX_REFERENCE_CURRENCY", DEFAULT_REFERENCE))
+    app.extensions[EXTENSION_KEY] = RateCache(currency_code(reference))
+    return app.extensions[EXTENSION_KEY]
+
+
+def rates():
+    return current_app.extensions[EXTENSION_KEY].get()
+
+
+# ── Conversion ───────────────────────────────────────────────────────
+
+def base_currency(user_id):
+    return db.session.query(User.base_currency).filter(User.id == user_id).scalar() or DEFAULT_CURRENCY
+
+
+def to_base(cents, currencies, days, base):
+    """Convert one user's amounts into ``base``; the rate table is only read if some are foreign."""
+    currencies = np.asarray(currencies, dtype="U3")
+    if not (currencies != base).any():
+        return np.asarray(cents, dtype=np.int64)
+    return rates().convert(cents, currencies, days, base)
+
+
+def base_cents(rows):
+    """Return each transaction-like mapping's amount in its owner's base currency, as int64 cents.
+
+    Rows already carrying ``amount_cents`` (the importer's batches) skip re-parsing ``amount``.
+    """
+    user_ids = {row["user_id"] for row in rows}
+    bases = dict(db.session.query(User.id, User.base_currency).filter(User.id.in_(user_ids))) if user_ids else {}
+    cents = [row["amount_cents"] if "amount_cents" in row else to_cents(row["amount"]) for row in rows]
+    sources = [row.get("currency") or DEFAULT_CURRENCY for row in rows]
+    targets = [bases.get(row["user_id"], DEFAULT_CURRENCY) for row in rows]
+    if sources == targets:
+        return np.asarray(cents, dtype=np.int64)
+    return rates().convert(cents, sources, to_days([row["date"] for row in rows]), targets)
+
+
+def rebase_amounts(user_id, source, target, today=None):
+    """Convert a user's budget limits and goal target/opening amounts from ``source`` to ``target``.
+
+    Goals' saved totals are left to :func:`goals.rebuild`. Caller commits.
+    """
+    table = rates()
+    budgets = Budget.query.filter_by(user_id=user_id).all()
+    if budgets:
+        days = to_days([f"{budget.month}-01" for budget in budgets])
+        limits = table.convert([to_cents(b.limit_amount) for b in budgets], [source] * len(budgets), days, target)
+        for budget, limit in zip(budgets, limits.tolist()):
+            budget.limit_amount = from_cents(limit)
+    goals = Goal.query.filter_by(user_id=user_id).all()
+    if goals:
+        days = to_days([today or date.today()] * len(goals))
+        sources = [source] * len(goals)
+        targets = table.convert([to_cents(g.target_amount) for g in goals], sources, days, target)
+        openings = table.convert([to_cents(g.opening_amount) for g in goals], sources, days, target)
+        for goal, target_cents, opening in zip(goals, targets.tolist(), openings.tolist()):
+            goal.target_amount, goal.opening_amount = from_cents(target_cents), from_cents(opening)
+
+
+def users_holding_foreign_currency():
+    """Ids of users with any transaction outside their base currency."""
+    query = db.session.query(Transaction.user_id).join(User, User.id == Transaction.user_id)
+    return [user_id for (user_id,) in query.filter(Transaction.currency != User.base_currency).distinct()]
+
+
+# ── Loading ──────────────────────────────────────────────────────────
+
+def read_csv(stream):
+    """Parse a rates file into ``fx_rates`` rows; raises ValueError naming the bad line.
+
+    Either long format (``date,currency,rate``) or the ECB's wide layout
+    (``Date,USD,JPY,...`` with one column per currency, blanks or N/A
+    where there is no quote).
+    """
+    reader = csv.reader(stream)
+    header = [name.strip() for name in next(reader, [])]
+    lowered = [name.lower() for name in header]
+    if lowered[:1] != ["date"]:
+        raise ValueError("The first column must be the date")
+    long_format = lowered[1:3] == ["currency", "rate"]
+    rows = []
+    for line, record in enumerate(reader, start=2):
+        if not any(field.strip() for field in record):
+            continue
+        try:
+            day = date.fromisoformat(record[0].strip())
+            if long_format:
+                quotes = [(record[1], record[2])]
+            else:
+                quotes = [(code, value) for code, value in zip(header[1:], record[1:]) if code and value.strip() not in ("", "N/A")]
+            for code, value in quotes:
+                rate = float(value)
+                if not (math.isfinite(rate) and rate > 0):
+                    raise ValueError(f"invalid rate {value!r}")
+                rows.append({"currency": currency_code(code), "date": day, "rate": rate})
+        except (ValueError, IndexError) as exc:
+            raise ValueError(f"Line {line}: {exc}") from None
+    return rows
+
+
+def store_rates(rows):
+    """Insert or replace rate rows under the next rates version and refresh this worker's table. Caller commits."""
+    table = FxRate.__table__
+    version = rates_version() + 1
+    rows = [{**row, "version": version} for row in rows]
+    insert = _UPSERT_DIALECTS.get(db.engine.dialect.name)
+    if rows and insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["currency", "date"], set_={"rate": stmt.excluded.rate, "version": stmt.excluded.version},
+        )
+        db.session.execute(stmt, rows)
+    else:
+        for row in rows:
+            updated = db.session.execute(
+                table.update().where(table.c.currency == row["currency"], table.c.date == row["date"]).values(rate=row["rate"], version=version)
+            ).rowcount
+            if not updated:
+                db.session.execute(table.insert(), row)
+    return current_app.extensions[EXTENSION_KEY].reload()
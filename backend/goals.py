@@ -0,0 +1,158 @@
+"""Savings goal progress, kept as a ledger of goal-tagged transactions.
+
+A contribution is a transaction with ``goal_id`` set. The contributions
+endpoint records them with their own types, ``saving`` (money put towards
+the goal) and ``withdrawal`` (money taken back out), which the income and
+expense aggregates (dashboard, budgets and alerts, forecast) leave out:
+moving money into savings is not spending it. An ordinary income or
+expense tagged with a goal still counts as both, an expense adding to the
+goal and an income taking from it. ``goals.current_cents`` is
+the goal's ``opening_amount`` (what was saved before tracking started)
+plus its contributions in the owner's base currency; write paths call
+:func:`record` in the same database transaction as the insert/delete, and
+it adjusts the total with one ``UPDATE ... SET current_cents =
+current_cents + :delta`` per goal, so concurrent contributions never lose
+an update.
+
+:func:`summaries` reads every goal of a user with its first contribution
+date in one grouped query and derives progress, the monthly saving rate so
+far, the projected completion date and the monthly rate still needed to
+meet the deadline from those columns alone.
+"""
+import math
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import BigInteger, bindparam
+
+from models import db, Goal, Transaction
+from money import cents, cents_to_number, from_cents, to_cents
+import fx
+
+CONTRIBUTION_CATEGORY = "Savings"
+SAVING, WITHDRAWAL = "saving", "withdrawal"
+CONTRIBUTION_TYPES = (SAVING, WITHDRAWAL)
+DAYS_PER_MONTH = 365.25 / 12
+TRANSACTION_FIELDS = ("user_id", "date", "type", "amount", "currency", "goal_id")
+
+
+def _signed(rows):
+    """Each contribution row's base-currency cents, negative for withdrawals."""
+    amounts = fx.base_cents(rows).tolist()
+    return [amount if row["type"] in ("expense", SAVING) else -amount for row, amount in zip(rows, amounts)]
+
+
+def record(txn, sign=1):
+    """Apply one transaction to its goal's total; use ``sign=-1`` before deleting it."""
+    record_many([txn], sign)
+
+
+def record_many(rows, sign=1):
+    """Apply transaction-like mappings or objects; rows without a goal are ignored. Caller commits."""
+    rows = [row if isinstance(row, dict) else {k: getattr(row, k) for k in TRANSACTION_FIELDS} for row in rows]
+    rows = [row for row in rows if row.get("goal_id") is not None]
+    if not rows:
+        return
+    deltas = defaultdict(int)
+    for row, amount in zip(rows, _signed(rows)):
+        deltas[row["goal_id"]] += sign * amount
+    table = Goal.__table__
+    current = db.func.coalesce(cents(table.c.current_amount), 0)
+    db.session.execute(
+        table.update().where(table.c.id == bindparam("goal")).values(current_amount=current + bindparam("delta", type_=BigInteger)),
+        [{"goal": goal_id, "delta": delta} for goal_id, delta in deltas.items()],
+    )
+
+
+def set_current(goal, amount):
+    """Set a goal's saved total by moving its opening amount, leaving the ledger intact. Caller commits."""
+    table = Goal.__table__
+    target = to_cents(amount)
+    current = db.func.coalesce(cents(table.c.current_amount), 0)
+    db.session.execute(table.update().where(table.c.id == goal.id).values(
+        opening_amount=cents(table.c.opening_amount) + (target - current),
+        current_amount=amount,
+    ))
+    db.session.expire(goal, ["current_amount", "opening_amount"])
+
+
+def _months(days):
+    return days / DAYS_PER_MONTH
+
+
+def progress(target, current, opening, deadline, first_contribution, today):
+    """Derived metrics of one goal from its columns (amounts in cents)."""
+    remaining = max(target - current, 0)
+    contributed = current - opening
+    rate = None
+    if first_contribution is not None:
+        # At least a month, so a first-day contribution is not extrapolated 30-fold.
+        elapsed = max((today - first_contribution).days, DAYS_PER_MONTH)
+        rate = contributed / _months(elapsed)
+    projected = None
+    if remaining == 0:
+        projected = today
+    elif rate is not None and rate > 0:
+        projected = today + timedelta(days=math.ceil(remaining * elapsed / contributed))
+    required = None
+    if deadline is not None and remaining > 0:
+        required = remaining / max(_months((deadline - today).days), 1)
+    return {
+        "percentage": round(current / target * 100, 1) if target > 0 else 0,
+        "remaining": cents_to_number(remaining),
+        "monthly_rate": None if rate is None else cents_to_number(round(rate)),
+        "projected_completion": projected and projected.isoformat(),
+        "required_monthly": None if required is None else cents_to_number(math.ceil(required)),
+        "on_track": None if deadline is None else projected is not None and projected <= deadline,
+    }
+
+
+def _deadline(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def summaries(user_id, goal_id=None, today=None):
+    """Every goal of ``user_id`` (or just ``goal_id``), newest first, with its derived progress metrics."""
+    today = today or date.today()
+    query = db.session.query(
+        Goal, cents(Goal.target_amount), db.func.coalesce(cents(Goal.current_amount), 0), cents(Goal.opening_amount),
+        db.func.min(Transaction.date),
+    ).outerjoin(Transaction, Transaction.goal_id == Goal.id).filter(Goal.user_id == user_id)
+    if goal_id is not None:
+        query = query.filter(Goal.id == goal_id)
+    rows = query.group_by(Goal.id).order_by(Goal.created_at.desc(), Goal.id.desc())
+    return [
+        {**goal.to_dict(), **progress(target, current, opening, _deadline(goal.deadline), first, today)}
+        for goal, target, current, opening, first in rows
+    ]
+
+
+def verify(user_id=None):
+    """Return (goal_id, expected, actual) cents for goals whose total disagrees with their ledger."""
+    query = db.session.query(Transaction).filter(Transaction.goal_id.isnot(None))
+    goals = Goal.query
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+        goals = goals.filter_by(user_id=user_id)
+    rows = [{k: getattr(t, k) for k in TRANSACTION_FIELDS} for t in query]
+    ledger = defaultdict(int)
+    for row, amount in zip(rows, _signed(rows) if rows else []):
+        ledger[row["goal_id"]] += amount
+    mismatches = []
+    for goal in goals.order_by(Goal.id):
+        expected = to_cents(goal.opening_amount) + ledger[goal.id]
+        actual = to_cents(goal.current_amount or 0)
+        if expected != actual:
+            mismatches.append((goal.id, expected, actual))
+    return mismatches
+
+
+def rebuild(user_id):
+    """Reset a user's goal totals to opening amount plus ledger, e.g. after a base currency change. Caller commits."""
+    table = Goal.__table__
+    for goal_id, expected, _ in verify(user_id):
+        db.session.execute(table.update().where(table.c.id == goal_id).values(current_amount=from_cents(expected)))
+    db.session.expire_all()
@@ -0,0 +1,171 @@
+"""Password hashing on a bounded process pool.
+
+bcrypt is deliberately slow (~250ms at cost 12), so running it inline lets
+a burst of logins monopolise every request thread and CPU core. Here each
+app owns a :class:`PasswordHasher` whose work runs on a dedicated pool of
+PASSWORD_HASH_WORKERS processes. At most PASSWORD_HASH_QUEUE_LIMIT calls
+may be queued or running at once; beyond that :class:`HasherSaturated` is
+raised and the route answers 429 instead of piling up more work; so does
+a call that waits more than TIMEOUT_SECONDS for the pool. A timed-out job
+keeps its slot until the worker actually finishes it.
+PASSWORD_HASH_WORKERS=0 hashes inline in the request thread, still bounded
+by the queue limit.
+
+BCRYPT_ROUNDS sets the cost for new hashes. Hashes made with another cost
+still verify, and :meth:`PasswordHasher.needs_rehash` tells login to store
+a fresh one.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+import metrics
+
+EXTENSION_KEY = "password_hasher"
+DEFAULT_ROUNDS = 12
+TIMEOUT_SECONDS = 30
+
+
+class HasherSaturated(Exception):
+    pass
+
+
+def _lower_priority():
+    # Request handling should win the CPU over hashing when cores are scarce.
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _check(password, password_hash):
+    return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+
+
+def hash_rounds(password_hash):
+    """Return the cost factor encoded in a bcrypt hash ("$2b$12$...")."""
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    def __init__(self, workers=2, rounds=DEFAULT_ROUNDS, queue_limit=16, timeout=TIMEOUT_SECONDS):
+        self.workers = workers
+        self.rounds = rounds
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.stats = {"completed": 0, "failed": 0, "rejected": 0, "timeouts": 0, "max_pending": 0}
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that holds DB connections and threads is unsafe.
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_lower_priority
+                )
+            return self._executor
+
+    def _finished(self, ok):
+        with self._lock:
+            self.pending -= 1
+            self.stats["completed" if ok else "failed"] += 1
+
+    def _done(self, future):
+        self._finished(not future.cancelled() and future.exception() is None)
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.queue_limit:
+                self.stats["rejected"] += 1
+                raise HasherSaturated("Too many password operations in progress")
+            self.pending += 1
+            self.stats["max_pending"] = max(self.stats["max_pending"], self.pending)
+        if self.workers <= 0:
+            try:
+                result = fn(*args)
+            except BaseException:
+                self._finished(False)
+                raise
+            self._finished(True)
+            return result
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._finished(False)
+            raise
+        # The slot is released when the job ends, not when this caller stops waiting for it.
+        future.add_done_callback(self._done)
+        try:
+            return future.result(timeout=self.timeout)
+        except futures.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.stats["timeouts"] += 1
+            raise HasherSaturated("Password operation timed out") from None
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def check(self, password, password_hash):
+        return self._run(_check, password, password_hash)
+
+    def needs_rehash(self, password_hash):
+        return hash_rounds(password_hash) != self.rounds
+
+    @property
+    def metrics(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "queue_limit": self.queue_limit,
+                "pending": self.pending,
+                "queued": max(self.pending - max(self.workers, 1), 0),
+                **self.stats,
+            }
+
+    def samples(self):
+        """Queue depth and outcome counters for /metrics."""
+        m = self.metrics
+        return [
+            ("password_hash_pending", "gauge", "Password operations queued or running.", m["pending"]),
+            ("password_hash_queued", "gauge", "Password operations waiting for a worker.", m["queued"]),
+            ("password_hash_max_pending", "gauge", "Most password operations in flight at once.", m["max_pending"]),
+            ("password_hash_queue_limit", "gauge", "Password operations allowed in flight.", m["queue_limit"]),
+            ("password_hash_completed_total", "counter", "Password operations that succeeded.", m["completed"]),
+            ("password_hash_failed_total", "counter", "Password operations that raised.", m["failed"]),
+            ("password_hash_rejected_total", "counter", "Password operations refused with the queue full.", m["rejected"]),
+            ("password_hash_timeouts_total", "counter", "Password operations the caller stopped waiting for.", m["timeouts"]),
+        ]
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def init_hasher(app):
+    def setting(name, default):
+        return app.config.get(name, os.environ.get(name, default))
+
+    workers = int(setting("PASSWORD_HASH_WORKERS", min(os.cpu_count() or 1, 4)))
+    hasher = PasswordHasher(
+        workers=workers,
+        rounds=int(setting("BCRYPT_ROUNDS", DEFAULT_ROUNDS)),
+        queue_limit=int(setting("PASSWORD_HASH_QUEUE_LIMIT", max(workers, 1) * 8)),
+    )
+    app.extensions[EXTENSION_KEY] = hasher
+    metrics.register_collector(app, hasher.samples)
+    return hasher
@@ -0,0 +1,159 @@
+"""Streaming bulk import of transactions from CSV or a JSON array.
+
+Records are parsed incrementally from the request stream, validated with
+the same rules as POST /api/transactions, and inserted in batches with a
+single executemany per batch (plus one rollup upsert per batch). The
+search index is fed once per import rather than by the per-row trigger.
+Memory use is bounded by the batch size rather than the size of the upload.
+"""
+import codecs
+import csv
+import io
+import json
+from operator import itemgetter
+
+from models import db
+from money import to_cents
+import fx
+from validation import parse_transaction, ValidationError
+import rollups
+import search
+
+BATCH_SIZE = 5000
+READ_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 100
+
+# Header names written by export_transactions, mapped to API field names.
+CSV_COLUMNS = {
+    "date": "date", "type": "type", "category": "category", "amount": "amount",
+    "currency": "currency", "description": "description",
+}
+
+
+def iter_csv_records(stream):
+    """Yield dicts from a CSV byte stream using the export column layout (ID is ignored)."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    fields = [CSV_COLUMNS.get(name.strip().lower()) for name in header]
+    for row in reader:
+        if not row:
+            continue
+        yield {field: value for field, value in zip(fields, row) if field}
+
+
+def iter_json_records(stream):
+    """Yield items of a top-level JSON array without reading the whole body into memory."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = stream.read(READ_SIZE)
+        if not chunk:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b"", final=True)
+        else:
+            buf = buf[pos:] + utf8.decode(chunk)
+        pos = 0
+
+    def next_char():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if eof:
+                return ""
+            fill()
+
+    if next_char() != "[":
+        raise ValueError("Body must be a JSON array")
+    pos += 1
+    after_value = False
+    first = True
+    while True:
+        char = next_char()
+        if char == "]" and (first or after_value):
+            return
+        if after_value:
+            if char != ",":
+                raise ValueError("Malformed JSON array")
+            pos += 1
+            after_value = False
+            continue
+        if char == "":
+            raise ValueError("Malformed JSON array")
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise ValueError("Malformed JSON array")
+                fill()
+                continue
+            # A number cut by the buffer edge ("3." of "3.5") still decodes,
+            # so only accept values followed by a delimiter we have seen.
+            if not eof and (end == len(buf) or buf[end] not in " \t\r\n,]"):
+                fill()
+                continue
+            break
+        pos = end
+        after_value = True
+        first = False
+        yield item
+
+
+def _insert_statement(conn):
+    columns = ("user_id", "amount_cents", "currency", "category", "description", "date", "type")
+    marker = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    sql = f"INSERT INTO transactions ({', '.join(columns)}) VALUES ({', '.join([marker] * len(columns))})"
+    return sql, columns
+
+
+def import_transactions(user_id, records, batch_size=None):
+    """Validate and insert records; return (imported_count, errors, error_count).
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    conn = db.session.connection()
+    sql, columns = _insert_statement(conn)
+    row_values = itemgetter(*columns)
+    base_currency = fx.base_currency(user_id)
+    imported, error_count, errors, batch = 0, 0, [], []
+
+    def flush():
+        nonlocal imported, batch
+        if batch:
+            # Driver-level SQL skips per-row bind processing but still goes through
+            # the engine, so the metrics hooks see the statement.
+            conn.exec_driver_sql(sql, [row_values(values) for values in batch])
+            rollups.record_many(batch)
+            imported += len(batch)
+            batch = []
+
+    with search.deferred_indexing():
+        for row_number, record in enumerate(records, start=1):
+            try:
+                if not isinstance(record, dict):
+                    raise ValidationError("Row must be an object")
+                values = parse_transaction(record, base_currency)
+            except ValidationError as exc:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"row": row_number, "error": str(exc)})
+                continue
+            values["user_id"] = user_id
+            values["date"] = values["date"].isoformat()
+            # Driver-level SQL bypasses the Money column type; rollups still get the Decimal.
+            values["amount_cents"] = to_cents(values["amount"])
+            batch.append(values)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    return imported, errors, error_count
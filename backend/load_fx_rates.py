@@ -0,0 +1,51 @@
+"""Load exchange rates from a local CSV file into the fx_rates table.
+
+    python load_fx_rates.py rates.csv   # date,currency,rate rows, or the ECB's wide layout
+
+Rates are inserted or replaced. Users holding transactions outside their
+base currency get their rollups rebuilt at the new rates and their data
+versions bumped, so cached reports are recomputed. Running API workers
+pick up the new rates version on their next conversion.
+"""
+import argparse
+import sys
+
+from models import db
+import fx
+import rollups
+import versioning
+
+
+def load(path):
+    """Store the file's rates and refresh affected users; return (rates, users). Caller commits."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = fx.read_csv(f)
+    fx.store_rates(rows)
+    users = fx.users_holding_foreign_currency()
+    for user_id in users:
+        rollups.rebuild(user_id)
+    if users:
+        versioning.bump_many(users)
+    return len(rows), len(users)
+
+
+def main(app, argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="CSV file of rates")
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        try:
+            count, users = load(args.path)
+        except (OSError, ValueError) as exc:
+            print(f"Could not load rates: {exc}", file=sys.stderr)
+            return 1
+        db.session.commit()
+        print(f"Loaded {count} rates, rebuilt rollups for {users} users")
+        return 0
+
+
+if __name__ == "__main__":
+    from app import create_app
+    app = create_app()
+    sys.exit(main(app))
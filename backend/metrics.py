@@ -0,0 +1,254 @@
+"""Per-route request metrics, exposed in Prometheus text format at /metrics.
+
+Every request records, under its method and route pattern (the Flask URL
+rule, so ``/api/goals/<int:goal_id>`` is one series):
+
+* ``http_requests_total`` by status code
+* ``http_request_duration_seconds``, a latency histogram
+* ``http_request_sql_statements``, a histogram of statements per request
+* ``http_request_sql_seconds_total`` and ``http_request_sql_rows_total``
+* ``http_response_size_bytes``, a histogram (streamed responses excluded)
+
+Other extensions add their own counters and gauges (auth caches, the
+password hasher, the response cache) with :func:`register_collector`;
+those are read when /metrics is rendered.
+
+SQL is timed with ``before/after_cursor_execute`` hooks on every engine.
+Rows are the DBAPI ``rowcount``: rows returned on PostgreSQL (psycopg2
+buffers results) and rows written on SQLite, which reports no count for
+SELECTs. Requests slower than SLOW_REQUEST_MS (500 by default, 0 disables
+the check) are logged with their statements, and SERVER_TIMING=1 adds a
+``Server-Timing`` header for browser dev tools.
+
+Each worker keeps its own registry, updated under one lock per request;
+scrape every worker, or set METRICS_ENABLED=0 to turn the hooks off.
+Set METRICS_TOKEN to require ``Authorization: Bearer <token>`` on /metrics.
+"""
+import hmac
+import os
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app, g, has_app_context, request, Response
+from sqlalchemy import event
+
+from models import db
+
+EXTENSION_KEY = "metrics"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# Statements kept per request for the slow-request log.
+MAX_CAPTURED = 50
+
+
+def _setting(app, name, default):
+    return app.config.get(name, os.environ.get(name, default))
+
+
+def _enabled(value):
+    return str(value).lower() not in ("0", "false", "no", "off", "")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestStats:
+    """SQL activity of the request in progress."""
+    __slots__ = ("start", "statements", "sql_seconds", "rows", "captured")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+        self.captured = []
+
+
+class Registry:
+    """One worker's metrics, keyed by (method, route)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.statements = defaultdict(lambda: Histogram(STATEMENT_BUCKETS))
+        self.sql_seconds = defaultdict(float)
+        self.rows = defaultdict(int)
+        self.sizes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.collectors = []
+
+    def observe(self, method, route, status, seconds, stats, size):
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            self.latency[key].observe(seconds)
+            self.statements[key].observe(stats.statements)
+            self.sql_seconds[key] += stats.sql_seconds
+            self.rows[key] += stats.rows
+            if size is not None:
+                self.sizes[key].observe(size)
+
+    def render(self):
+        """Return the registry in Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            _counter(lines, "http_requests_total", "Requests handled.", self.requests, ("method", "route", "status"))
+            _histogram(lines, "http_request_duration_seconds", "Request latency.", self.latency)
+            _histogram(lines, "http_request_sql_statements", "SQL statements per request.", self.statements)
+            _counter(lines, "http_request_sql_seconds_total", "Time spent in SQL statements.", self.sql_seconds, ("method", "route"))
+            _counter(lines, "http_request_sql_rows_total", "Rows reported by the database driver.", self.rows, ("method", "route"))
+            _histogram(lines, "http_response_size_bytes", "Response body size.", self.sizes)
+        # Outside the lock: collectors take their owners' locks.
+        for collect in self.collectors:
+            for name, kind, help_text, value in collect():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names, values):
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+def _counter(lines, name, help_text, values, names):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for key in sorted(values):
+        lines.append(f"{name}{{{_labels(names, key)}}} {values[key]:g}")
+
+
+def _histogram(lines, name, help_text, histograms):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key in sorted(histograms):
+        histogram = histograms[key]
+        labels = _labels(("method", "route"), key)
+        for bound, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum:g}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+# ── SQL hooks ────────────────────────────────────────────────────────
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_start"].pop()
+    stats = g.get("request_stats") if has_app_context() else None
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.sql_seconds += elapsed
+    stats.rows += max(cursor.rowcount, 0)
+    if len(stats.captured) < MAX_CAPTURED:
+        stats.captured.append((elapsed, statement))
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute.
+    starts = context.connection.info.get("metrics_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+# ── Request hooks ────────────────────────────────────────────────────
+
+def _start_request():
+    g.request_stats = RequestStats()
+
+
+def _slow_request_log(seconds, stats):
+    lines = [
+        f"Slow request: {request.method} {request.full_path.rstrip('?')} took {seconds * 1000:.0f}ms, "
+        f"{stats.statements} SQL statements in {stats.sql_seconds * 1000:.0f}ms"
+    ]
+    lines += [f"  {elapsed * 1000:8.2f}ms  {' '.join(statement.split())[:1000]}" for elapsed, statement in stats.captured]
+    if stats.statements > len(stats.captured):
+        lines.append(f"  ... {stats.statements - len(stats.captured)} more")
+    return "\n".join(lines)
+
+
+def _finish_request(response):
+    stats = g.get("request_stats")
+    if stats is None:
+        return response
+    seconds = time.perf_counter() - stats.start
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    size = None if response.is_streamed else response.content_length
+    current_app.extensions[EXTENSION_KEY].observe(request.method, route, response.status_code, seconds, stats, size)
+    slow_ms = current_app.config["SLOW_REQUEST_MS"]
+    if slow_ms and seconds * 1000 >= slow_ms:
+        current_app.logger.warning(_slow_request_log(seconds, stats))
+    if current_app.config["SERVER_TIMING"]:
+        response.headers["Server-Timing"] = (
+            f'app;dur={seconds * 1000:.1f}, sql;dur={stats.sql_seconds * 1000:.1f};desc="{stats.statements} statements"'
+        )
+    return response
+
+
+def _end_request(exc):
+    # Popped, not left on g: g outlives the request when an app context is already pushed.
+    g.pop("request_stats", None)
+
+
+def register_collector(app, collect):
+    """Render ``collect()``'s ``(name, "counter" | "gauge", help, value)`` samples at /metrics.
+
+    A no-op when metrics are disabled, so extensions can call it unconditionally.
+    """
+    registry = app.extensions.get(EXTENSION_KEY)
+    if registry is not None:
+        registry.collectors.append(collect)
+
+
+def metrics_view():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return Response("Unauthorized\n", status=401, mimetype="text/plain")
+    return Response(current_app.extensions[EXTENSION_KEY].render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app):
+    """Install the hooks and /metrics; call before other after_request hooks so timings include them."""
+    if not _enabled(_setting(app, "METRICS_ENABLED", "1")):
+        return None
+    app.config["SLOW_REQUEST_MS"] = float(_setting(app, "SLOW_REQUEST_MS", 500))
+    app.config["SERVER_TIMING"] = _enabled(_setting(app, "SERVER_TIMING", "0"))
+    app.config.setdefault("METRICS_TOKEN", os.environ.get("METRICS_TOKEN"))
+    registry = Registry()
+    app.extensions[EXTENSION_KEY] = registry
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(engine, "handle_error", _handle_error)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_end_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+    return registry
@@ -0,0 +1,175 @@
+"""Minimal schema migrations for databases created by earlier releases.
+
+``db.create_all`` only creates missing tables, so schema changes to existing
+tables (new indexes, new columns) are applied here. Each migration is a
+function taking a SQLAlchemy Connection; applied versions are recorded in
+``schema_migrations`` and every step is written to be idempotent so a
+fresh database built by ``create_all`` can run them harmlessly.
+
+    python migrations.py   # apply pending migrations and list versions
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+
+from models import User, Transaction, Budget, Goal, MonthlyRollup, FxRate
+import search
+
+metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _create_indexes(conn, table):
+    inspector = inspect(conn)
+    existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+    columns = {col["name"] for col in inspector.get_columns(table.name)}
+    for index in table.indexes:
+        # Indexes on columns a later migration adds are created by that migration.
+        if index.name not in existing and all(col.name in columns for col in index.columns):
+            index.create(conn)
+
+
+def _add_column(conn, table, column):
+    """Add ``column`` (a Column bound to ``table``) unless it already exists."""
+    if column.name in {col["name"] for col in inspect(conn).get_columns(table.name)}:
+        return
+    # CreateColumn renders the type, NOT NULL and a quoted server default.
+    conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {CreateColumn(column).compile(dialect=conn.dialect)}")
+
+
+def add_hot_path_indexes(conn):
+    _create_indexes(conn, Transaction.__table__)
+    _create_indexes(conn, Goal.__table__)
+    try:
+        _create_indexes(conn, Budget.__table__)
+    except IntegrityError as exc:
+        raise RuntimeError(
+            "Cannot add unique index on budgets(user_id, category, month): "
+            "remove duplicate budgets and run migrations again"
+        ) from exc
+
+
+def add_user_data_version(conn):
+    _add_column(conn, User.__table__, User.__table__.c.data_version)
+
+
+# (table, float column in earlier releases); the model column of that key stores cents.
+MONEY_COLUMNS = [
+    (Transaction.__table__, "amount"),
+    (Budget.__table__, "limit_amount"),
+    (Goal.__table__, "target_amount"),
+    (Goal.__table__, "current_amount"),
+    (MonthlyRollup.__table__, "total"),
+]
+
+
+def store_money_as_cents(conn):
+    """Replace each float amount column with an integer cents column.
+
+    Rollup totals are float sums, but their drift is far below half a cent,
+    so rounding recovers the exact total (rebuild_rollups.py --verify checks).
+    """
+    for table, old in MONEY_COLUMNS:
+        inspector = inspect(conn)
+        if not inspector.has_table(table.name) or old not in {col["name"] for col in inspector.get_columns(table.name)}:
+            continue
+        column = table.c[old]
+        new = column.name
+        ddl = f"ALTER TABLE {table.name} ADD COLUMN {new} {column.type.compile(conn.dialect)}"
+        if not column.nullable:
+            ddl += " NOT NULL DEFAULT 0"
+        conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql(f"UPDATE {table.name} SET {new} = CAST(ROUND({old} * 100) AS BIGINT)")
+        # Indexes on the old column are dropped with it and recreated on the new one.
+        for index in inspector.get_indexes(table.name):
+            if old in index["column_names"]:
+                conn.exec_driver_sql(f"DROP INDEX {index['name']}")
+        conn.exec_driver_sql(f"ALTER TABLE {table.name} DROP COLUMN {old}")
+        _create_indexes(conn, table)
+
+
+def add_currencies(conn):
+    """Existing rows are in the default currency, which becomes every user's base."""
+    _add_column(conn, Transaction.__table__, Transaction.__table__.c.currency)
+    _add_column(conn, User.__table__, User.__table__.c.base_currency)
+
+
+def add_transaction_rule_id(conn):
+    _add_column(conn, Transaction.__table__, Transaction.__table__.c.rule_id)
+    _create_indexes(conn, Transaction.__table__)
+
+
+def add_budget_alert_thresholds(conn):
+    _add_column(conn, Budget.__table__, Budget.__table__.c.alert_thresholds)
+
+
+def add_goal_ledger(conn):
+    """Amounts saved so far become each goal's opening amount; contributions start from there."""
+    columns = {col["name"] for col in inspect(conn).get_columns(Goal.__table__.name)}
+    _add_column(conn, Goal.__table__, Goal.__table__.c.opening_amount)
+    if "opening_cents" not in columns:
+        conn.exec_driver_sql("UPDATE goals SET opening_cents = COALESCE(current_cents, 0)")
+    _add_column(conn, Transaction.__table__, Transaction.__table__.c.goal_id)
+    _create_indexes(conn, Transaction.__table__)
+
+
+def add_fx_rates_version(conn):
+    """Databases from before currencies get the whole table from ``create_all``."""
+    if not inspect(conn).has_table(FxRate.__tablename__):
+        return
+    _add_column(conn, FxRate.__table__, FxRate.__table__.c.version)
+    _create_indexes(conn, FxRate.__table__)
+
+
+MIGRATIONS = [
+    (1, "transaction, budget and goal hot-path indexes", add_hot_path_indexes),
+    (2, "full-text search index over transaction descriptions", search.install),
+    (3, "per-user data version for conditional GETs", add_user_data_version),
+    (4, "money columns as integer cents", store_money_as_cents),
+    (5, "transaction currency and user base currency", add_currencies),
+    (6, "recurring rule link on transactions", add_transaction_rule_id),
+    (7, "budget alert thresholds", add_budget_alert_thresholds),
+    (8, "goal contributions ledger", add_goal_ledger),
+    (9, "full-text search index scoped by user", search.scope_by_user),
+    (10, "fx rates version for reloading workers", add_fx_rates_version),
+]
+
+
+def applied_versions(conn):
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def upgrade(engine):
+    """Apply pending migrations in order; return the versions applied."""
+    metadata.create_all(engine)
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        with engine.begin() as conn:
+            if version in applied_versions(conn):
+                continue
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.now(timezone.utc)
+            ))
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        with db.engine.connect() as conn:
+            rows = conn.execute(select(schema_migrations).order_by(schema_migrations.c.version)).all()
+        for row in rows:
+            print(f"{row.version:>4}  {row.applied_at:%Y-%m-%d %H:%M}  {row.name}")
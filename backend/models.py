@@ -1,7 +1,24 @@
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from datetime import datetime, timezone
 
-db = SQLAlchemy()
+from money import DEFAULT_CURRENCY, Money, as_number
+
+
+class RoutingSession(Session):
+    """Send reads to the "replica" bind when database.init_db flags the request as read-only."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and g.get("use_replica"):
+            replica = self._db.engines.get("replica")
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+DEFAULT_ALERT_THRESHOLDS = "80,100"
 
 
 class User(db.Model):
@@ -10,49 +27,173 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    # Bumped by every write to the user's data; read endpoints derive ETags from it.
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Rollups, budgets and reports are in this currency (ISO 4217 code).
+    base_currency = db.Column(db.String(3), nullable=False, default=DEFAULT_CURRENCY, server_default=DEFAULT_CURRENCY)
     transactions = db.relationship("Transaction", backref="user", lazy=True)
     budgets = db.relationship("Budget", backref="user", lazy=True)
 
     def to_dict(self):
-        return {"id": self.id, "username": self.username, "created_at": self.created_at.isoformat()}
+        return {"id": self.id, "username": self.username, "base_currency": self.base_currency, "created_at": self.created_at.isoformat()}
 
 
 class Transaction(db.Model):
     __tablename__ = "transactions"
+    __table_args__ = (
+        db.Index("ix_transactions_user_date", "user_id", "date"),
+        db.Index("ix_transactions_user_type_category_date", "user_id", "type", "category", "date"),
+        db.Index("ix_transactions_user_category_date", "user_id", "category", "date"),
+        db.Index("ix_transactions_user_amount", "user_id", "amount"),
+        # One transaction per rule occurrence: the recurring scheduler relies on it to never double-insert.
+        db.Index("ix_transactions_rule_date", "rule_id", "date", unique=True),
+        db.Index("ix_transactions_goal_date", "goal_id", "date"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    # Money columns hold integer cents in "<name>_cents"; see money.py.
+    amount = db.Column("amount_cents", Money, key="amount", nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default=DEFAULT_CURRENCY, server_default=DEFAULT_CURRENCY)
     category = db.Column(db.String(50), nullable=False)
     description = db.Column(db.Text, default="")
     date = db.Column(db.Date, nullable=False)
     type = db.Column(db.String(10), nullable=False)
+    # Set on rows materialized from a RecurringRule (recurring.py).
+    rule_id = db.Column(db.Integer, db.ForeignKey("recurring_rules.id"), nullable=True)
+    # Set on contributions to (expense) or withdrawals from (income) a savings Goal (goals.py).
+    goal_id = db.Column(db.Integer, db.ForeignKey("goals.id"), nullable=True)
 
     def to_dict(self):
-        return {"id": self.id, "user_id": self.user_id, "amount": self.amount, "category": self.category, "description": self.description, "date": self.date.isoformat(), "type": self.type}
+        return {"id": self.id, "user_id": self.user_id, "amount": as_number(self.amount), "currency": self.currency, "category": self.category, "description": self.description, "date": self.date.isoformat(), "type": self.type, "goal_id": self.goal_id}
 
 
 class Budget(db.Model):
     __tablename__ = "budgets"
+    __table_args__ = (
+        db.Index("ux_budgets_user_category_month", "user_id", "category", "month", unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     category = db.Column(db.String(50), nullable=False)
-    limit_amount = db.Column(db.Float, nullable=False)
+    limit_amount = db.Column("limit_cents", Money, key="limit_amount", nullable=False)
     month = db.Column(db.String(7), nullable=False)
+    # Comma-separated percentages of the limit that raise an alert when spending reaches them (alerts.py).
+    alert_thresholds = db.Column(db.String(100), nullable=False, default=DEFAULT_ALERT_THRESHOLDS, server_default=DEFAULT_ALERT_THRESHOLDS)
+
+    @property
+    def thresholds(self):
+        return [int(p) for p in (self.alert_thresholds or DEFAULT_ALERT_THRESHOLDS).split(",") if p]
 
     def to_dict(self):
-        return {"id": self.id, "user_id": self.user_id, "category": self.category, "limit_amount": self.limit_amount, "month": self.month}
+        return {"id": self.id, "user_id": self.user_id, "category": self.category, "limit_amount": as_number(self.limit_amount), "month": self.month, "alert_thresholds": self.thresholds}
 
 
 class Goal(db.Model):
     __tablename__ = "goals"
+    __table_args__ = (
+        db.Index("ix_goals_user_created", "user_id", "created_at"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     name = db.Column(db.String(100), nullable=False)
-    target_amount = db.Column(db.Float, nullable=False)
-    current_amount = db.Column(db.Float, default=0)
+    target_amount = db.Column("target_cents", Money, key="target_amount", nullable=False)
+    # current_amount is opening_amount plus the goal's contributions, kept up to date by goals.record.
+    current_amount = db.Column("current_cents", Money, key="current_amount", default=0)
+    opening_amount = db.Column("opening_cents", Money, key="opening_amount", nullable=False, default=0, server_default="0")
     deadline = db.Column(db.String(10), nullable=True)
     icon = db.Column(db.String(10), default="⭐")
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
     def to_dict(self):
-        return {"id": self.id, "user_id": self.user_id, "name": self.name, "target_amount": self.target_amount, "current_amount": self.current_amount, "deadline": self.deadline, "icon": self.icon, "created_at": self.created_at.isoformat()}
+        return {"id": self.id, "user_id": self.user_id, "name": self.name, "target_amount": as_number(self.target_amount), "current_amount": as_number(self.current_amount), "deadline": self.deadline, "icon": self.icon, "created_at": self.created_at.isoformat()}
+
+
+class MonthlyRollup(db.Model):
+    __tablename__ = "monthly_rollups"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)
+    type = db.Column(db.String(10), primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    total = db.Column("total_cents", Money, key="total", nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class FxRate(db.Model):
+    """Units of ``currency`` per one unit of FX_REFERENCE_CURRENCY on ``date`` (see fx.py)."""
+    __tablename__ = "fx_rates"
+    __table_args__ = (
+        db.Index("ix_fx_rates_version", "version"),
+    )
+    currency = db.Column(db.String(3), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    rate = db.Column(db.Float, nullable=False)
+    # Rates version of the load that last wrote the row; workers reload when the maximum moves.
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+class RecurringRule(db.Model):
+    """A transaction repeated every ``interval`` days/weeks/months/years; see recurring.py."""
+    __tablename__ = "recurring_rules"
+    __table_args__ = (
+        db.Index("ix_recurring_rules_user_id", "user_id"),
+        db.Index("ix_recurring_rules_next_date", "next_date"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    amount = db.Column("amount_cents", Money, key="amount", nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default=DEFAULT_CURRENCY)
+    category = db.Column(db.String(50), nullable=False)
+    description = db.Column(db.Text, default="")
+    type = db.Column(db.String(10), nullable=False)
+    frequency = db.Column(db.String(10), nullable=False)
+    interval = db.Column(db.Integer, nullable=False, default=1)
+    # Monthly rules only; defaults to the start date's day, clamped to short months.
+    day_of_month = db.Column(db.Integer, nullable=True)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=True)
+    # First occurrence not yet materialized; None once the rule has ended.
+    next_date = db.Column(db.Date, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        return {
+            "id": self.id, "amount": as_number(self.amount), "currency": self.currency, "category": self.category,
+            "description": self.description, "type": self.type, "frequency": self.frequency, "interval": self.interval,
+            "day_of_month": self.day_of_month, "start_date": self.start_date.isoformat(),
+            "end_date": self.end_date and self.end_date.isoformat(), "next_date": self.next_date and self.next_date.isoformat(),
+        }
+
+
+class BudgetAlert(db.Model):
+    """Outbox of budget threshold crossings; ids are the cursor /api/alerts long-polls on."""
+    __tablename__ = "budget_alerts"
+    __table_args__ = (
+        db.Index("ix_budget_alerts_user_id", "user_id", "id"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # Not a foreign key: alerts outlive a deleted budget.
+    budget_id = db.Column(db.Integer, nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    month = db.Column(db.String(7), nullable=False)
+    threshold = db.Column(db.Integer, nullable=False)
+    spent = db.Column("spent_cents", Money, key="spent", nullable=False)
+    limit_amount = db.Column("limit_cents", Money, key="limit_amount", nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        return {
+            "id": self.id, "budget_id": self.budget_id, "category": self.category, "month": self.month,
+            "threshold": self.threshold, "status": "exceeded" if self.threshold >= 100 else "warning",
+            "spent": as_number(self.spent), "limit_amount": as_number(self.limit_amount),
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+class RevokedToken(db.Model):
+    """Logged-out token ids, shared by every worker; rows are pruned once the token has expired."""
+    __tablename__ = "revoked_tokens"
+    jti = db.Column(db.String(64), primary_key=True)
+    # Not a foreign key: revocations outlive a deleted account until they expire.
+    user_id = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,77 @@
+"""Money stored as integer cents.
+
+Amount columns use the :class:`Money` column type: the database holds a
+BIGINT number of cents, model attributes read back as exact ``Decimal``
+values, and anything bound to them (floats, ints, strings, Decimals) is
+rounded half-up to the cent. SQL ``SUM`` over the column is therefore an
+exact integer sum.
+
+Aggregation code selects ``cents(column)`` to get the raw integers, adds
+them as Python ints or numpy int64, and converts once with
+:func:`cents_to_number` when building a response. JSON keeps emitting plain
+numbers (``12.5``, not ``"12.50"``); a cent count divided by 100 is the
+float closest to the decimal value, so it prints exactly.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from sqlalchemy import BigInteger, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+SCALE = 100
+CENT = Decimal("0.01")
+DEFAULT_CURRENCY = "USD"
+
+
+def to_decimal(value):
+    """Parse an amount into a Decimal rounded to the cent; raises ValueError."""
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid amount: {value!r}")
+    try:
+        # str() of a float is its shortest repr, so 0.1 parses as 0.1, not 0.1000000000000000055...
+        amount = value if isinstance(value, Decimal) else Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def to_cents(value):
+    return int(to_decimal(value) * SCALE)
+
+
+def from_cents(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def cents_to_number(cents):
+    """Return a cent count as the JSON number clients expect."""
+    return cents / SCALE
+
+
+def currency_code(value):
+    """Normalise an ISO 4217 code ("usd " -> "USD"); raises ValueError."""
+    code = value.strip().upper() if isinstance(value, str) else ""
+    if len(code) != 3 or not (code.isascii() and code.isalpha()):
+        raise ValueError(f"Invalid currency code: {value!r}")
+    return code
+
+
+def as_number(amount):
+    return None if amount is None else float(amount)
+
+
+class Money(TypeDecorator):
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_cents(value)
+
+
+def cents(column):
+    """Select a Money column (or an aggregate of one) as raw integer cents."""
+    return type_coerce(column, BigInteger)
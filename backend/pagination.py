@@ -0,0 +1,89 @@
+"""Keyset (cursor) pagination for transaction listings.
+
+Instead of OFFSET, each page continues from the sort key of the last row
+it returned, so the database seeks straight to the next row through the
+(user_id, <sort column>, ...) indexes and page N costs the same as page 1.
+The cursor handed to clients is an opaque URL-safe token.
+"""
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import literal, tuple_
+
+from models import Transaction
+from money import to_decimal
+
+# Sort keys end with the primary key so every row has a unique position.
+# category also orders by date to match ix_transactions_user_category_date.
+SORT_KEYS = {
+    "date": (Transaction.date, Transaction.id),
+    "amount": (Transaction.amount, Transaction.id),
+    "category": (Transaction.category, Transaction.date, Transaction.id),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _to_json(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    # Amounts are exact Decimals; the Money column type parses the string back.
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def _from_json(column, value):
+    # _to_json writes ids as ints and everything else as strings; anything
+    # else is a tampered token and must not reach the SQL comparison.
+    if column is Transaction.id:
+        if type(value) is not int:
+            raise InvalidCursor("Invalid cursor")
+        return value
+    if not isinstance(value, str):
+        raise InvalidCursor("Invalid cursor")
+    if column is Transaction.date:
+        return date.fromisoformat(value)
+    return to_decimal(value) if column is Transaction.amount else value
+
+
+def encode_cursor(sort_by, sort_order, txn):
+    values = [_to_json(getattr(txn, col.key)) for col in SORT_KEYS[sort_by]]
+    raw = json.dumps({"s": sort_by, "o": sort_order, "k": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, sort_by, sort_order):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        columns = SORT_KEYS[sort_by]
+        if data["s"] != sort_by or data["o"] != sort_order or len(data["k"]) != len(columns):
+            raise InvalidCursor("Cursor does not match the requested sort")
+        return [_from_json(col, value) for col, value in zip(columns, data["k"])]
+    except InvalidCursor:
+        raise
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+
+def keyset_page(query, sort_by, sort_order, cursor, per_page):
+    """Return (rows, next_cursor) for one page of ``query`` in keyset order."""
+    if sort_by not in SORT_KEYS:
+        sort_by = "date"
+    sort_order = "asc" if sort_order == "asc" else "desc"
+    columns = SORT_KEYS[sort_by]
+    descending = sort_order == "desc"
+    per_page = max(per_page, 1)
+    if cursor:
+        values = decode_cursor(cursor, sort_by, sort_order)
+        key = tuple_(*columns)
+        # Bind through each column's type so amounts are compared as cents.
+        bound = tuple_(*(literal(value, col.type) for col, value in zip(columns, values)))
+        query = query.filter(key < bound if descending else key > bound)
+    query = query.order_by(*(col.desc() if descending else col.asc() for col in columns))
+    rows = query.limit(per_page + 1).all()
+    next_cursor = encode_cursor(sort_by, sort_order, rows[per_page - 1]) if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
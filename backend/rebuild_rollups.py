@@ -0,0 +1,36 @@
+"""Rebuild or verify the monthly_rollups table against raw transactions.
+
+    python rebuild_rollups.py            # recompute rollups for every user
+    python rebuild_rollups.py --verify   # report mismatches, exit 1 if any
+    python rebuild_rollups.py --user 42  # limit either mode to one user
+"""
+import argparse
+import sys
+
+from models import db
+import rollups
+
+
+def main(app, argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verify", action="store_true", help="compare rollups to transactions without writing")
+    parser.add_argument("--user", type=int, help="only process this user id")
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        if args.verify:
+            mismatches = rollups.verify(args.user)
+            for key, expected, actual in mismatches:
+                print(f"{key}: expected total={expected[0]} count={expected[1]}, found total={actual[0]} count={actual[1]}")
+            print(f"{len(mismatches)} mismatched rollup rows")
+            return 1 if mismatches else 0
+        count = rollups.rebuild(args.user)
+        db.session.commit()
+        print(f"Rebuilt {count} rollup rows")
+        return 0
+
+
+if __name__ == "__main__":
+    from app import create_app
+    app = create_app()
+    sys.exit(main(app))
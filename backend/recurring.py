@@ -0,0 +1,195 @@
+"""Recurring transaction rules and the scheduler that materializes them.
+
+A :class:`~models.RecurringRule` repeats a transaction every ``interval``
+days, weeks, months or years from its ``start_date`` until an optional
+``end_date``; monthly rules fall on ``day_of_month`` and yearly ones on the
+start date's day, clamped to the length of short months. ``next_date`` is
+the first occurrence not yet materialized.
+
+:func:`materialize` turns every occurrence due by a given day into a
+transaction for all users in one pass. Due rules are read in id order,
+CHUNK_SIZE at a time, and each chunk commits one bulk INSERT (sent in
+SQLAlchemy's 1000-row pages) together with its rollup deltas, the rules'
+new ``next_date`` and the owners' data version bumps, so a crash loses at
+most the chunk in progress and the next run redoes it. A run is chunked
+rather than inserted at once because one statement cannot bind a large
+run's parameters (SQLite allows 32766 per statement, PostgreSQL 65535),
+and one transaction over every due rule would hold SQLite's write lock
+and every pending row in memory for the whole pass. Materialized rows
+carry their ``rule_id`` and (rule_id, date) is unique: the insert skips
+occurrences that already exist and only rows actually inserted reach the
+rollups, so reruns and concurrent schedulers never double-insert.
+
+Run it from cron with ``python run_recurring.py``, or in-process by setting
+RECURRING_INTERVAL_SECONDS (:func:`init_scheduler`).
+"""
+import os
+import threading
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, RecurringRule, Transaction
+from money import cents
+import rollups
+import search
+import versioning
+
+EXTENSION_KEY = "recurring"
+FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+CHUNK_SIZE = 5000
+# A rule further behind than this catches up over several runs.
+MAX_OCCURRENCES_PER_RUN = 400
+_INSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+_MATERIALIZED = ("user_id", "date", "type", "category", "amount", "currency")
+
+
+def _add_months(d, months, day):
+    index = d.year * 12 + d.month - 1 + months
+    year, month = index // 12, index % 12 + 1
+    return date(year, month, min(day, monthrange(year, month)[1]))
+
+
+def following(rule, d):
+    """Return the occurrence of ``rule`` after the one on ``d``."""
+    if rule.frequency == "daily":
+        return d + timedelta(days=rule.interval)
+    if rule.frequency == "weekly":
+        return d + timedelta(weeks=rule.interval)
+    if rule.frequency == "monthly":
+        return _add_months(d, rule.interval, rule.day_of_month or rule.start_date.day)
+    return _add_months(d, 12 * rule.interval, rule.start_date.day)
+
+
+def first_occurrence(rule):
+    """Return the rule's first occurrence on or after its start date, or None if it ends before then."""
+    first = rule.start_date
+    if rule.frequency == "monthly" and rule.day_of_month:
+        first = _add_months(first, 0, rule.day_of_month)
+        if first < rule.start_date:
+            first = _add_months(first, 1, rule.day_of_month)
+    return None if rule.end_date is not None and first > rule.end_date else first
+
+
+def _occurrences(rule, today):
+    """Return (dates due by ``today``, the next date left to materialize)."""
+    due, d = [], rule.next_date
+    while d is not None and d <= today and len(due) < MAX_OCCURRENCES_PER_RUN:
+        due.append(d)
+        d = following(rule, d)
+        if rule.end_date is not None and d > rule.end_date:
+            d = None
+    return due, d
+
+
+def _insert(rows):
+    """Insert occurrence rows, skipping (rule_id, date) pairs that exist; return the inserted rows."""
+    table = Transaction.__table__
+    insert = _INSERT_DIALECTS.get(db.engine.dialect.name)
+    if insert is not None:
+        stmt = insert(table).on_conflict_do_nothing(index_elements=["rule_id", "date"])
+        # Keyed like the model; raw amount_cents spares rollups re-parsing every amount.
+        returning = stmt.returning(*(table.c[k].label(k) for k in _MATERIALIZED), cents(table.c.amount).label("amount_cents"))
+        return [row._asdict() for row in db.session.execute(returning, rows)]
+    key = tuple_(table.c.rule_id, table.c.date)
+    existing = set(db.session.execute(select(key).where(key.in_([(r["rule_id"], r["date"]) for r in rows]))).all())
+    rows = [r for r in rows if (r["rule_id"], r["date"]) not in existing]
+    if rows:
+        db.session.execute(table.insert(), rows)
+    return rows
+
+
+def _materialize_chunk(rules, today):
+    occurrences, advanced = [], defaultdict(list)
+    for rule in rules:
+        due, next_date = _occurrences(rule, today)
+        occurrences.extend(
+            {
+                "rule_id": rule.id, "user_id": rule.user_id, "amount": rule.amount, "currency": rule.currency,
+                "category": rule.category, "description": rule.description, "date": d, "type": rule.type,
+            }
+            for d in due
+        )
+        advanced[next_date].append(rule.id)
+    inserted = []
+    if occurrences:
+        with search.deferred_indexing():
+            inserted = _insert(occurrences)
+        rollups.record_many(inserted)
+    # Rules on the same schedule share their next date: one UPDATE per date, not per rule.
+    table = RecurringRule.__table__
+    for next_date, rule_ids in advanced.items():
+        db.session.execute(table.update().where(table.c.id.in_(rule_ids)).values(next_date=next_date))
+    if inserted:
+        versioning.bump_many({row["user_id"] for row in inserted})
+    return len(inserted)
+
+
+def materialize(today=None, user_id=None, chunk_size=CHUNK_SIZE):
+    """Materialize occurrences due on or before ``today``; return (rules, transactions). Commits per chunk."""
+    today = today or date.today()
+    table = RecurringRule.__table__
+    processed, inserted, last_id = 0, 0, 0
+    while True:
+        query = select(table).where(table.c.next_date <= today, table.c.id > last_id)
+        if user_id is not None:
+            query = query.where(table.c.user_id == user_id)
+        rules = db.session.execute(query.order_by(table.c.id).limit(chunk_size)).all()
+        if not rules:
+            break
+        inserted += _materialize_chunk(rules, today)
+        db.session.commit()
+        processed += len(rules)
+        last_id = rules[-1].id
+    return processed, inserted
+
+
+# ── Background thread ────────────────────────────────────────────────
+
+class Scheduler:
+    """Daemon thread running :func:`materialize` every ``interval`` seconds."""
+
+    def __init__(self, app, interval):
+        self.app = app
+        self.interval = interval
+        self.runs = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="recurring-scheduler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self.app.app_context():
+                try:
+                    rules, inserted = materialize()
+                    if inserted:
+                        self.app.logger.info("Materialized %d recurring transactions from %d rules", inserted, rules)
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception("Recurring transaction run failed")
+            self.runs += 1
+            self._stop.wait(self.interval)
+
+
+def init_scheduler(app):
+    """Start the in-process scheduler when RECURRING_INTERVAL_SECONDS is set (off by default).
+
+    Every worker that enables it runs its own thread; that is safe, since
+    runs are idempotent, but one worker (or cron) is enough.
+    """
+    interval = float(app.config.get("RECURRING_INTERVAL_SECONDS", os.environ.get("RECURRING_INTERVAL_SECONDS", 0)))
+    if interval <= 0:
+        return None
+    scheduler = Scheduler(app, interval)
+    app.extensions[EXTENSION_KEY] = scheduler
+    scheduler.start()
+    return scheduler
@@ -0,0 +1,142 @@
+"""Incrementally maintained per-user monthly rollups of transactions.
+
+``monthly_rollups`` holds one row per (user_id, month, type, category) with
+the sum and count of the matching transactions, in the user's base
+currency (converted per transaction by fx.py). Write paths call
+:func:`record` inside the same database transaction as the insert/delete,
+so readers can aggregate O(months x categories) rows instead of scanning
+raw transactions; the same deltas drive budget alerts (alerts.py).
+:func:`rebuild` and :func:`verify` recompute the table from scratch for
+backfills and consistency checks.
+"""
+from collections import defaultdict
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Transaction, MonthlyRollup, User
+from money import cents, from_cents
+import alerts
+import fx
+
+KEY_COLUMNS = ("user_id", "month", "type", "category")
+TRANSACTION_FIELDS = ("user_id", "date", "type", "category", "amount", "currency")
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def month_key(d):
+    """Return "YYYY-MM" for a date or an ISO date string."""
+    return (d if isinstance(d, str) else d.isoformat())[:7]
+
+
+def _apply(deltas):
+    """Add {(user_id, month, type, category): (total, count)} deltas to the rollup table."""
+    if not deltas:
+        return
+    table = MonthlyRollup.__table__
+    rows = [
+        {"user_id": k[0], "month": k[1], "type": k[2], "category": k[3], "total": total, "count": count}
+        for k, (total, count) in deltas.items()
+    ]
+    insert = _UPSERT_DIALECTS.get(db.engine.dialect.name)
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={"total": table.c.total + stmt.excluded.total, "count": table.c.count + stmt.excluded.count},
+        )
+        db.session.execute(stmt, rows)
+    else:
+        for row in rows:
+            updated = db.session.execute(
+                table.update()
+                .where(*(table.c[k] == row[k] for k in KEY_COLUMNS))
+                .values(total=table.c.total + row["total"], count=table.c.count + row["count"])
+            ).rowcount
+            if not updated:
+                db.session.execute(table.insert(), row)
+    if any(count < 0 for _, count in deltas.values()):
+        user_ids = {k[0] for k in deltas}
+        db.session.execute(table.delete().where(table.c.user_id.in_(user_ids), table.c.count <= 0))
+
+
+def record(txn, sign=1):
+    """Apply one transaction to the rollups; use ``sign=-1`` before deleting it."""
+    record_many([txn], sign)
+
+
+def record_many(rows, sign=1):
+    """Apply an iterable of transaction-like mappings or objects in one upsert batch."""
+    rows = [row if isinstance(row, dict) else {k: getattr(row, k) for k in TRANSACTION_FIELDS} for row in rows]
+    deltas = defaultdict(lambda: [0, 0])
+    for row, amount in zip(rows, fx.base_cents(rows).tolist()):
+        delta = deltas[(row["user_id"], month_key(row["date"]), row["type"], row["category"])]
+        delta[0] += sign * amount
+        delta[1] += sign
+    _apply({k: (from_cents(total), count) for k, (total, count) in deltas.items()})
+    alerts.evaluate(deltas)
+
+
+def _grouped_transactions(user_id=None):
+    """Return {key: (total, count)}: SQL sums amounts already in the base currency, the rest are converted here."""
+    year = db.func.extract("year", Transaction.date)
+    month = db.func.extract("month", Transaction.date)
+    query = db.session.query(
+        Transaction.user_id, year, month, Transaction.type, Transaction.category,
+        cents(db.func.sum(Transaction.amount)), db.func.count(Transaction.id),
+    ).join(User, User.id == Transaction.user_id).filter(Transaction.currency == User.base_currency)
+    foreign = db.session.query(
+        Transaction.user_id, Transaction.date, Transaction.type, Transaction.category,
+        cents(Transaction.amount), Transaction.currency, User.base_currency,
+    ).join(User, User.id == Transaction.user_id).filter(Transaction.currency != User.base_currency)
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+        foreign = foreign.filter(Transaction.user_id == user_id)
+    totals = {}
+    for uid, y, m, t, c, total, count in query.group_by(Transaction.user_id, year, month, Transaction.type, Transaction.category):
+        totals[(uid, f"{int(y):04d}-{int(m):02d}", t, c)] = [total, count]
+    foreign = foreign.all()
+    if foreign:
+        uids, dates, types, categories, amounts, sources, targets = zip(*foreign)
+        converted = fx.rates().convert(amounts, sources, fx.to_days(dates), targets)
+        for uid, d, t, c, amount in zip(uids, dates, types, categories, converted.tolist()):
+            entry = totals.setdefault((uid, month_key(d), t, c), [0, 0])
+            entry[0] += amount
+            entry[1] += 1
+    return {key: (from_cents(total), count) for key, (total, count) in totals.items()}
+
+
+def rebuild(user_id=None):
+    """Recompute rollups from the transactions table. Caller commits."""
+    delete = MonthlyRollup.__table__.delete()
+    if user_id is not None:
+        delete = delete.where(MonthlyRollup.user_id == user_id)
+    db.session.execute(delete)
+    expected = _grouped_transactions(user_id)
+    _apply(expected)
+    return len(expected)
+
+
+def verify(user_id=None):
+    """Return a list of (key, expected, actual) tuples where the rollups disagree with transactions.
+
+    Amounts are integer cents, so totals must match exactly.
+    """
+    expected = _grouped_transactions(user_id)
+    query = MonthlyRollup.query
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    actual = {(r.user_id, r.month, r.type, r.category): (r.total, r.count) for r in query}
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        exp = expected.get(key, (0, 0))
+        act = actual.get(key, (0, 0))
+        if exp != act:
+            mismatches.append((key, exp, act))
+    return mismatches
+
+
+def ensure_populated():
+    """Backfill the rollups once for databases created before the table existed."""
+    if MonthlyRollup.query.first() is None and Transaction.query.first() is not None:
+        rebuild()
+        db.session.commit()
@@ -0,0 +1,148 @@
+"""Full-text search over transaction descriptions and categories.
+
+SQLite uses an external-content FTS5 table (``transactions_fts``) kept in
+sync with ``transactions`` by triggers. It also indexes ``user_id``, and a
+search for one user ANDs a ``user_id`` term into the MATCH, so FTS5
+intersects the token lists itself and only ever returns that user's rows; PostgreSQL uses a GIN expression
+index over ``to_tsvector('simple', description || ' ' || category)``, which
+the database maintains itself. Both are created alongside the transactions
+table (and by migrations 2 and 9 for existing databases). Other dialects fall back
+to a LIKE scan.
+
+User input is split into word tokens and every token must match as a
+prefix, so "gro din" finds "Groceries" and "Restaurant dinner" rows.
+"""
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import DDL, column, event, literal_column, or_, select, table
+
+from models import db, Transaction
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5("
+    "description, category, user_id, content='transactions', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN "
+    "INSERT INTO transactions_fts(rowid, description, category, user_id) "
+    "VALUES (new.id, new.description, new.category, new.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description, category, user_id) "
+    "VALUES ('delete', old.id, old.description, old.category, old.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF description, category, user_id ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description, category, user_id) "
+    "VALUES ('delete', old.id, old.description, old.category, old.user_id); "
+    "INSERT INTO transactions_fts(rowid, description, category, user_id) "
+    "VALUES (new.id, new.description, new.category, new.user_id); END",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS transactions_fts_ai",
+    "DROP TRIGGER IF EXISTS transactions_fts_ad",
+    "DROP TRIGGER IF EXISTS transactions_fts_au",
+    "DROP TABLE IF EXISTS transactions_fts",
+]
+SQLITE_REBUILD = "INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')"
+
+fts_table = table("transactions_fts", column("rowid"), column("rank"))
+
+PG_DOCUMENT = "to_tsvector('simple', coalesce(transactions.description, '') || ' ' || transactions.category)"
+PG_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_transactions_search ON transactions USING gin "
+    "(to_tsvector('simple', coalesce(description, '') || ' ' || category))",
+]
+
+for _statement in SQLITE_DDL:
+    event.listen(Transaction.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(Transaction.__table__, "before_drop", DDL("DROP TABLE IF EXISTS transactions_fts").execute_if(dialect="sqlite"))
+for _statement in PG_DDL:
+    event.listen(Transaction.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+
+def install(conn):
+    """Create the search index for an existing transactions table and backfill it."""
+    if conn.dialect.name == "sqlite":
+        for statement in SQLITE_DDL:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(SQLITE_REBUILD)
+    elif conn.dialect.name == "postgresql":
+        for statement in PG_DDL:
+            conn.exec_driver_sql(statement)
+
+
+def scope_by_user(conn):
+    """Recreate the SQLite index with its ``user_id`` column; PostgreSQL filters through the table itself."""
+    if conn.dialect.name == "sqlite":
+        for statement in SQLITE_DROP:
+            conn.exec_driver_sql(statement)
+        install(conn)
+
+
+@contextmanager
+def deferred_indexing():
+    """Index rows inserted inside the block in one pass instead of per row.
+
+    On SQLite the per-row FTS insert trigger is dropped for the duration of
+    the block and the new rows are indexed with a single INSERT ... SELECT
+    before it is recreated. DDL is transactional in SQLite, so a rollback
+    restores the trigger. Other dialects need no special handling.
+    """
+    if db.engine.dialect.name != "sqlite":
+        yield
+        return
+    conn = db.session.connection()
+    # pysqlite only opens a transaction implicitly before DML, so the DROP
+    # TRIGGER would autocommit unless one is already open.
+    if not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN")
+    last_id = conn.exec_driver_sql("SELECT coalesce(max(id), 0) FROM transactions").scalar()
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS transactions_fts_ai")
+    yield
+    conn.exec_driver_sql(
+        "INSERT INTO transactions_fts(rowid, description, category, user_id) "
+        "SELECT id, description, category, user_id FROM transactions WHERE id > ?", (last_id,)
+    )
+    conn.exec_driver_sql(SQLITE_DDL[1])
+
+
+def tokenize(text):
+    return re.findall(r"\w+", text or "", re.UNICODE)
+
+
+def fts_query(tokens, user_id=None):
+    """The FTS5 MATCH expression: every token as a prefix of the text columns, within ``user_id``'s rows."""
+    expression = "{description category}: (" + " ".join(f'"{token}"*' for token in tokens) + ")"
+    if user_id is None:
+        return expression
+    return f"user_id: {int(user_id)} AND {expression}"
+
+
+def apply_search(query, text, rank=False, user_id=None):
+    """Restrict a Transaction query to rows matching ``text``; optionally order by relevance.
+
+    Pass the ``user_id`` the query is already filtered on so the SQLite
+    index only returns that user's matches.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return query
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        match = literal_column("transactions_fts").op("MATCH")(fts_query(tokens, user_id))
+        if rank:
+            # Drive the join from the FTS result set so bm25 rank is available.
+            matches = select(fts_table.c.rowid, fts_table.c.rank).where(match).subquery()
+            return query.join(matches, matches.c.rowid == Transaction.id).order_by(matches.c.rank)
+        # Otherwise the match list is materialised once and probed while
+        # walking the user's rows through the (user_id, ...) indexes.
+        return query.filter(Transaction.id.in_(select(fts_table.c.rowid).where(match)))
+    if dialect == "postgresql":
+        document = literal_column(PG_DOCUMENT)
+        tsquery = db.func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+        query = query.filter(document.op("@@")(tsquery))
+        if rank:
+            query = query.order_by(db.func.ts_rank(document, tsquery).desc())
+        return query
+    for token in tokens:
+        pattern = f"%{token}%"
+        query = query.filter(or_(Transaction.description.ilike(pattern), Transaction.category.ilike(pattern)))
+    return query
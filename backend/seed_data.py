@@ -2,6 +2,7 @@ import random
 from datetime import date, timedelta
 from models import db, User, Transaction, Budget
 from auth import hash_password
+import rollups
 
 CATEGORIES = {
     "income": ["Salary", "Freelance", "Investments", "Rental Income", "Side Hustle"],
@@ -86,6 +87,8 @@ def seed(app):
         # Generate transactions
         transactions = generate_transactions(user.id, months=6)
         db.session.add_all(transactions)
+        db.session.flush()
+        rollups.rebuild(user.id)
         db.session.commit()
 
         # Create budgets for current month
@@ -0,0 +1,120 @@
+"""JSON encoding for API responses and row serialization for transaction lists.
+
+:class:`FastJSONProvider` replaces Flask's JSON provider, so every
+``jsonify`` encodes with orjson when it is installed (falling back to the
+standard library otherwise) and writes the response body as bytes directly.
+Dates and datetimes are encoded natively as ISO 8601 by both backends, so
+rows can carry ``date`` objects instead of calling ``isoformat()`` per row.
+
+Transaction lists select :data:`TRANSACTION_COLUMNS` as plain tuples rather
+than ORM objects, skipping instance construction and the identity map, and
+turn them into the same payload ``Transaction.to_dict()`` produces. With
+``?format=columns`` lists are sent column-wise instead, one array per field
+(``{"id": [...], "amount": [...], ...}``), which chart code can hand to a
+dataset as is and which repeats no keys.
+"""
+import json
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+from models import Transaction
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson installed
+    orjson = None
+
+TRANSACTION_FIELDS = ("id", "user_id", "amount", "currency", "category", "description", "date", "type", "goal_id")
+TRANSACTION_COLUMNS = tuple(getattr(Transaction, field) for field in TRANSACTION_FIELDS)
+_AMOUNT = TRANSACTION_FIELDS.index("amount")
+FORMATS = ("rows", "columns")
+
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding with orjson when available."""
+
+    default = staticmethod(_default)
+
+    def _options(self, sort_keys, indent):
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or set(kwargs) - {"sort_keys", "indent"}:
+            kwargs.setdefault("default", self.default)
+            kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+            kwargs.setdefault("sort_keys", self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        option = self._options(kwargs.get("sort_keys", self.sort_keys), kwargs.get("indent"))
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._options(self.sort_keys, pretty))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def init_json(app):
+    app.json = FastJSONProvider(app)
+    return app.json
+
+
+# ── Transaction rows ─────────────────────────────────────────────────
+
+def transaction_rows(query):
+    """Select ``query``'s transactions as TRANSACTION_COLUMNS tuples (filters and order are kept)."""
+    return query.with_entities(*TRANSACTION_COLUMNS)
+
+
+def transaction_dicts(rows):
+    """The ``Transaction.to_dict()`` payload of each tuple, with dates left for the encoder."""
+    result = []
+    for row in rows:
+        item = dict(zip(TRANSACTION_FIELDS, row))
+        item["amount"] = float(row[_AMOUNT])
+        result.append(item)
+    return result
+
+
+def transaction_columns(rows):
+    """The same payload, one list per field."""
+    columns = dict(zip(TRANSACTION_FIELDS, map(list, zip(*rows)))) if rows else {field: [] for field in TRANSACTION_FIELDS}
+    columns["amount"] = [float(amount) for amount in columns["amount"]]
+    return columns
+
+
+def serialize_transactions(rows, fmt="rows"):
+    return transaction_columns(rows) if fmt == "columns" else transaction_dicts(rows)
+
+
+def to_columns(records, fields=None):
+    """Turn a list of same-shaped dicts into a dict of lists."""
+    fields = fields or (list(records[0]) if records else [])
+    return {field: [record[field] for record in records] for field in fields}
+
+
+def response_format(args):
+    """The ``format`` query parameter; raises ValueError for unknown formats."""
+    fmt = args.get("format", "rows")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    return fmt
@@ -1,22 +1,77 @@
 import sys
 import os
+import asyncio
 import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
 
 # Add backend directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from app import create_app
+from asgi import ASGIAdapter
 from models import db as _db
 
 
+def pytest_addoption(parser):
+    parser.addoption("--asgi", action="store_true", help="route test client requests through the ASGI adapter")
+
+
+def _through_asgi(adapter):
+    """Wrap an ASGI app as a WSGI callable so the Flask test client exercises it end to end."""
+    def wsgi_app(environ, start_response):
+        headers = [
+            (key[5:].replace("_", "-").lower().encode("latin-1"), value.encode("latin-1"))
+            for key, value in environ.items() if key.startswith("HTTP_")
+        ]
+        for key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            if environ.get(key):
+                headers.append((key.replace("_", "-").lower().encode("latin-1"), environ[key].encode("latin-1")))
+        scope = {
+            "type": "http",
+            "http_version": environ["SERVER_PROTOCOL"].split("/")[1],
+            "method": environ["REQUEST_METHOD"],
+            "scheme": environ["wsgi.url_scheme"],
+            "path": environ["PATH_INFO"].encode("latin-1").decode("utf-8"),
+            "query_string": environ["QUERY_STRING"].encode("latin-1"),
+            "root_path": environ.get("SCRIPT_NAME", ""),
+            "headers": headers,
+            "server": (environ["SERVER_NAME"], int(environ["SERVER_PORT"])),
+        }
+        stream = environ["wsgi.input"]
+
+        async def receive():
+            chunk = stream.read(64 * 1024)
+            return {"type": "http.request", "body": chunk, "more_body": bool(chunk)}
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(adapter(scope, receive, send))
+        start = messages[0]
+        start_response(
+            str(start["status"]),
+            [(k.decode("latin-1"), v.decode("latin-1")) for k, v in start["headers"]],
+        )
+        return [m["body"] for m in messages[1:] if m["body"]]
+    return wsgi_app
+
+
 @pytest.fixture(scope="function")
-def app():
+def app(request):
     """Create application for testing."""
     app = create_app({
         "TESTING": True,
         "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
         "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        # Minimum bcrypt cost, hashed inline: keeps the suite fast.
+        "BCRYPT_ROUNDS": 4,
+        "PASSWORD_HASH_WORKERS": 0,
     })
+    if request.config.getoption("--asgi"):
+        app.wsgi_app = _through_asgi(ASGIAdapter(app.wsgi_app, threads=4))
     with app.app_context():
         _db.create_all()
         yield app
@@ -44,3 +99,37 @@ def second_auth_header(client):
     resp = client.post("/api/signup", json={"username": "testuser2", "password": "testpass456"})
     token = resp.get_json()["token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="function")
+def create_transaction(client):
+    """Return a function posting a transaction (a 50.00 Food expense on 2025-01-15 unless overridden)."""
+    def create(auth_header, **overrides):
+        data = {
+            "amount": 50.00,
+            "category": "Food",
+            "description": "Lunch",
+            "date": "2025-01-15",
+            "type": "expense",
+        }
+        data.update(overrides)
+        return client.post("/api/transactions", json=data, headers=auth_header)
+    return create
+
+
+@pytest.fixture(scope="function")
+def count_queries(app):
+    """Return a context manager that records SQL statements executed inside it."""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(_db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(_db.engine, "before_cursor_execute", before_cursor_execute)
+    return counter
@@ -0,0 +1,167 @@
+import threading
+import time
+from datetime import date
+
+import pytest
+
+import alerts
+import rollups
+from models import db, BudgetAlert
+
+
+def _create_budget(client, auth_header, **overrides):
+    data = {"category": "Food", "limit_amount": 100, "month": "2025-01"}
+    data.update(overrides)
+    return client.post("/api/budgets", json=data, headers=auth_header)
+
+
+def _spend(client, auth_header, amount, category="Food", date="2025-01-15"):
+    return client.post("/api/transactions", json={
+        "amount": amount, "category": category, "date": date, "type": "expense",
+    }, headers=auth_header)
+
+
+def _alerts(client, auth_header, query=""):
+    return client.get(f"/api/alerts{query}", headers=auth_header).get_json()
+
+
+class TestThresholdCrossing:
+    def test_alerts_once_per_threshold(self, client, auth_header):
+        _create_budget(client, auth_header)
+        _spend(client, auth_header, 50)
+        assert _alerts(client, auth_header)["alerts"] == []
+        _spend(client, auth_header, 30)
+        _spend(client, auth_header, 5)
+        [warning] = _alerts(client, auth_header)["alerts"]
+        assert (warning["threshold"], warning["status"], warning["spent"], warning["limit_amount"]) == (80, "warning", 80, 100)
+        _spend(client, auth_header, 100)
+        body = _alerts(client, auth_header, f"?after={warning['id']}")
+        [exceeded] = body["alerts"]
+        assert (exceeded["threshold"], exceeded["status"], exceeded["spent"]) == (100, "exceeded", 185)
+        assert body["cursor"] == exceeded["id"]
+
+    def test_one_write_can_cross_several(self, client, auth_header):
+        _create_budget(client, auth_header, alert_thresholds=[50, 90, 100])
+        _spend(client, auth_header, 95)
+        assert [a["threshold"] for a in _alerts(client, auth_header)["alerts"]] == [50, 90]
+
+    def test_only_matching_budget(self, client, auth_header, second_auth_header):
+        _create_budget(client, auth_header)
+        _create_budget(client, second_auth_header)
+        _spend(client, auth_header, 90, category="Rent")
+        _spend(client, auth_header, 90, date="2025-02-01")
+        _spend(client, second_auth_header, 90)
+        assert _alerts(client, auth_header)["alerts"] == []
+        assert len(_alerts(client, second_auth_header)["alerts"]) == 1
+
+    def test_delete_and_readd_crosses_again(self, client, auth_header):
+        _create_budget(client, auth_header)
+        txn_id = _spend(client, auth_header, 90).get_json()["transaction"]["id"]
+        client.delete(f"/api/transactions/{txn_id}", headers=auth_header)
+        _spend(client, auth_header, 90)
+        assert [a["threshold"] for a in _alerts(client, auth_header)["alerts"]] == [80, 80]
+
+    def test_bulk_import(self, client, auth_header):
+        _create_budget(client, auth_header)
+        client.post("/api/transactions/import", json=[
+            {"amount": 20, "category": "Food", "date": "2025-01-15", "type": "expense"},
+        ] * 6, headers=auth_header)
+        assert [a["threshold"] for a in _alerts(client, auth_header)["alerts"]] == [80, 100]
+
+    def test_rolled_back_write_raises_nothing(self, app, client, auth_header):
+        _create_budget(client, auth_header)
+        notifier = app.extensions[alerts.EXTENSION_KEY]
+        before = notifier.version(1)
+        rollups.record_many([{"user_id": 1, "date": date(2025, 1, 15), "type": "expense", "category": "Food", "amount": 90, "currency": "USD"}])
+        assert BudgetAlert.query.count() == 1
+        db.session.rollback()
+        db.session.commit()
+        assert BudgetAlert.query.count() == 0
+        assert notifier.version(1) == before
+
+
+class TestBudgetChanges:
+    def test_new_budget_already_over(self, client, auth_header):
+        _spend(client, auth_header, 90)
+        _create_budget(client, auth_header)
+        assert [a["threshold"] for a in _alerts(client, auth_header)["alerts"]] == [80]
+
+    def test_lower_limit(self, client, auth_header):
+        budget = _create_budget(client, auth_header, limit_amount=200).get_json()["budget"]
+        _spend(client, auth_header, 90)
+        client.put(f"/api/budgets/{budget['id']}", json={"limit_amount": 100}, headers=auth_header)
+        client.put(f"/api/budgets/{budget['id']}", json={"limit_amount": 95}, headers=auth_header)
+        assert [a["threshold"] for a in _alerts(client, auth_header)["alerts"]] == [80]
+
+    def test_thresholds_round_trip(self, client, auth_header):
+        budget = _create_budget(client, auth_header).get_json()["budget"]
+        assert budget["alert_thresholds"] == [80, 100]
+        resp = client.put(f"/api/budgets/{budget['id']}", json={"alert_thresholds": [100, 50, 50]}, headers=auth_header)
+        assert resp.get_json()["budget"]["alert_thresholds"] == [50, 100]
+
+    @pytest.mark.parametrize("thresholds", [[], [0], [1001], ["80"], 80, [True]])
+    def test_rejects_invalid_thresholds(self, client, auth_header, thresholds):
+        assert _create_budget(client, auth_header, alert_thresholds=thresholds).status_code == 400
+
+
+class TestLongPoll:
+    def test_wait_times_out_empty(self, client, auth_header):
+        start = time.monotonic()
+        body = _alerts(client, auth_header, "?after=0&wait=0.2")
+        assert body == {"alerts": [], "cursor": 0}
+        assert time.monotonic() - start >= 0.2
+
+    def test_returns_immediately_when_alerts_exist(self, client, auth_header):
+        _create_budget(client, auth_header)
+        _spend(client, auth_header, 90)
+        start = time.monotonic()
+        assert len(_alerts(client, auth_header, "?wait=5")["alerts"]) == 1
+        assert time.monotonic() - start < 1
+
+    def test_waiters_are_capped(self, app, client, auth_header):
+        notifier = app.extensions["alerts"]
+        notifier.max_waiters = 1
+        with notifier.waiting():
+            start = time.monotonic()
+            resp = client.get("/api/alerts?wait=5", headers=auth_header)
+            assert (resp.status_code, resp.headers["Retry-After"]) == (204, "1")
+            assert time.monotonic() - start < 1
+            assert client.get("/api/alerts", headers=auth_header).status_code == 200
+            # Alerts already there are returned without needing a slot.
+            _create_budget(client, auth_header)
+            _spend(client, auth_header, 90)
+            assert len(_alerts(client, auth_header, "?wait=5")["alerts"]) == 1
+        assert notifier.waiters == 0
+        assert notifier.refused == 1
+
+    @pytest.mark.parametrize("query", ["?wait=31", "?wait=-1", "?after=x", "?wait=soon"])
+    def test_rejects_bad_arguments(self, client, auth_header, query):
+        assert client.get(f"/api/alerts{query}", headers=auth_header).status_code == 400
+
+    def test_requires_auth(self, client):
+        assert client.get("/api/alerts").status_code == 401
+
+
+class TestNotifier:
+    def test_commit_wakes_waiter(self):
+        notifier = alerts.AlertNotifier()
+        seen = notifier.version(1)
+        woken = []
+        waiter = threading.Thread(target=lambda: woken.append(notifier.wait(1, seen, 5)))
+        waiter.start()
+        time.sleep(0.05)
+        start = time.monotonic()
+        notifier.notify({2})
+        notifier.notify({1})
+        waiter.join(5)
+        assert woken == [True]
+        assert time.monotonic() - start < 1
+
+    def test_notified_on_commit_only(self, app, client, auth_header):
+        notifier = app.extensions[alerts.EXTENSION_KEY]
+        _create_budget(client, auth_header)
+        before = notifier.version(1)
+        _spend(client, auth_header, 90)
+        assert notifier.version(1) == before + 1
+        _spend(client, auth_header, 1, category="Rent")
+        assert notifier.version(1) == before + 1
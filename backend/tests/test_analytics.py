@@ -0,0 +1,220 @@
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+
+import pytest
+
+import analytics
+import versioning
+from models import db, User
+
+
+def _random_columns(n=2000, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        category = rng.choice(["Food", "Rent", "Fun", "Salary"])
+        rows.append((
+            i + 1,
+            date(2024, 1, 1) + timedelta(days=rng.randint(0, 500)),
+            rng.randint(100, 30000),  # cents
+            "income" if category == "Salary" else "expense",
+            category,
+            rng.choice(["Shop A", "Shop B", "Cafe", ""]),
+        ))
+    columns = analytics.UserColumns()
+    columns.append(rows)
+    return columns, rows
+
+
+def _store(app):
+    return app.extensions[analytics.EXTENSION_KEY]
+
+
+class TestColumns:
+    def test_append_grows_and_encodes(self):
+        columns, rows = _random_columns(300)
+        assert len(columns) == 300
+        assert list(columns["id"]) == [r[0] for r in rows]
+        assert columns.dictionaries["type"].values[columns["type"][0]] == rows[0][3]
+        assert analytics.from_day(columns["day"][5]) == rows[5][1]
+        assert columns["day"].dtype.itemsize == 4
+
+    def test_remove_keeps_earlier_views(self):
+        columns, _ = _random_columns(10)
+        before = columns.view()
+        columns.remove([2, 5])
+        columns.append([(99, date(2025, 1, 1), 100, "expense", "New", "")])
+        assert sorted(columns["id"]) == [1, 3, 4, 6, 7, 8, 9, 10, 99]
+        assert list(before["id"]) == list(range(1, 11))
+
+    def test_memory_per_row(self):
+        columns, _ = _random_columns(1000)
+        assert columns.nbytes <= 1024 * 30 * 2
+
+    def test_more_categories_than_int16(self):
+        columns = analytics.UserColumns()
+        columns.append([(i, date(2025, 1, 1), 100, "expense", f"C{i}", "") for i in range(1, 40001)])
+        last = columns.dictionaries["category"].values[columns["category"][-1]]
+        assert last == "C40000"
+        result = analytics.run_query(columns.view(), group_by=["category"], categories=["C40000"])
+        assert [(r["category"], r["count"]) for r in result] == [("C40000", 1)]
+
+
+class TestRunQuery:
+    def test_group_by_category_month_matches_python(self):
+        columns, rows = _random_columns()
+        expected = defaultdict(lambda: [0, 0])
+        for _id, d, amount, txn_type, category, _desc in rows:
+            if txn_type == "expense":
+                expected[(category, d.strftime("%Y-%m"))][0] += amount
+                expected[(category, d.strftime("%Y-%m"))][1] += 1
+        result = analytics.run_query(columns.view(), group_by=["category", "month"], types=["expense"])
+        assert {(r["category"], r["month"]): (r["sum"], r["count"]) for r in result} == {
+            k: (v[0] / 100, v[1]) for k, v in expected.items()
+        }
+
+    @pytest.mark.parametrize("dimension,label", [
+        ("weekday", lambda d: d.strftime("%A")),
+        ("day", lambda d: d.isoformat()),
+        ("week", lambda d: (d - timedelta(days=d.weekday())).isoformat()),
+        ("year", lambda d: d.year),
+    ])
+    def test_time_buckets(self, dimension, label):
+        columns, rows = _random_columns(500)
+        expected = defaultdict(int)
+        for row in rows:
+            expected[label(row[1])] += 1
+        result = analytics.run_query(columns.view(), group_by=[dimension], metrics=["count"])
+        assert {r[dimension]: r["count"] for r in result} == expected
+
+    def test_filters_and_min_max_mean(self):
+        columns, rows = _random_columns()
+        start, end = date(2024, 3, 1), date(2024, 6, 30)
+        picked = [r[2] for r in rows if start <= r[1] <= end and r[4] in ("Food", "Rent") and r[2] >= 2000]
+        [result] = analytics.run_query(
+            columns.view(), metrics=["count", "min", "max", "mean"],
+            start=start, end=end, categories=["Food", "Rent", "Unknown"], min_amount=20,
+        )
+        assert result == {
+            "count": len(picked), "min": min(picked) / 100, "max": max(picked) / 100,
+            "mean": round(sum(picked) / len(picked) / 100, 2),
+        }
+
+    def test_selective_and_broad_filters_agree(self):
+        columns, _ = _random_columns()
+        query = dict(group_by=["category"], metrics=["sum", "count", "max"], order="category")
+        broad = analytics.run_query(columns.view(), types=["expense"], **query)
+        narrow = analytics.run_query(columns.view(), types=["expense"], start=date(2025, 5, 1), **query)
+        everything = analytics.run_query(columns.view(), **query)
+        assert [r["category"] for r in broad] == ["Food", "Fun", "Rent"]
+        assert all(n["count"] < b["count"] for n, b in zip(narrow, broad))
+        assert len(everything) == 4
+
+    def test_order_and_limit(self):
+        columns, _ = _random_columns()
+        result = analytics.run_query(columns.view(), group_by=["description"], order="-sum", limit=2)
+        everything = analytics.run_query(columns.view(), group_by=["description"])
+        assert [r["sum"] for r in result] == sorted((r["sum"] for r in everything), reverse=True)[:2]
+
+    def test_empty(self):
+        columns = analytics.UserColumns()
+        assert analytics.run_query(columns.view(), group_by=["month"]) == []
+        assert analytics.run_query(columns.view()) == []
+
+    def test_rejects_unknown_names(self):
+        columns, _ = _random_columns(10)
+        with pytest.raises(analytics.QueryError):
+            analytics.run_query(columns.view(), group_by=["merchant"])
+        with pytest.raises(analytics.QueryError):
+            analytics.run_query(columns.view(), metrics=["median"])
+        with pytest.raises(analytics.QueryError):
+            analytics.run_query(columns.view(), order="-sum", metrics=["count"])
+
+
+class TestAnalyticsEndpoint:
+    def test_requires_auth(self, client):
+        assert client.get("/api/analytics").status_code == 401
+
+    @pytest.mark.parametrize("query", [
+        "group_by=merchant", "metrics=median", "start_date=yesterday", "limit=0",
+        "group_by=day,day", "group_by=day,week,month,year", "order=amount",
+    ])
+    def test_validation(self, client, auth_header, query):
+        assert client.get(f"/api/analytics?{query}", headers=auth_header).status_code == 400
+
+    def test_report(self, client, auth_header, create_transaction):
+        create_transaction(auth_header, amount=10, date="2025-01-06")
+        create_transaction(auth_header, amount=30, date="2025-01-07", category="Rent")
+        create_transaction(auth_header, amount=5, date="2025-02-03")
+        create_transaction(auth_header, amount=900, type="income", category="Salary", date="2025-02-03")
+        resp = client.get("/api/analytics?group_by=month,category&type=expense&order=-sum", headers=auth_header)
+        assert resp.status_code == 200
+        assert resp.get_json() == {
+            "group_by": ["month", "category"],
+            "metrics": ["sum", "count"],
+            "rows": [
+                {"month": "2025-01", "category": "Rent", "sum": 30, "count": 1},
+                {"month": "2025-01", "category": "Food", "sum": 10, "count": 1},
+                {"month": "2025-02", "category": "Food", "sum": 5, "count": 1},
+            ],
+        }
+
+    def test_users_are_isolated(self, client, auth_header, second_auth_header, create_transaction):
+        create_transaction(auth_header, amount=10)
+        create_transaction(second_auth_header, amount=99)
+        rows = client.get("/api/analytics", headers=second_auth_header).get_json()["rows"]
+        assert rows == [{"sum": 99, "count": 1}]
+
+
+class TestStoreMaintenance:
+    def _total(self, client, auth_header):
+        rows = client.get("/api/analytics", headers=auth_header).get_json()["rows"]
+        return rows[0]["sum"] if rows else 0
+
+    def test_writes_patch_loaded_columns(self, app, client, auth_header, create_transaction):
+        create_transaction(auth_header, amount=10)
+        assert self._total(client, auth_header) == 10
+        txn_id = create_transaction(auth_header, amount=5).get_json()["transaction"]["id"]
+        assert self._total(client, auth_header) == 15
+        client.delete(f"/api/transactions/{txn_id}", headers=auth_header)
+        assert self._total(client, auth_header) == 10
+        # Unrelated writes move the version on without touching the columns.
+        client.post("/api/budgets", json={"category": "Food", "limit_amount": 100, "month": "2025-01"}, headers=auth_header)
+        assert self._total(client, auth_header) == 10
+        assert _store(app).stats["loads"] == 1
+        assert _store(app).stats["patches"] == 3
+
+    def test_import_reloads(self, app, client, auth_header, create_transaction):
+        create_transaction(auth_header, amount=10)
+        assert self._total(client, auth_header) == 10
+        client.post("/api/transactions/import", json=[
+            {"amount": 1, "category": "Food", "date": "2025-01-01", "type": "expense"},
+            {"amount": 2, "category": "Food", "date": "2025-01-02", "type": "expense"},
+        ], headers=auth_header)
+        assert self._total(client, auth_header) == 13
+        assert _store(app).stats["loads"] == 2
+
+    def test_write_from_another_worker_reloads(self, app, client, auth_header, create_transaction):
+        create_transaction(auth_header, amount=10)
+        assert self._total(client, auth_header) == 10
+        # Simulate a write committed elsewhere: the version moves without this store hearing of it.
+        user_id = User.query.filter_by(username="testuser").one().id
+        db.session.execute(db.text("UPDATE transactions SET amount_cents = 2500"))
+        versioning.bump(user_id)
+        db.session.commit()
+        assert self._total(client, auth_header) == 25
+        assert _store(app).stats["loads"] == 2
+
+    def test_failed_write_leaves_columns(self, app, client, auth_header, create_transaction):
+        create_transaction(auth_header, amount=10)
+        assert self._total(client, auth_header) == 10
+        assert create_transaction(auth_header, amount="lots").status_code == 400
+        assert self._total(client, auth_header) == 10
+        assert _store(app).stats["loads"] == 1
+
+    def test_lru_bound(self, app, client, auth_header, second_auth_header):
+        _store(app).max_users = 1
+        client.get("/api/analytics", headers=auth_header)
+        client.get("/api/analytics", headers=second_auth_header)
+        assert len(_store(app)) == 1
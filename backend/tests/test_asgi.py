@@ -0,0 +1,127 @@
+import asyncio
+import io
+import json
+import os
+import time
+
+from asgi import ASGIAdapter, build_environ, create_asgi_app
+from models import db
+
+
+def _call(adapter, method, path, body_chunks=(), headers=(), query=b""):
+    return asyncio.run(_request(adapter, method, path, body_chunks, headers, query))
+
+
+async def _request(adapter, method, path, body_chunks=(), headers=(), query=b""):
+    chunks = list(body_chunks)
+    sent = []
+
+    async def receive():
+        chunk = chunks.pop(0) if chunks else b""
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "http_version": "1.1", "method": method, "scheme": "http", "path": path,
+        "query_string": query, "root_path": "", "headers": [(k.encode(), v.encode()) for k, v in headers],
+        "server": ("testserver", 80), "client": ("127.0.0.1", 5000),
+    }
+    await adapter(scope, receive, send)
+    start = sent[0]
+    return start["status"], dict((k.decode(), v.decode()) for k, v in start["headers"]), sent[1:]
+
+
+class TestASGIAdapter:
+    def test_json_round_trip(self, app):
+        adapter = ASGIAdapter(app.wsgi_app, threads=2)
+        payload = json.dumps({"username": "asgiuser", "password": "password123"}).encode()
+        # Body split across messages and sent without Content-Length.
+        status, headers, body = _call(
+            adapter, "POST", "/api/signup", [payload[:10], payload[10:]], [("content-type", "application/json")]
+        )
+        assert status == 201
+        assert headers["content-type"] == "application/json"
+        assert json.loads(b"".join(m["body"] for m in body))["user"]["username"] == "asgiuser"
+        assert body[-1]["more_body"] is False
+
+    def test_streamed_export_is_sent_in_chunks(self, app, client, auth_header, monkeypatch):
+        import app as app_module
+        monkeypatch.setattr(app_module, "EXPORT_CHUNK_BYTES", 64)
+        for i in range(20):
+            client.post("/api/transactions", json={
+                "amount": i + 1, "category": "Food", "date": "2025-01-01", "type": "expense", "description": "x" * 20,
+            }, headers=auth_header)
+        adapter = ASGIAdapter(app.wsgi_app, threads=2)
+        status, _, body = _call(adapter, "GET", "/api/transactions/export", headers=auth_header.items())
+        assert status == 200
+        assert len([m for m in body if m["body"]]) > 1
+        assert b"".join(m["body"] for m in body).count(b"\n") == 21
+
+    def test_query_string_and_empty_304(self, app, client, auth_header):
+        adapter = ASGIAdapter(app.wsgi_app, threads=2)
+        status, headers, _ = _call(adapter, "GET", "/api/budgets", headers=auth_header.items(), query=b"month=2025-01")
+        assert status == 200
+        status, _, body = _call(
+            adapter, "GET", "/api/budgets", headers=[*auth_header.items(), ("if-none-match", headers["etag"])],
+            query=b"month=2025-01",
+        )
+        assert status == 304
+        assert b"".join(m["body"] for m in body) == b""
+
+    def test_lifespan_runs_shutdown_hook(self, app):
+        calls = []
+        adapter = ASGIAdapter(app.wsgi_app, threads=1, on_shutdown=lambda: calls.append("shutdown"))
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        asyncio.run(adapter({"type": "lifespan"}, receive, send))
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        assert calls == ["shutdown"]
+
+    def test_repeated_headers_are_joined(self):
+        environ = build_environ({
+            "method": "GET", "path": "/api/me",
+            "headers": [(b"accept", b"text/csv"), (b"accept", b"application/json"), (b"content-length", b"0")],
+        }, body=io.BytesIO())
+        assert environ["HTTP_ACCEPT"] == "text/csv,application/json"
+        assert environ["CONTENT_LENGTH"] == "0"
+
+
+class TestAlertWaiters:
+    def test_long_polls_leave_threads_for_other_requests(self, tmp_path):
+        adapter = create_asgi_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp_path, 'app.db')}",
+            "BCRYPT_ROUNDS": 4,
+            "PASSWORD_HASH_WORKERS": 0,
+        }, threads=4)
+        assert adapter.flask_app.extensions["alerts"].max_waiters == 2
+        payload = json.dumps({"username": "poller", "password": "password123"}).encode()
+        _, _, body = _call(adapter, "POST", "/api/signup", [payload], [("content-type", "application/json")])
+        headers = [("authorization", f"Bearer {json.loads(b''.join(m['body'] for m in body))['token']}")]
+
+        async def scenario():
+            async def timed(*args):
+                start = time.monotonic()
+                status, _, _ = await _request(adapter, *args)
+                return status, time.monotonic() - start
+            polls = [asyncio.create_task(timed("GET", "/api/alerts", (), headers, b"wait=1")) for _ in range(5)]
+            await asyncio.sleep(0.2)
+            others = await asyncio.gather(*(timed("GET", "/api/goals", (), headers) for _ in range(4)))
+            return await asyncio.gather(*polls), others
+
+        polls, others = asyncio.run(scenario())
+        assert sorted(status for status, _ in polls) == [200, 200, 204, 204, 204]
+        assert all(seconds < 0.5 for status, seconds in polls if status == 204)
+        assert all(status == 200 and seconds < 0.5 for status, seconds in others)
+        adapter.executor.shutdown()
+        with adapter.flask_app.app_context():
+            db.engine.dispose()
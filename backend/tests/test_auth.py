@@ -1,5 +1,11 @@
+import os
+
+import jwt
 import pytest
 
+from app import create_app
+from auth import AuthState, SECRET_KEY
+
 
 class TestSignup:
     def test_signup_success(self, client):
@@ -60,3 +66,114 @@ class TestMe:
         resp = client.get("/api/me")
         assert resp.status_code == 401
         assert "Token is missing" in resp.get_json()["error"]
+
+
+class TestLogout:
+    def test_logout_revokes_token(self, client, auth_header):
+        assert client.get("/api/me", headers=auth_header).status_code == 200
+        resp = client.post("/api/logout", headers=auth_header)
+        assert resp.status_code == 200
+        resp = client.get("/api/me", headers=auth_header)
+        assert resp.status_code == 401
+
+    def test_logout_keeps_other_sessions(self, client, auth_header):
+        login = client.post("/api/login", json={"username": "testuser", "password": "testpass123"})
+        other = {"Authorization": f"Bearer {login.get_json()['token']}"}
+        client.post("/api/logout", headers=auth_header)
+        assert client.get("/api/me", headers=other).status_code == 200
+
+    def test_token_without_jti(self, app, client, auth_header):
+        # Issued before tokens carried a jti.
+        payload = jwt.decode(auth_header["Authorization"].split(" ")[1], SECRET_KEY, algorithms=["HS256"])
+        del payload["jti"]
+        legacy = {"Authorization": f"Bearer {jwt.encode(payload, SECRET_KEY, algorithm='HS256')}"}
+        assert client.get("/api/goals", headers=legacy).status_code == 200
+        assert client.post("/api/logout", headers=legacy).status_code == 200
+        assert client.get("/api/goals", headers=legacy).status_code == 401
+        # Recorded in the database under the token's digest, not just in this worker.
+        app.extensions["auth"]._revoked.clear()
+        assert client.get("/api/goals", headers=legacy).status_code == 401
+        assert client.get("/api/goals", headers=auth_header).status_code == 200
+
+    def test_revocation_elsewhere_applies_to_the_next_request(self, app, auth_header):
+        token = auth_header["Authorization"].split(" ")[1]
+        state, other = app.extensions["auth"], AuthState()
+        assert state.verify(token) is not None
+        assert state.verify(token) is not None
+        other.revoke(token, other.verify(token))
+        # Still in this state's token cache, yet rejected straight away.
+        assert len(state) == 1
+        assert state.verify(token) is None
+
+    def test_logout_reaches_other_instances(self, tmp_path):
+        config = {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp_path, 'shared.db')}",
+            "BCRYPT_ROUNDS": 4,
+            "PASSWORD_HASH_WORKERS": 0,
+        }
+        first, second = create_app(config), create_app(config)
+        signup = first.test_client().post("/api/signup", json={"username": "shared", "password": "password123"})
+        header = {"Authorization": f"Bearer {signup.get_json()['token']}"}
+        # The second instance has already verified and cached the token.
+        assert second.test_client().get("/api/me", headers=header).status_code == 200
+        assert first.test_client().post("/api/logout", headers=header).status_code == 200
+        assert second.test_client().get("/api/me", headers=header).status_code == 401
+        # A restarted instance starts with empty caches and still rejects it.
+        assert create_app(config).test_client().get("/api/me", headers=header).status_code == 401
+
+
+class TestTokenCache:
+    def test_repeat_requests_skip_decode(self, app, client, auth_header):
+        state = app.extensions["auth"]
+        client.get("/api/goals", headers=auth_header)
+        client.get("/api/goals", headers=auth_header)
+        assert state.stats["token_misses"] == 1
+        assert state.stats["token_hits"] == 1
+
+    def test_cached_payload_is_dropped_at_exp(self, app, client, auth_header):
+        state = app.extensions["auth"]
+        client.get("/api/goals", headers=auth_header)
+        next(iter(state._tokens.values()))["exp"] = 0
+        client.get("/api/goals", headers=auth_header)
+        # The stale entry was not served; the token went through a full decode again.
+        assert state.stats["token_hits"] == 0
+        assert state.stats["token_misses"] == 2
+
+    def test_cache_is_bounded(self, app, client, auth_header, second_auth_header):
+        state = app.extensions["auth"]
+        state.maxsize = 1
+        client.get("/api/goals", headers=auth_header)
+        client.get("/api/goals", headers=second_auth_header)
+        assert len(state) == 1
+
+    def test_tampered_token_rejected(self, client, auth_header):
+        resp = client.get("/api/me", headers={"Authorization": auth_header["Authorization"] + "x"})
+        assert resp.status_code == 401
+
+
+class TestUserRegistry:
+    def test_get_me_does_not_query_users(self, client, auth_header, count_queries):
+        with count_queries() as statements:
+            resp = client.get("/api/me", headers=auth_header)
+        assert resp.get_json()["user"]["username"] == "testuser"
+        assert not [s for s in statements if "password_hash" in s]
+
+    def test_deleted_user_rejected_after_forget(self, app, client, auth_header):
+        from models import db, User
+        with app.app_context():
+            user = User.query.filter_by(username="testuser").one()
+            user_id = user.id
+            db.session.delete(user)
+            db.session.commit()
+        app.extensions["auth"].forget_user(user_id)
+        assert client.get("/api/goals", headers=auth_header).status_code == 401
+
+    def test_registry_rechecks_database(self, app, client, auth_header):
+        from models import db, User
+        state = app.extensions["auth"]
+        state.recheck_seconds = 0
+        with app.app_context():
+            db.session.delete(User.query.filter_by(username="testuser").one())
+            db.session.commit()
+        assert client.get("/api/goals", headers=auth_header).status_code == 401
@@ -29,6 +29,11 @@ class TestCreateBudget:
         resp = client.post("/api/budgets", json={"category": "Food"}, headers=auth_header)
         assert resp.status_code == 400
 
+    @pytest.mark.parametrize("month", ["2025-1", "2025-13", "2025-00", "25-01", "2025-01-15", 202501])
+    def test_create_budget_invalid_month(self, client, auth_header, month):
+        resp = _create_budget(client, auth_header, month=month)
+        assert resp.status_code == 400
+
     def test_create_budget_invalid_amount(self, client, auth_header):
         resp = _create_budget(client, auth_header, limit_amount=-100)
         assert resp.status_code == 400
@@ -57,6 +62,51 @@ class TestGetBudgets:
         assert budgets[0]["spent"] == 100.0
         assert budgets[0]["status"] == "ok"
 
+    def test_get_budgets_filtered_by_month(self, client, auth_header):
+        _create_budget(client, auth_header, month="2025-01")
+        _create_budget(client, auth_header, month="2025-02")
+        resp = client.get("/api/budgets?month=2025-02", headers=auth_header)
+        assert resp.status_code == 200
+        budgets = resp.get_json()["budgets"]
+        assert [b["month"] for b in budgets] == ["2025-02"]
+
+    def test_get_budgets_invalid_month(self, client, auth_header):
+        resp = client.get("/api/budgets?month=January", headers=auth_header)
+        assert resp.status_code == 400
+
+    def test_get_budgets_unpadded_month(self, client, auth_header):
+        _create_budget(client, auth_header, month="2025-01")
+        resp = client.get("/api/budgets?month=2025-1", headers=auth_header)
+        assert resp.status_code == 400
+        assert resp.get_json()["error"] == "Invalid month format, use YYYY-MM"
+
+    def test_get_budgets_spent_ignores_other_months_and_income(self, client, auth_header):
+        _create_budget(client, auth_header, category="Food", month="2025-01", limit_amount=100)
+        for txn in [
+            {"amount": 85, "category": "Food", "date": "2025-01-31", "type": "expense"},
+            {"amount": 40, "category": "Food", "date": "2025-02-01", "type": "expense"},
+            {"amount": 500, "category": "Food", "date": "2025-01-10", "type": "income"},
+            {"amount": 30, "category": "Rent", "date": "2025-01-10", "type": "expense"},
+        ]:
+            client.post("/api/transactions", json=txn, headers=auth_header)
+        budget = client.get("/api/budgets", headers=auth_header).get_json()["budgets"][0]
+        assert budget["spent"] == 85.0
+        assert budget["status"] == "warning"
+
+    def test_get_budgets_single_query(self, client, auth_header, count_queries):
+        categories = ["Food", "Rent", "Transport", "Utilities", "Shopping", "Health"]
+        for month in range(1, 6):
+            for category in categories:
+                _create_budget(client, auth_header, category=category, month=f"2025-0{month}")
+                client.post("/api/transactions", json={
+                    "amount": 10, "category": category, "date": f"2025-0{month}-10", "type": "expense",
+                }, headers=auth_header)
+        with count_queries() as statements:
+            resp = client.get("/api/budgets", headers=auth_header)
+        assert len(resp.get_json()["budgets"]) == 30
+        # Besides the token revocation and ETag version lookups, spend comes from a single query.
+        assert len([s for s in statements if "data_version" not in s and "revoked_tokens" not in s]) == 1
+
 
 class TestUpdateBudget:
     def test_update_budget_success(self, client, auth_header):
@@ -66,6 +116,19 @@ class TestUpdateBudget:
         assert resp.status_code == 200
         assert resp.get_json()["budget"]["limit_amount"] == 750.00
 
+    def test_update_budget_conflict(self, client, auth_header):
+        _create_budget(client, auth_header, month="2025-01")
+        resp = _create_budget(client, auth_header, month="2025-02")
+        budget_id = resp.get_json()["budget"]["id"]
+        resp = client.put(f"/api/budgets/{budget_id}", json={"month": "2025-01"}, headers=auth_header)
+        assert resp.status_code == 409
+
+    def test_update_budget_invalid_month(self, client, auth_header):
+        budget_id = _create_budget(client, auth_header, month="2025-01").get_json()["budget"]["id"]
+        resp = client.put(f"/api/budgets/{budget_id}", json={"month": "2025-2"}, headers=auth_header)
+        assert resp.status_code == 400
+        assert client.get("/api/budgets", headers=auth_header).get_json()["budgets"][0]["month"] == "2025-01"
+
     def test_update_budget_not_found(self, client, auth_header):
         resp = client.put("/api/budgets/9999", json={"limit_amount": 750}, headers=auth_header)
         assert resp.status_code == 404
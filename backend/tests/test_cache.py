@@ -0,0 +1,160 @@
+import time
+from datetime import date
+from functools import partial
+
+import pytest
+
+from cache import LRUCache, RedisCache, ResponseCache, EXTENSION_KEY
+
+
+class FakeRedis:
+    """Just enough of the redis-py client for RedisCache."""
+
+    def __init__(self):
+        self.store = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+        self.expiry[key] = ex
+
+    def incr(self, key):
+        self.store[key] = int(self.store.get(key, 0)) + 1
+        return self.store[key]
+
+
+@pytest.fixture
+def create_transaction(create_transaction):
+    """Dated today unless overridden."""
+    return partial(create_transaction, date=date.today().isoformat())
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request, app):
+    backend = LRUCache() if request.param == "memory" else RedisCache(FakeRedis())
+    app.extensions[EXTENSION_KEY] = ResponseCache(backend)
+    return app.extensions[EXTENSION_KEY]
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(maxsize=2)
+        lru.set("a", b"1")
+        lru.set("b", b"2")
+        lru.get("a")
+        lru.set("c", b"3")
+        assert lru.get("b") is None
+        assert lru.get("a") == b"1"
+        assert len(lru) == 2
+
+    def test_entries_expire(self):
+        lru = LRUCache(ttl=0.01)
+        lru.set("a", b"1")
+        time.sleep(0.02)
+        assert lru.get("a") is None
+
+    def test_counters_survive_eviction(self):
+        lru = LRUCache(maxsize=1)
+        lru.incr("gen:1")
+        lru.set("a", b"1")
+        lru.set("b", b"2")
+        assert lru.counter("gen:1") == 1
+
+
+class TestRedisCache:
+    def test_sets_ttl_and_prefix(self):
+        client = FakeRedis()
+        backend = RedisCache(client, ttl=30)
+        backend.set("k", b"v")
+        assert client.expiry["findash:k"] == 30
+        assert backend.get("k") == b"v"
+        assert backend.counter("gen:1") == 0
+        backend.incr("gen:1")
+        assert backend.counter("gen:1") == 1
+
+
+class TestResponseCaching:
+    def test_repeat_dashboard_is_a_hit(self, client, auth_header, cache):
+        first = client.get("/api/dashboard", headers=auth_header)
+        second = client.get("/api/dashboard", headers=auth_header)
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.get_data() == first.get_data()
+        assert cache.stats["hits"] == 1
+        assert cache.stats["misses"] == 1
+
+    def test_budget_params_are_part_of_key(self, client, auth_header, cache):
+        client.get("/api/budgets?month=2025-01", headers=auth_header)
+        resp = client.get("/api/budgets?month=2025-02", headers=auth_header)
+        assert resp.headers["X-Cache"] == "MISS"
+
+    def test_users_do_not_share_entries(self, client, auth_header, second_auth_header, cache, create_transaction):
+        create_transaction(auth_header, type="income", amount=100)
+        client.get("/api/dashboard", headers=auth_header)
+        resp = client.get("/api/dashboard", headers=second_auth_header)
+        assert resp.headers["X-Cache"] == "MISS"
+        assert resp.get_json()["income"] == 0
+
+    def test_errors_are_not_cached(self, client, auth_header, cache):
+        client.get("/api/budgets?month=bad", headers=auth_header)
+        resp = client.get("/api/budgets?month=bad", headers=auth_header)
+        assert resp.status_code == 400
+        assert cache.stats["hits"] == 0
+
+
+class TestInvalidation:
+    def test_transaction_write_invalidates_dashboard(self, client, auth_header, cache, create_transaction):
+        client.get("/api/dashboard", headers=auth_header)
+        create_transaction(auth_header, type="income", amount=250)
+        resp = client.get("/api/dashboard", headers=auth_header)
+        assert resp.headers["X-Cache"] == "MISS"
+        assert resp.get_json()["income"] == 250
+
+    def test_transaction_delete_invalidates_budgets(self, client, auth_header, cache, create_transaction):
+        client.post("/api/budgets", json={"category": "Food", "limit_amount": 500, "month": "2025-01"}, headers=auth_header)
+        txn_id = create_transaction(auth_header, date="2025-01-10").get_json()["transaction"]["id"]
+        assert client.get("/api/budgets", headers=auth_header).get_json()["budgets"][0]["spent"] == 50
+        client.delete(f"/api/transactions/{txn_id}", headers=auth_header)
+        assert client.get("/api/budgets", headers=auth_header).get_json()["budgets"][0]["spent"] == 0
+
+    def test_import_invalidates(self, client, auth_header, cache):
+        client.get("/api/dashboard", headers=auth_header)
+        client.post(
+            "/api/transactions/import",
+            data=b"Date,Type,Category,Amount,Description\n2025-01-01,income,Salary,10,Pay\n",
+            headers={**auth_header, "Content-Type": "text/csv"},
+        )
+        assert client.get("/api/dashboard", headers=auth_header).get_json()["income"] == 10
+
+    def test_budget_and_goal_writes_invalidate(self, client, auth_header, cache):
+        client.get("/api/budgets", headers=auth_header)
+        budget_id = client.post(
+            "/api/budgets", json={"category": "Food", "limit_amount": 500, "month": "2025-01"}, headers=auth_header
+        ).get_json()["budget"]["id"]
+        assert len(client.get("/api/budgets", headers=auth_header).get_json()["budgets"]) == 1
+        client.put(f"/api/budgets/{budget_id}", json={"limit_amount": 750}, headers=auth_header)
+        assert client.get("/api/budgets", headers=auth_header).get_json()["budgets"][0]["limit_amount"] == 750
+        before = cache.stats["invalidations"]
+        client.post("/api/goals", json={"name": "Trip", "target_amount": 1000}, headers=auth_header)
+        assert cache.stats["invalidations"] == before + 1
+
+    def test_failed_write_does_not_invalidate(self, client, auth_header, cache):
+        client.post("/api/transactions", json={"amount": -1}, headers=auth_header)
+        assert cache.stats["invalidations"] == 0
+
+    def test_other_users_entries_survive(self, client, auth_header, second_auth_header, cache, create_transaction):
+        client.get("/api/dashboard", headers=second_auth_header)
+        create_transaction(auth_header)
+        resp = client.get("/api/dashboard", headers=second_auth_header)
+        assert resp.headers["X-Cache"] == "HIT"
+
+
+class TestConfiguration:
+    def test_cache_can_be_disabled(self, app, client, auth_header):
+        app.extensions.pop(EXTENSION_KEY)
+        resp = client.get("/api/dashboard", headers=auth_header)
+        assert resp.status_code == 200
+        assert "X-Cache" not in resp.headers
@@ -0,0 +1,95 @@
+import pytest
+
+from models import User
+from versioning import make_etag
+
+READ_ENDPOINTS = ["/api/me", "/api/transactions", "/api/dashboard", "/api/budgets", "/api/goals"]
+
+
+class TestETags:
+    @pytest.mark.parametrize("path", READ_ENDPOINTS)
+    def test_read_endpoints_return_etag(self, client, auth_header, path):
+        resp = client.get(path, headers=auth_header)
+        assert resp.status_code == 200
+        assert resp.headers["ETag"]
+        assert resp.headers["Cache-Control"] == "private, no-cache"
+        assert "Authorization" in resp.headers["Vary"]
+
+    @pytest.mark.parametrize("path", READ_ENDPOINTS)
+    def test_matching_etag_returns_304(self, client, auth_header, path):
+        etag = client.get(path, headers=auth_header).headers["ETag"]
+        resp = client.get(path, headers={**auth_header, "If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.get_data() == b""
+        assert resp.headers["ETag"] == etag
+
+    def test_304_skips_the_view(self, client, auth_header, count_queries):
+        etag = client.get("/api/dashboard", headers=auth_header).headers["ETag"]
+        with count_queries() as statements:
+            resp = client.get("/api/dashboard", headers={**auth_header, "If-None-Match": etag})
+        assert resp.status_code == 304
+        # token_required's revocation lookup, then the version lookup; the view never runs.
+        assert len(statements) == 2
+        assert "revoked_tokens" in statements[0]
+        assert "data_version" in statements[1]
+
+    def test_etag_differs_between_users(self, client, auth_header, second_auth_header):
+        first = client.get("/api/goals", headers=auth_header).headers["ETag"]
+        resp = client.get("/api/goals", headers={**second_auth_header, "If-None-Match": first})
+        assert resp.status_code == 200
+
+    def test_errors_have_no_etag(self, client, auth_header):
+        resp = client.get("/api/budgets?month=bad", headers=auth_header)
+        assert resp.status_code == 400
+        assert "ETag" not in resp.headers
+
+
+class TestDataVersion:
+    def _version(self, app, username="testuser"):
+        with app.app_context():
+            return User.query.filter_by(username=username).one().data_version
+
+    def test_writes_bump_version(self, app, client, auth_header, create_transaction):
+        versions = [self._version(app)]
+        txn_id = create_transaction(auth_header).get_json()["transaction"]["id"]
+        versions.append(self._version(app))
+        client.delete(f"/api/transactions/{txn_id}", headers=auth_header)
+        versions.append(self._version(app))
+        budget_id = client.post(
+            "/api/budgets", json={"category": "Food", "limit_amount": 100, "month": "2025-01"}, headers=auth_header
+        ).get_json()["budget"]["id"]
+        client.put(f"/api/budgets/{budget_id}", json={"limit_amount": 200}, headers=auth_header)
+        client.delete(f"/api/budgets/{budget_id}", headers=auth_header)
+        versions.append(self._version(app))
+        goal_id = client.post("/api/goals", json={"name": "Trip", "target_amount": 500}, headers=auth_header).get_json()["id"]
+        client.put(f"/api/goals/{goal_id}", json={"current_amount": 50}, headers=auth_header)
+        client.delete(f"/api/goals/{goal_id}", headers=auth_header)
+        versions.append(self._version(app))
+        client.post(
+            "/api/transactions/import",
+            data=b"Date,Type,Category,Amount,Description\n2025-01-01,income,Salary,10,Pay\n",
+            headers={**auth_header, "Content-Type": "text/csv"},
+        )
+        versions.append(self._version(app))
+        assert versions == [0, 1, 2, 5, 8, 9]
+
+    def test_failed_write_keeps_version(self, app, client, auth_header):
+        client.post("/api/transactions", json={"amount": 5}, headers=auth_header)
+        assert self._version(app) == 0
+
+    def test_write_invalidates_etag(self, client, auth_header, create_transaction):
+        etag = client.get("/api/dashboard", headers=auth_header).headers["ETag"]
+        create_transaction(auth_header, type="income", amount=75)
+        resp = client.get("/api/dashboard", headers={**auth_header, "If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+        assert resp.get_json()["income"] == 75
+
+    def test_other_users_writes_keep_etag(self, client, auth_header, second_auth_header, create_transaction):
+        etag = client.get("/api/transactions", headers=auth_header).headers["ETag"]
+        create_transaction(second_auth_header)
+        resp = client.get("/api/transactions", headers={**auth_header, "If-None-Match": etag})
+        assert resp.status_code == 304
+
+    def test_make_etag_includes_user_and_version(self):
+        assert make_etag(3, 7).startswith("3-7-")
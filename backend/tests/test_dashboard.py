@@ -0,0 +1,110 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from functools import partial
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+from aggregates import dashboard_months
+from models import Transaction
+
+
+@pytest.fixture
+def create_transaction(create_transaction):
+    """Dated today unless overridden."""
+    return partial(create_transaction, date=date.today().isoformat())
+
+
+def _legacy_dashboard(transactions):
+    """The original in-Python dashboard computation, kept as a reference.
+
+    Months are calendar months and the forecast block is checked separately.
+    """
+    amount = lambda t: float(t.amount)  # the float column it was written against
+    total_income = sum(amount(t) for t in transactions if t.type == "income")
+    total_expenses = sum(amount(t) for t in transactions if t.type == "expense")
+    category_spending = defaultdict(float)
+    for t in transactions:
+        if t.type == "expense":
+            category_spending[t.category] += amount(t)
+    recent = sorted(transactions, key=lambda t: t.date, reverse=True)[:5]
+    today = date.today()
+    monthly_data = []
+    for i in range(5, -1, -1):
+        index = today.year * 12 + today.month - 1 - i
+        month_str = f"{index // 12:04d}-{index % 12 + 1:02d}"
+        m_income = sum(amount(t) for t in transactions if t.type == "income" and t.date.strftime("%Y-%m") == month_str)
+        m_expense = sum(amount(t) for t in transactions if t.type == "expense" and t.date.strftime("%Y-%m") == month_str)
+        monthly_data.append({"month": month_str, "income": m_income, "expenses": m_expense})
+    return {
+        "balance": round(total_income - total_expenses, 2),
+        "income": round(total_income, 2),
+        "expenses": round(total_expenses, 2),
+        "category_spending": {k: round(v, 2) for k, v in category_spending.items()},
+        "recent_transactions": [t.to_dict() for t in recent],
+        "monthly_data": monthly_data,
+    }
+
+
+class TestDashboard:
+    def test_dashboard_empty(self, client, auth_header):
+        resp = client.get("/api/dashboard", headers=auth_header)
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data["balance"] == 0
+        assert data["category_spending"] == {}
+        assert data["recent_transactions"] == []
+        assert len(data["monthly_data"]) == 6
+
+    def test_dashboard_totals(self, client, auth_header, create_transaction):
+        create_transaction(auth_header, amount=3000, category="Salary", type="income")
+        create_transaction(auth_header, amount=120.5, category="Food")
+        create_transaction(auth_header, amount=79.5, category="Transport")
+        data = client.get("/api/dashboard", headers=auth_header).get_json()
+        assert data["income"] == 3000
+        assert data["expenses"] == 200
+        assert data["balance"] == 2800
+        assert data["category_spending"] == {"Food": 120.5, "Transport": 79.5}
+        assert data["monthly_data"][-1] == {"month": date.today().strftime("%Y-%m"), "income": 3000, "expenses": 200}
+
+    def test_dashboard_recent_limited_and_ordered(self, client, auth_header, create_transaction):
+        for day in range(1, 8):
+            create_transaction(auth_header, date=f"2025-01-0{day}")
+        recent = client.get("/api/dashboard", headers=auth_header).get_json()["recent_transactions"]
+        assert [t["date"] for t in recent] == [f"2025-01-0{d}" for d in range(7, 2, -1)]
+
+    def test_dashboard_isolated_per_user(self, client, auth_header, second_auth_header, create_transaction):
+        create_transaction(auth_header, amount=10)
+        data = client.get("/api/dashboard", headers=second_auth_header).get_json()
+        assert data["expenses"] == 0
+        assert data["recent_transactions"] == []
+
+    def test_dashboard_matches_legacy_computation(self, app, client, auth_header, create_transaction):
+        today = date.today()
+        for i in range(40):
+            txn_date = today - timedelta(days=i * 5)
+            create_transaction(auth_header, amount=10.25 * (i % 7 + 1), category=["Food", "Rent", "Shopping"][i % 3], date=txn_date.isoformat())
+            if i % 6 == 0:
+                create_transaction(auth_header, amount=2500.5, category="Salary", type="income", date=txn_date.isoformat())
+        resp = client.get("/api/dashboard", headers=auth_header)
+        data = resp.get_json()
+        # Byte for byte what Flask's stdlib provider would have sent.
+        baseline = DefaultJSONProvider(app)
+        assert resp.get_data() == baseline.response(data).get_data()
+        data.pop("forecast")
+        expected = _legacy_dashboard(Transaction.query.order_by(Transaction.id).all())
+        assert app.json.response(data).get_data() == baseline.response(expected).get_data()
+
+    def test_dashboard_months_are_calendar_months(self):
+        # Stepping back 30 days at a time skipped or repeated months near month ends.
+        assert dashboard_months(date(2025, 3, 31)) == ["2024-10", "2024-11", "2024-12", "2025-01", "2025-02", "2025-03"]
+        assert dashboard_months(date(2025, 7, 1)) == ["2025-02", "2025-03", "2025-04", "2025-05", "2025-06", "2025-07"]
+
+    def test_dashboard_forecast_projects_current_month(self, client, auth_header, create_transaction):
+        this_month = date.today().replace(day=1)
+        for months_ago in range(1, 7):
+            month = (this_month - timedelta(days=28 * months_ago)).replace(day=10)
+            create_transaction(auth_header, amount=3000, category="Salary", type="income", date=month.isoformat())
+            create_transaction(auth_header, amount=1200, category="Rent", date=month.isoformat())
+        projection = client.get("/api/dashboard", headers=auth_header).get_json()["forecast"]
+        assert projection == {"avg_monthly_income": 3000, "avg_monthly_expenses": 1200, "projected_savings": 1800}
@@ -0,0 +1,95 @@
+import os
+import shutil
+
+from flask import Flask
+
+from app import create_app
+from database import engine_options, sqlite_pragmas
+from models import db, Transaction
+
+
+def _file_app(tmp_path, **config):
+    return create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp_path, 'app.db')}",
+        "BCRYPT_ROUNDS": 4,
+        "PASSWORD_HASH_WORKERS": 0,
+        **config,
+    })
+
+
+class TestEngineOptions:
+    def test_postgres_pool_settings(self):
+        app = Flask(__name__)
+        app.config.update(DB_POOL_SIZE=5, DB_STATEMENT_TIMEOUT_MS=1500)
+        options = engine_options(app, "postgresql://u:p@db/finance")
+        assert options["pool_size"] == 5
+        assert options["max_overflow"] == 20
+        assert options["pool_pre_ping"] is True
+        assert options["connect_args"] == {"options": "-c statement_timeout=1500"}
+
+    def test_statement_timeout_can_be_disabled(self):
+        app = Flask(__name__)
+        app.config["DB_STATEMENT_TIMEOUT_MS"] = 0
+        assert "connect_args" not in engine_options(app, "postgresql://u:p@db/finance")
+
+    def test_sqlite_gets_no_pool_options(self):
+        assert engine_options(Flask(__name__), "sqlite:///finance.db") == {}
+
+    def test_memory_database_skips_file_pragmas(self):
+        pragmas = sqlite_pragmas(Flask(__name__), "sqlite:///:memory:")
+        assert not any("journal_mode" in p or "mmap_size" in p for p in pragmas)
+        assert "PRAGMA synchronous = NORMAL" in pragmas
+
+
+class TestSQLitePragmas:
+    def test_file_database_uses_wal(self, tmp_path):
+        app = _file_app(tmp_path, SQLITE_BUSY_TIMEOUT_MS=1234)
+        with app.app_context():
+            with db.engine.connect() as conn:
+                assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+                assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+                assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 1234
+                assert conn.exec_driver_sql("PRAGMA mmap_size").scalar() == 256 * 2**20
+            db.engine.dispose()
+
+    def test_configured_uri_is_respected(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{os.path.join(tmp_path, 'env.db')}")
+        app = _file_app(tmp_path)
+        with app.app_context():
+            assert db.engine.url.database.endswith("app.db")
+            db.engine.dispose()
+
+
+class TestReadReplica:
+    def test_get_requests_read_from_replica(self, tmp_path):
+        primary, replica = os.path.join(tmp_path, "app.db"), os.path.join(tmp_path, "replica.db")
+        txn = {"amount": 5, "category": "Food", "date": "2025-01-01", "type": "expense"}
+        seed = _file_app(tmp_path)
+        client = seed.test_client()
+        token = client.post("/api/signup", json={"username": "replica", "password": "password123"}).get_json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        client.post("/api/transactions", json=txn, headers=headers)
+        with seed.app_context():
+            # Closing the last connection checkpoints the WAL into the file.
+            db.engine.dispose()
+        shutil.copyfile(primary, replica)
+        with open(replica, "rb") as f:
+            snapshot = f.read()
+
+        app = _file_app(tmp_path, DATABASE_REPLICA_URL=f"sqlite:///{replica}")
+        with app.app_context():
+            db.create_all()
+            engines = [db.engines[None], db.engines["replica"]]
+        with open(replica, "rb") as f:
+            assert f.read() == snapshot
+
+        client = app.test_client()
+        assert client.post("/api/transactions", json=txn, headers=headers).status_code == 201
+        # The write went to the primary only; reads still see the replica's single row.
+        assert client.get("/api/transactions", headers=headers).get_json()["total"] == 1
+        assert client.get("/api/dashboard", headers=headers).get_json()["expenses"] == 5
+        with app.app_context():
+            assert db.session.query(Transaction).count() == 2
+            for engine in engines:
+                engine.dispose()
@@ -0,0 +1,192 @@
+from datetime import date, timedelta
+from functools import partial
+
+import numpy as np
+import pytest
+
+import forecast
+import fx
+from models import db
+
+
+@pytest.fixture
+def create_transaction(create_transaction):
+    """Dated today unless overridden."""
+    return partial(create_transaction, date=date.today().isoformat())
+
+
+def _seasonal_series(months=36):
+    t = np.arange(months)
+    income = 3000 + 20 * t + 400 * (t % 12 == 11)
+    expenses = 2000 + 300 * np.sin(2 * np.pi * t / 12)
+    return np.vstack([income, expenses])
+
+
+class TestCalendar:
+    def test_add_months_crosses_years(self):
+        assert forecast.add_months(date(2025, 1, 31), -1) == date(2024, 12, 1)
+        assert forecast.add_months(date(2024, 12, 15), 1) == date(2025, 1, 1)
+
+    def test_months_back(self):
+        assert forecast.months_back(date(2025, 3, 31), 3) == ["2025-01", "2025-02", "2025-03"]
+
+    def test_month_ahead_clamps_day(self):
+        assert forecast.month_ahead(date(2025, 1, 31), 1) == date(2025, 2, 28)
+        assert forecast.month_ahead(date(2024, 1, 31), 1) == date(2024, 2, 29)
+
+
+class TestHoltWinters:
+    def test_flat_series_forecasts_level(self):
+        Y = np.full((1, 24), 500.0)
+        fc, sigma = forecast.holt_winters(Y, np.zeros(1, dtype=int), 12, 3)
+        assert np.allclose(fc, 500.0, atol=1e-6)
+        assert np.allclose(sigma, 0.0, atol=1e-6)
+
+    def test_seasonal_trend_series(self):
+        Y = _seasonal_series(48)
+        fc, _ = forecast.holt_winters(Y[:, :36], np.zeros(2, dtype=int), 12, 12)
+        assert np.abs(fc - Y[:, 36:]).max() / Y[:, 36:].mean() < 0.05
+
+    def test_matches_per_series_fit(self):
+        # Rows are independent: fitting together equals fitting one at a time.
+        Y = _seasonal_series()
+        start = np.array([0, 6])
+        together, _ = forecast.holt_winters(Y, start, 12, 4)
+        for i in range(2):
+            alone, _ = forecast.holt_winters(Y[i:i + 1], start[i:i + 1], 12, 4)
+            assert np.allclose(together[i], alone[0])
+
+    def test_empty_history_forecasts_zero(self):
+        points = forecast.project(np.zeros((2, 36)), 12, 2, 0.8)
+        assert [p["income"] for p in points] == [0, 0]
+        assert [p["net_upper"] for p in points] == [0, 0]
+
+    def test_bands_contain_point_and_widen(self):
+        Y = _seasonal_series() + np.random.default_rng(0).normal(0, 50, (2, 36))
+        points = forecast.project(Y, 12, 3, 0.9)
+        for p in points:
+            assert p["income_lower"] <= p["income"] <= p["income_upper"]
+            assert p["net_lower"] <= p["net"] <= p["net_upper"]
+        widths = [p["expenses_upper"] - p["expenses_lower"] for p in points]
+        assert widths == sorted(widths) and widths[0] > 0
+
+
+class TestRecurring:
+    def test_detects_monthly_and_weekly(self):
+        today = date(2025, 6, 20)
+        salary = [date(2025, m, 1).toordinal() for m in range(1, 7)]
+        gym = [(today - timedelta(days=7 * i)).toordinal() for i in range(6)]
+        found = forecast.detect_recurring(
+            [0] * 6 + [1] * 6, salary + gym, [3000.0] * 6 + [12, 12, 13, 12, 12, 12], today
+        )
+        assert sorted((key, cadence, count) for key, cadence, _, _, count in found) == [
+            (0, "monthly", 6), (1, "weekly", 6),
+        ]
+
+    def test_ignores_irregular_and_stale(self):
+        today = date(2025, 6, 20)
+        irregular = [date(2025, 1, d).toordinal() for d in (1, 3, 20, 28)]
+        stale = [date(2024, m, 5).toordinal() for m in range(1, 7)]
+        found = forecast.detect_recurring([0] * 4 + [1] * 6, irregular + stale, [10.0] * 10, today)
+        assert found == []
+
+    def test_ignores_varying_amounts(self):
+        today = date(2025, 6, 20)
+        ordinals = [date(2025, m, 1).toordinal() for m in range(1, 7)]
+        found = forecast.detect_recurring([0] * 6, ordinals, [50, 120, 80, 30, 200, 90], today)
+        assert found == []
+
+
+class TestForecastEndpoint:
+    def test_requires_auth(self, client):
+        assert client.get("/api/forecast").status_code == 401
+
+    def test_validation(self, client, auth_header):
+        for query in ("granularity=week", "horizon=0", "horizon=25", "granularity=day&horizon=91",
+                      "horizon=abc", "confidence=1", "confidence=0"):
+            resp = client.get(f"/api/forecast?{query}", headers=auth_header)
+            assert resp.status_code == 400, query
+
+    def test_monthly_payload(self, client, auth_header, create_transaction):
+        this_month = date.today().replace(day=1)
+        for months_ago in range(1, 7):
+            # Same day of month as today, so the latest one is about a month old.
+            month = forecast.add_months(this_month, -months_ago).replace(day=min(date.today().day, 28))
+            create_transaction(auth_header, amount=3000, category="Salary", type="income",
+                                description="Paycheck", date=month.isoformat())
+            create_transaction(auth_header, amount=800, category="Rent", date=month.isoformat())
+        data = client.get("/api/forecast?horizon=4", headers=auth_header).get_json()
+        assert data["granularity"] == "month" and data["horizon"] == 4 and data["confidence"] == 0.8
+        assert [p["period"] for p in data["forecast"]] == [
+            forecast.add_months(this_month, h).strftime("%Y-%m") for h in range(4)
+        ]
+        assert len(data["history"]) == 6
+        first = data["forecast"][0]
+        assert (first["income"], first["expenses"], first["net"]) == (3000, 800, 2200)
+        assert {(r["category"], r["cadence"]) for r in data["recurring"]} == {
+            ("Salary", "monthly"), ("Rent", "monthly"),
+        }
+
+    def test_daily_payload(self, client, auth_header, create_transaction):
+        create_transaction(auth_header, amount=20, date=(date.today() - timedelta(days=3)).isoformat())
+        data = client.get("/api/forecast?granularity=day", headers=auth_header).get_json()
+        assert data["horizon"] == 14
+        assert data["forecast"][0]["period"] == date.today().isoformat()
+        assert data["history"][-1]["period"] == (date.today() - timedelta(days=1)).isoformat()
+
+    def test_new_user_gets_empty_forecast(self, client, auth_header):
+        data = client.get("/api/forecast", headers=auth_header).get_json()
+        assert data["history"] == [] and data["recurring"] == []
+        assert all(p["income"] == 0 and p["expenses"] == 0 for p in data["forecast"])
+
+    def test_write_invalidates(self, client, auth_header, create_transaction):
+        before = client.get("/api/forecast", headers=auth_header)
+        create_transaction(auth_header, amount=100, date=forecast.add_months(date.today(), -1).isoformat())
+        after = client.get("/api/forecast", headers={**auth_header, "If-None-Match": before.headers["ETag"]})
+        assert after.status_code == 200
+        assert after.get_json()["forecast"][0]["expenses"] > 0
+
+
+class TestForecastCurrencies:
+    def _load_rates(self):
+        # Per one EUR: 100 JPY buys one USD.
+        fx.store_rates([
+            {"currency": "USD", "date": date.today() - timedelta(days=400), "rate": 1.0},
+            {"currency": "JPY", "date": date.today() - timedelta(days=400), "rate": 100.0},
+        ])
+        db.session.commit()
+
+    def test_daily_series_in_base_currency(self, client, auth_header, create_transaction):
+        self._load_rates()
+        for days_ago in range(1, 29):
+            create_transaction(auth_header, amount=10000, currency="JPY",
+                                date=(date.today() - timedelta(days=days_ago)).isoformat())
+        data = client.get("/api/forecast?granularity=day", headers=auth_header).get_json()
+        assert {p["expenses"] for p in data["history"]} == {100}
+        assert data["forecast"][0]["expenses"] == 100
+
+    def test_recurring_across_currencies(self, client, auth_header, create_transaction):
+        self._load_rates()
+        this_month = date.today().replace(day=1)
+        for months_ago in range(1, 7):
+            month = forecast.add_months(this_month, -months_ago).replace(day=min(date.today().day, 28)).isoformat()
+            amount, currency = (80000, "JPY") if months_ago % 2 else (800, "USD")
+            create_transaction(auth_header, amount=amount, currency=currency, category="Rent",
+                                description="Rent", date=month)
+        [rent] = client.get("/api/forecast", headers=auth_header).get_json()["recurring"]
+        assert (rent["category"], rent["cadence"], rent["amount"], rent["occurrences"]) == ("Rent", "monthly", 800, 6)
+
+
+class TestForecastAll:
+    def test_matches_per_user_forecast(self, app, client, auth_header, second_auth_header, create_transaction):
+        this_month = date.today().replace(day=1)
+        for months_ago in range(1, 10):
+            month = forecast.add_months(this_month, -months_ago).isoformat()
+            create_transaction(auth_header, amount=100 + 10 * months_ago, date=month)
+            create_transaction(second_auth_header, amount=40, type="income", category="Gift", date=month)
+        user_ids, fc = forecast.forecast_all(horizon=2)
+        assert len(user_ids) == 2
+        for i, user_id in enumerate(user_ids):
+            single = forecast.forecast_user(int(user_id), horizon=2)["forecast"]
+            assert np.allclose(fc[i, 0], [p["income"] for p in single], atol=0.01)
+            assert np.allclose(fc[i, 1], [p["expenses"] for p in single], atol=0.01)
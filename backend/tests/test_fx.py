@@ -0,0 +1,193 @@
+import csv
+import io
+from datetime import date
+from functools import partial
+
+import pytest
+
+import fx
+import goals
+import rollups
+from load_fx_rates import load
+from models import db, User
+
+RATES = [
+    {"currency": "USD", "date": date(2025, 1, 2), "rate": 1.10},
+    {"currency": "USD", "date": date(2025, 1, 6), "rate": 1.20},
+    {"currency": "GBP", "date": date(2025, 1, 2), "rate": 0.85},
+]
+
+
+@pytest.fixture
+def create_transaction(create_transaction):
+    return partial(create_transaction, amount=100, description="Groceries", date="2025-01-03")
+
+
+def _load_rates(rows=RATES):
+    fx.store_rates(rows)
+    db.session.commit()
+
+
+def _food_spending(client, auth_header):
+    return client.get("/api/dashboard", headers=auth_header).get_json()["category_spending"].get("Food")
+
+
+class TestRateTable:
+    def _table(self):
+        return fx.RateTable.from_rows([(r["currency"], r["date"], r["rate"]) for r in reversed(RATES)], "EUR")
+
+    def test_rate_in_force_on_each_day(self):
+        days = fx.to_days([date(2024, 12, 31), date(2025, 1, 2), date(2025, 1, 5), date(2025, 1, 6), "2025-02-01"])
+        assert self._table().rates("USD", days).tolist() == [1.10, 1.10, 1.10, 1.20, 1.20]
+        assert self._table().rates("EUR", days).tolist() == [1.0] * 5
+
+    def test_convert(self):
+        day = fx.to_days(["2025-01-03"])[0]
+        table = self._table()
+        assert table.convert([1000], ["EUR"], [day], "USD").tolist() == [1100]
+        assert table.convert([1100], ["USD"], [day], "EUR").tolist() == [1000]
+        assert table.convert([850, 500], ["GBP", "USD"], [day, day], ["USD", "USD"]).tolist() == [1100, 500]
+        # Rounded half-up per amount, away from zero for refunds.
+        assert table.convert([5, -5], ["EUR", "EUR"], [day, day], "USD").tolist() == [6, -6]
+
+    def test_unknown_currency(self):
+        assert not self._table().can_convert("JPY", "USD")
+        with pytest.raises(fx.MissingRate):
+            self._table().convert([100], ["JPY"], [0], "USD")
+
+
+class TestReadCsv:
+    def test_long_format(self):
+        rows = fx.read_csv(io.StringIO("date,currency,rate\n2025-01-02,usd,1.1\n\n2025-01-03,GBP,0.85\n"))
+        assert rows == [
+            {"currency": "USD", "date": date(2025, 1, 2), "rate": 1.1},
+            {"currency": "GBP", "date": date(2025, 1, 3), "rate": 0.85},
+        ]
+
+    def test_ecb_wide_format(self):
+        rows = fx.read_csv(io.StringIO("Date,USD,JPY,\n2025-01-03,1.0342,N/A,\n2025-01-02,1.0321,161.57,\n"))
+        assert [(r["currency"], r["date"].day, r["rate"]) for r in rows] == [("USD", 3, 1.0342), ("USD", 2, 1.0321), ("JPY", 2, 161.57)]
+
+    @pytest.mark.parametrize("text", [
+        "currency,rate\nUSD,1.1\n",
+        "date,currency,rate\n2025-01-02,USD,1.1\n2025-01-03,USD,-1\n",
+        "date,currency,rate\n2025-01-02,DOLLAR,1.1\n",
+        "date,currency,rate\n2025-02-30,USD,1.1\n",
+    ])
+    def test_rejects_bad_files(self, text):
+        with pytest.raises(ValueError):
+            fx.read_csv(io.StringIO(text))
+
+
+class TestTransactionCurrency:
+    def test_defaults_to_base_currency(self, client, auth_header, create_transaction):
+        txn = create_transaction(auth_header).get_json()["transaction"]
+        assert txn["currency"] == "USD"
+
+    def test_rejects_unconvertible_currency(self, client, auth_header, create_transaction):
+        resp = create_transaction(auth_header, currency="EUR")
+        assert resp.status_code == 400
+        assert "No exchange rates" in resp.get_json()["error"]
+        assert create_transaction(auth_header, currency="EURO").status_code == 400
+
+    def test_totals_are_in_base_currency(self, client, auth_header, create_transaction):
+        _load_rates()
+        create_transaction(auth_header)
+        txn = create_transaction(auth_header, currency="eur").get_json()["transaction"]
+        assert (txn["amount"], txn["currency"]) == (100, "EUR")
+        # The 2025-01-06 rate applies from that day on.
+        create_transaction(auth_header, currency="EUR", date="2025-01-06")
+        assert _food_spending(client, auth_header) == 330
+        client.post("/api/budgets", json={"category": "Food", "limit_amount": 660, "month": "2025-01"}, headers=auth_header)
+        [budget] = client.get("/api/budgets", headers=auth_header).get_json()["budgets"]
+        assert (budget["spent"], budget["percentage"]) == (330, 50.0)
+        rows = client.get("/api/analytics?group_by=category", headers=auth_header).get_json()["rows"]
+        assert rows == [{"category": "Food", "sum": 330, "count": 3}]
+        assert rollups.verify() == []
+
+    def test_export_includes_base_amounts(self, client, auth_header, create_transaction):
+        _load_rates()
+        create_transaction(auth_header, currency="GBP", amount=8.5)
+        rows = list(csv.reader(io.StringIO(client.get("/api/transactions/export", headers=auth_header).data.decode("utf-8"))))
+        assert rows[0][4:7] == ["Amount", "Currency", "Amount (USD)"]
+        assert rows[1][4:7] == ["8.5", "GBP", "11.0"]
+
+    def test_import_with_currency_column(self, client, auth_header):
+        _load_rates()
+        body = "Date,Type,Category,Amount,Currency\n2025-01-03,expense,Food,10,EUR\n2025-01-03,expense,Food,10,\n2025-01-03,expense,Food,10,JPY\n"
+        resp = client.post("/api/transactions/import", data=body, content_type="text/csv", headers=auth_header)
+        assert resp.get_json()["imported"] == 2
+        assert resp.get_json()["errors"] == [{"row": 3, "error": "No exchange rates to convert JPY to USD"}]
+        assert _food_spending(client, auth_header) == 21
+        assert rollups.verify() == []
+
+
+class TestBaseCurrency:
+    def test_signup_with_base_currency(self, client):
+        resp = client.post("/api/signup", json={"username": "euro", "password": "secret1", "base_currency": "eur"})
+        assert resp.get_json()["user"]["base_currency"] == "EUR"
+        assert client.post("/api/signup", json={"username": "bad", "password": "secret1", "base_currency": "x"}).status_code == 400
+
+    def test_change_rebuilds_totals(self, client, auth_header, create_transaction):
+        _load_rates()
+        create_transaction(auth_header)
+        create_transaction(auth_header, currency="EUR")
+        assert client.get("/api/analytics", headers=auth_header).get_json()["rows"][0]["sum"] == 210
+        resp = client.put("/api/me", json={"base_currency": "EUR"}, headers=auth_header)
+        assert resp.status_code == 200
+        assert client.get("/api/me", headers=auth_header).get_json()["user"]["base_currency"] == "EUR"
+        assert _food_spending(client, auth_header) == 190.91
+        assert client.get("/api/analytics", headers=auth_header).get_json()["rows"][0]["sum"] == 190.91
+        assert rollups.verify() == []
+
+    def test_change_converts_budgets_and_goals(self, client, auth_header):
+        _load_rates()
+        client.post("/api/budgets", json={"category": "Food", "limit_amount": 110, "month": "2025-01"}, headers=auth_header)
+        goal = client.post("/api/goals", json={"name": "Trip", "target_amount": 1200, "current_amount": 120}, headers=auth_header).get_json()
+        client.post(f"/api/goals/{goal['id']}/contributions", json={"amount": 12}, headers=auth_header)
+        assert client.put("/api/me", json={"base_currency": "EUR"}, headers=auth_header).status_code == 200
+        # The budget converts at its month's rate (1.10 on 2025-01-01 via the first quote), the goal at today's (1.20).
+        assert client.get("/api/budgets", headers=auth_header).get_json()["budgets"][0]["limit_amount"] == 100
+        goal = client.get("/api/goals", headers=auth_header).get_json()["goals"][0]
+        assert (goal["target_amount"], goal["current_amount"]) == (1000, 110)
+        assert goals.verify() == []
+
+    def test_change_with_budgets_needs_rates_for_old_base(self, client, auth_header):
+        client.post("/api/budgets", json={"category": "Food", "limit_amount": 110, "month": "2025-01"}, headers=auth_header)
+        resp = client.put("/api/me", json={"base_currency": "EUR"}, headers=auth_header)
+        assert resp.status_code == 400
+        assert resp.get_json()["error"] == "No exchange rates to convert USD to EUR"
+
+    def test_change_needs_rates_for_held_currencies(self, client, auth_header, create_transaction):
+        create_transaction(auth_header)
+        resp = client.put("/api/me", json={"base_currency": "GBP"}, headers=auth_header)
+        assert resp.status_code == 400
+        assert resp.get_json()["error"] == "No exchange rates to convert USD to GBP"
+        assert client.put("/api/me", json={"base_currency": "?"}, headers=auth_header).status_code == 400
+
+
+class TestLoadRates:
+    def test_other_workers_pick_up_new_rates(self, client):
+        other = fx.RateCache("EUR")
+        assert not other.get().has("USD")
+        _load_rates()
+        table = other.get()
+        assert table.has("USD")
+        assert other.get() is table
+        _load_rates([{"currency": "USD", "date": date(2025, 1, 2), "rate": 1.5}])
+        assert other.get().rates("USD", fx.to_days(["2025-01-03"])).tolist() == [1.5]
+
+    def test_reload_rebuilds_affected_users(self, client, auth_header, second_auth_header, tmp_path, create_transaction):
+        _load_rates()
+        create_transaction(auth_header, currency="EUR")
+        create_transaction(second_auth_header)
+        assert _food_spending(client, auth_header) == 110
+        path = tmp_path / "rates.csv"
+        path.write_text("date,currency,rate\n2025-01-02,USD,1.5\n")
+        versions = dict(db.session.query(User.username, User.data_version))
+        assert load(str(path)) == (1, 1)
+        db.session.commit()
+        assert _food_spending(client, auth_header) == 150
+        after = dict(db.session.query(User.username, User.data_version))
+        assert after["testuser"] == versions["testuser"] + 1
+        assert after["testuser2"] == versions["testuser2"]
@@ -0,0 +1,170 @@
+from datetime import date
+
+import fx
+import goals
+import rollups
+from models import db, Goal
+
+
+def _create_goal(client, auth_header, **overrides):
+    data = {"name": "Trip", "target_amount": 1000}
+    data.update(overrides)
+    return client.post("/api/goals", json=data, headers=auth_header).get_json()
+
+
+def _contribute(client, auth_header, goal_id, amount, **overrides):
+    return client.post(f"/api/goals/{goal_id}/contributions", json={"amount": amount, **overrides}, headers=auth_header)
+
+
+def _goal(client, auth_header, goal_id):
+    return next(g for g in client.get("/api/goals", headers=auth_header).get_json()["goals"] if g["id"] == goal_id)
+
+
+class TestContributions:
+    def test_contributions_add_up(self, client, auth_header):
+        goal = _create_goal(client, auth_header, current_amount=100)
+        resp = _contribute(client, auth_header, goal["id"], 50, date="2025-01-10")
+        assert resp.status_code == 201
+        body = resp.get_json()
+        assert (body["goal"]["current_amount"], body["goal"]["percentage"]) == (150, 15.0)
+        txn = body["transaction"]
+        assert (txn["goal_id"], txn["type"], txn["category"], txn["amount"]) == (goal["id"], "saving", "Savings", 50)
+        assert txn["description"] == "Saved towards Trip"
+        _contribute(client, auth_header, goal["id"], 100)
+        assert _goal(client, auth_header, goal["id"])["current_amount"] == 250
+        assert goals.verify() == [] and rollups.verify() == []
+
+    def test_withdrawal(self, client, auth_header):
+        goal = _create_goal(client, auth_header)
+        _contribute(client, auth_header, goal["id"], 300)
+        txn = _contribute(client, auth_header, goal["id"], -120).get_json()["transaction"]
+        assert (txn["type"], txn["amount"]) == ("withdrawal", 120)
+        assert _goal(client, auth_header, goal["id"])["current_amount"] == 180
+
+    def test_deleting_a_contribution(self, client, auth_header):
+        goal = _create_goal(client, auth_header)
+        txn = _contribute(client, auth_header, goal["id"], 75).get_json()["transaction"]
+        client.delete(f"/api/transactions/{txn['id']}", headers=auth_header)
+        assert _goal(client, auth_header, goal["id"])["current_amount"] == 0
+        assert goals.verify() == []
+
+    def test_tagged_transaction(self, client, auth_header, second_auth_header):
+        goal = _create_goal(client, auth_header)
+        data = {"amount": 40, "category": "Transfer", "date": "2025-01-10", "type": "expense", "goal_id": goal["id"]}
+        assert client.post("/api/transactions", json=data, headers=second_auth_header).status_code == 400
+        assert client.post("/api/transactions", json=data, headers=auth_header).status_code == 201
+        assert _goal(client, auth_header, goal["id"])["current_amount"] == 40
+
+    def test_boolean_goal_id_rejected(self, client, auth_header):
+        goal = _create_goal(client, auth_header)
+        assert goal["id"] == 1
+        data = {"amount": 40, "category": "Transfer", "date": "2025-01-10", "type": "expense", "goal_id": True}
+        assert client.post("/api/transactions", json=data, headers=auth_header).status_code == 400
+        assert _goal(client, auth_header, goal["id"])["current_amount"] == 0
+
+    def test_foreign_currency(self, client, auth_header):
+        fx.store_rates([{"currency": "USD", "date": date(2025, 1, 2), "rate": 1.25}])
+        db.session.commit()
+        goal = _create_goal(client, auth_header)
+        _contribute(client, auth_header, goal["id"], 100, currency="EUR", date="2025-01-10")
+        assert _goal(client, auth_header, goal["id"])["current_amount"] == 125
+        assert goals.verify() == []
+
+    def test_stale_reads_do_not_lose_updates(self, app, client, auth_header):
+        goal_id = _create_goal(client, auth_header)["id"]
+        # Both writers hold the goal as read before either committed.
+        stale = db.session.get(Goal, goal_id)
+        assert stale.current_amount == 0
+        for amount in (50, 100):
+            goals.record({"user_id": 1, "date": date(2025, 1, 10), "type": "expense", "amount": amount, "currency": "USD", "goal_id": goal_id})
+            db.session.commit()
+        assert db.session.get(Goal, goal_id).current_amount == 150
+
+    def test_errors(self, client, auth_header, second_auth_header):
+        goal = _create_goal(client, auth_header)
+        assert _contribute(client, second_auth_header, goal["id"], 50).status_code == 404
+        assert _contribute(client, auth_header, goal["id"], "lots").status_code == 400
+        assert _contribute(client, auth_header, goal["id"], 0).status_code == 400
+        assert client.post(f"/api/goals/{goal['id']}/contributions", json={}, headers=auth_header).status_code == 400
+
+
+class TestContributionsAreNotSpending:
+    def test_excluded_from_expense_aggregates(self, client, auth_header):
+        month = date.today().strftime("%Y-%m")
+        client.post("/api/budgets", json={"category": "Savings", "limit_amount": 100, "month": month}, headers=auth_header)
+        goal = _create_goal(client, auth_header)
+        _contribute(client, auth_header, goal["id"], 300)
+        _contribute(client, auth_header, goal["id"], -50)
+        dashboard = client.get("/api/dashboard", headers=auth_header).get_json()
+        assert (dashboard["income"], dashboard["expenses"], dashboard["balance"]) == (0, 0, 0)
+        assert dashboard["category_spending"] == {}
+        assert {m["month"]: m["expenses"] for m in dashboard["monthly_data"]}[month] == 0
+        [budget] = client.get("/api/budgets", headers=auth_header).get_json()["budgets"]
+        assert budget["spent"] == 0
+        assert client.get("/api/alerts", headers=auth_header).get_json()["alerts"] == []
+        assert client.get("/api/forecast", headers=auth_header).get_json()["recurring"] == []
+        assert _goal(client, auth_header, goal["id"])["current_amount"] == 250
+
+    def test_tagged_expense_still_counts(self, client, auth_header):
+        goal = _create_goal(client, auth_header)
+        data = {"amount": 40, "category": "Travel", "date": date.today().isoformat(), "type": "expense", "goal_id": goal["id"]}
+        client.post("/api/transactions", json=data, headers=auth_header)
+        assert client.get("/api/dashboard", headers=auth_header).get_json()["expenses"] == 40
+
+    def test_contribution_types_only_via_goals(self, client, auth_header):
+        data = {"amount": 40, "category": "Savings", "date": "2025-01-10", "type": "saving"}
+        resp = client.post("/api/transactions", json=data, headers=auth_header)
+        assert resp.status_code == 400
+        assert resp.get_json()["error"] == "Type must be income or expense"
+
+
+class TestManualEdits:
+    def test_put_current_amount_moves_opening(self, client, auth_header):
+        goal = _create_goal(client, auth_header)
+        _contribute(client, auth_header, goal["id"], 50)
+        resp = client.put(f"/api/goals/{goal['id']}", json={"current_amount": 500}, headers=auth_header)
+        assert resp.get_json()["current_amount"] == 500
+        assert db.session.get(Goal, goal["id"]).opening_amount == 450
+        assert goals.verify() == []
+
+    def test_delete_goal_keeps_transactions(self, client, auth_header):
+        goal = _create_goal(client, auth_header)
+        txn = _contribute(client, auth_header, goal["id"], 50).get_json()["transaction"]
+        client.delete(f"/api/goals/{goal['id']}", headers=auth_header)
+        [kept] = client.get("/api/transactions", headers=auth_header).get_json()["transactions"]
+        assert (kept["id"], kept["goal_id"]) == (txn["id"], None)
+
+
+class TestProgress:
+    TODAY = date(2025, 7, 1)
+
+    def test_rate_projection_and_requirement(self):
+        # 300.00 saved over the 181 days since 2025-01-01 on top of 100.00, 600.00 to go.
+        metrics = goals.progress(100000, 40000, 10000, date(2025, 12, 31), date(2025, 1, 1), self.TODAY)
+        assert metrics["percentage"] == 40.0
+        assert metrics["remaining"] == 600
+        assert metrics["monthly_rate"] == 50.45
+        # 600.00 at 50.45 a month takes 11.9 months.
+        assert metrics["projected_completion"] == "2026-06-28"
+        # 600.00 over the 183 days to the deadline.
+        assert metrics["required_monthly"] == 99.8
+        assert metrics["on_track"] is False
+
+    def test_without_contributions_or_deadline(self):
+        metrics = goals.progress(100000, 0, 0, None, None, self.TODAY)
+        assert (metrics["monthly_rate"], metrics["projected_completion"], metrics["required_monthly"], metrics["on_track"]) == (None, None, None, None)
+
+    def test_reached(self):
+        metrics = goals.progress(100000, 120000, 0, date(2025, 12, 31), date(2025, 6, 1), self.TODAY)
+        assert (metrics["remaining"], metrics["projected_completion"], metrics["required_monthly"], metrics["on_track"]) == (0, "2025-07-01", None, True)
+
+    def test_get_goals_single_query(self, client, auth_header, count_queries):
+        for i in range(5):
+            goal = _create_goal(client, auth_header, name=f"Goal {i}", deadline="2030-01-01")
+            _contribute(client, auth_header, goal["id"], 10 * (i + 1), date="2025-01-10")
+        with count_queries() as statements:
+            resp = client.get("/api/goals", headers=auth_header)
+        body = resp.get_json()["goals"]
+        assert [g["name"] for g in body] == [f"Goal {i}" for i in reversed(range(5))]
+        assert all(g["monthly_rate"] > 0 and g["projected_completion"] and g["required_monthly"] for g in body)
+        assert len([s for s in statements if "data_version" not in s and "revoked_tokens" not in s]) == 1
@@ -0,0 +1,114 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from hashing import PasswordHasher, HasherSaturated, hash_rounds
+from models import User
+
+
+class TestPasswordHasher:
+    def test_hash_and_check_on_process_pool(self):
+        hasher = PasswordHasher(workers=1, rounds=4)
+        try:
+            hashed = hasher.hash("secret123")
+            assert hash_rounds(hashed) == 4
+            assert hasher.check("secret123", hashed)
+            assert not hasher.check("wrong", hashed)
+        finally:
+            hasher.shutdown()
+        assert hasher.metrics["completed"] == 3
+        assert hasher.metrics["pending"] == 0
+
+    def test_rejects_when_queue_is_full(self):
+        hasher = PasswordHasher(workers=0, rounds=4, queue_limit=1)
+        started, release = threading.Event(), threading.Event()
+
+        def slow(*args):
+            started.set()
+            release.wait(5)
+            return True
+
+        worker = threading.Thread(target=hasher._run, args=(slow,))
+        worker.start()
+        started.wait(5)
+        try:
+            assert hasher.metrics["pending"] == 1
+            with pytest.raises(HasherSaturated):
+                hasher.check("secret123", "$2b$04$invalid")
+        finally:
+            release.set()
+            worker.join()
+        assert hasher.metrics["rejected"] == 1
+        assert hasher.metrics["max_pending"] == 1
+
+    def test_timeout_is_saturation_and_keeps_the_slot(self):
+        hasher = PasswordHasher(workers=1, rounds=4, queue_limit=1, timeout=0.05)
+        # A thread pool stands in for the process pool so the job can be held open.
+        hasher._executor = ThreadPoolExecutor(1)
+        release = threading.Event()
+        try:
+            with pytest.raises(HasherSaturated):
+                hasher._run(release.wait, 5)
+            # Still running on the worker: the slot stays taken and nothing has completed.
+            assert hasher.metrics["pending"] == 1
+            assert hasher.metrics["completed"] == 0
+            with pytest.raises(HasherSaturated):
+                hasher.check("secret123", "$2b$04$invalid")
+        finally:
+            release.set()
+            hasher.shutdown()
+        assert hasher.metrics["pending"] == 0
+        assert hasher.metrics["timeouts"] == 1
+        assert hasher.metrics["rejected"] == 1
+        assert hasher.metrics["completed"] == 1
+
+    def test_failures_are_not_completions(self):
+        hasher = PasswordHasher(workers=0, rounds=4)
+        with pytest.raises(ValueError):
+            hasher.check("secret123", "not-a-hash")
+        assert hasher.metrics["failed"] == 1
+        assert hasher.metrics["completed"] == 0
+        assert hasher.metrics["pending"] == 0
+
+    def test_needs_rehash(self):
+        hasher = PasswordHasher(workers=0, rounds=5)
+        assert hasher.needs_rehash(hasher.hash("secret123").replace("$05$", "$04$"))
+        assert not hasher.needs_rehash(hasher.hash("secret123"))
+
+    def test_hash_rounds_of_garbage(self):
+        assert hash_rounds("not-a-hash") is None
+
+
+class TestLoginBackpressure:
+    def test_login_returns_429_when_saturated(self, app, client):
+        client.post("/api/signup", json={"username": "busyuser", "password": "password123"})
+        app.extensions["password_hasher"].queue_limit = 0
+        resp = client.post("/api/login", json={"username": "busyuser", "password": "password123"})
+        assert resp.status_code == 429
+        assert resp.headers["Retry-After"] == "1"
+
+    def test_signup_returns_429_when_saturated(self, app, client):
+        app.extensions["password_hasher"].queue_limit = 0
+        resp = client.post("/api/signup", json={"username": "busyuser", "password": "password123"})
+        assert resp.status_code == 429
+
+
+class TestRehashOnLogin:
+    def test_login_upgrades_hash_cost(self, app, client):
+        client.post("/api/signup", json={"username": "olduser", "password": "password123"})
+        hasher = app.extensions["password_hasher"]
+        hasher.rounds = 5
+        resp = client.post("/api/login", json={"username": "olduser", "password": "password123"})
+        assert resp.status_code == 200
+        with app.app_context():
+            stored = User.query.filter_by(username="olduser").one().password_hash
+        assert hash_rounds(stored) == 5
+        assert client.post("/api/login", json={"username": "olduser", "password": "password123"}).status_code == 200
+
+    def test_failed_login_does_not_rehash(self, app, client):
+        client.post("/api/signup", json={"username": "olduser", "password": "password123"})
+        app.extensions["password_hasher"].rounds = 5
+        client.post("/api/login", json={"username": "olduser", "password": "wrongpass"})
+        with app.app_context():
+            assert hash_rounds(User.query.filter_by(username="olduser").one().password_hash) == 4
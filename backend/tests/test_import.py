@@ -0,0 +1,125 @@
+import io
+import json
+
+import pytest
+
+import importer
+import rollups
+from models import Transaction
+
+
+def _import(client, auth_header, body, content_type):
+    return client.post("/api/transactions/import", data=body, headers={**auth_header, "Content-Type": content_type})
+
+
+class TestImportCsv:
+    def test_import_export_layout(self, client, auth_header):
+        body = (
+            "ID,Date,Type,Category,Amount,Description\r\n"
+            "17,2025-01-15,expense,Food,12.5,Lunch\r\n"
+            ",2025-01-20,income,Salary,4000,\"Monthly, salary\"\r\n"
+        )
+        resp = _import(client, auth_header, body, "text/csv")
+        assert resp.status_code == 200
+        assert resp.get_json() == {"imported": 2, "failed": 0, "errors": []}
+        txns = client.get("/api/transactions?sort_order=asc", headers=auth_header).get_json()["transactions"]
+        assert [(t["amount"], t["description"]) for t in txns] == [(12.5, "Lunch"), (4000.0, "Monthly, salary")]
+
+    def test_round_trip_from_export(self, client, auth_header, second_auth_header):
+        for amount in (5, 7.25, 19.99):
+            client.post("/api/transactions", json={"amount": amount, "category": "Food", "date": "2025-01-15", "type": "expense"}, headers=auth_header)
+        exported = client.get("/api/transactions/export", headers=auth_header).data
+        resp = _import(client, second_auth_header, exported, "text/csv")
+        assert resp.get_json()["imported"] == 3
+        dashboard = client.get("/api/dashboard", headers=second_auth_header).get_json()
+        assert dashboard["expenses"] == 32.24
+
+    def test_reports_row_errors(self, client, auth_header):
+        body = (
+            "Date,Type,Category,Amount,Description\n"
+            "2025-01-15,expense,Food,10,ok\n"
+            "2025-13-01,expense,Food,10,bad date\n"
+            "2025-01-15,transfer,Food,10,bad type\n"
+            "2025-01-15,expense,Food,-3,negative\n"
+        )
+        data = _import(client, auth_header, body, "text/csv").get_json()
+        assert data["imported"] == 1
+        assert data["failed"] == 3
+        assert data["errors"] == [
+            {"row": 2, "error": "Invalid date format, use YYYY-MM-DD"},
+            {"row": 3, "error": "Type must be income or expense"},
+            {"row": 4, "error": "Amount must be positive"},
+        ]
+
+    def test_missing_column(self, client, auth_header):
+        data = _import(client, auth_header, "Date,Type,Amount\n2025-01-15,expense,10\n", "text/csv").get_json()
+        assert data["errors"] == [{"row": 1, "error": "category is required"}]
+
+
+class TestImportJson:
+    def test_import_array(self, client, auth_header):
+        rows = [
+            {"amount": 10, "category": "Food", "date": "2025-01-15", "type": "expense"},
+            {"amount": "oops", "category": "Food", "date": "2025-01-15", "type": "expense"},
+            "not an object",
+        ]
+        data = _import(client, auth_header, json.dumps(rows), "application/json").get_json()
+        assert data["imported"] == 1
+        assert [e["row"] for e in data["errors"]] == [2, 3]
+
+    def test_malformed_json_rolls_back(self, client, auth_header):
+        resp = _import(client, auth_header, '[{"amount": 10, "category": "Food", "date": "2025-01-15", "type": "expense"}, {', "application/json")
+        assert resp.status_code == 400
+        assert Transaction.query.count() == 0
+
+    def test_non_array_rejected(self, client, auth_header):
+        resp = _import(client, auth_header, '{"amount": 10}', "application/json")
+        assert resp.status_code == 400
+
+    def test_unsupported_content_type(self, client, auth_header):
+        resp = _import(client, auth_header, "x", "text/plain")
+        assert resp.status_code == 415
+
+    def test_batches_keep_rollups_consistent(self, client, auth_header, monkeypatch):
+        monkeypatch.setattr(importer, "BATCH_SIZE", 7)
+        rows = [{"amount": i + 1, "category": ["Food", "Rent"][i % 2], "date": f"2025-0{i % 3 + 1}-10", "type": "expense"} for i in range(50)]
+        assert _import(client, auth_header, json.dumps(rows), "application/json").get_json()["imported"] == 50
+        assert rollups.verify() == []
+
+    def test_batch_inserts_reach_engine_hooks(self, client, auth_header, count_queries, monkeypatch):
+        monkeypatch.setattr(importer, "BATCH_SIZE", 7)
+        rows = [{"amount": 1, "category": "Food", "date": "2025-01-10", "type": "expense"}] * 20
+        with count_queries() as statements:
+            _import(client, auth_header, json.dumps(rows), "application/json")
+        assert sum(s.startswith("INSERT INTO transactions (") for s in statements) == 3
+
+
+class TestImportSearchIndex:
+    def test_imported_rows_are_searchable_and_trigger_restored(self, client, auth_header):
+        body = "Date,Type,Category,Amount,Description\n2025-01-15,expense,Food,10,Imported groceries\n"
+        _import(client, auth_header, body, "text/csv")
+        client.post("/api/transactions", json={"amount": 3, "category": "Food", "date": "2025-01-16", "type": "expense", "description": "Fresh groceries"}, headers=auth_header)
+        data = client.get("/api/transactions?search=groceries", headers=auth_header).get_json()
+        assert data["total"] == 2
+
+    def test_failed_import_keeps_trigger(self, client, auth_header):
+        _import(client, auth_header, '[{"amount": 1, "category": "Food", "date": "2025-01-15", "type": "expense"}, x', "application/json")
+        client.post("/api/transactions", json={"amount": 3, "category": "Food", "date": "2025-01-16", "type": "expense", "description": "Bakery"}, headers=auth_header)
+        assert client.get("/api/transactions?search=bakery", headers=auth_header).get_json()["total"] == 1
+
+
+class TestJsonStreamParser:
+    @pytest.mark.parametrize("read_size", [1, 3, 17, 4096])
+    def test_parses_across_chunk_boundaries(self, monkeypatch, read_size):
+        monkeypatch.setattr(importer, "READ_SIZE", read_size)
+        items = [{"amount": 12345, "note": "café ☃"}, [1, 2], 3.5, "s", None, {}]
+        body = " [ " + " ,\n ".join(json.dumps(i, ensure_ascii=False) for i in items) + " ] "
+        assert list(importer.iter_json_records(io.BytesIO(body.encode("utf-8")))) == items
+
+    def test_empty_array(self):
+        assert list(importer.iter_json_records(io.BytesIO(b" [ ] "))) == []
+
+    @pytest.mark.parametrize("body", [b"[1,]", b"[1 2]", b"[1", b"", b"{}"])
+    def test_malformed(self, body):
+        with pytest.raises(ValueError):
+            list(importer.iter_json_records(io.BytesIO(body)))
@@ -0,0 +1,225 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, event, inspect
+
+from models import db
+import migrations
+import search
+
+
+def _query_plans(client, url, headers):
+    """Run a request and return the SQLite query plan of every SELECT it issued.
+
+    The primary-key lookups of the token's revocation and the user's data
+    version (for ETags) are skipped.
+    """
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not any(
+            skipped in statement for skipped in ("data_version", "revoked_tokens")
+        ):
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        assert client.get(url, headers=headers).status_code == 200
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    conn = db.session.connection()
+    return [
+        " | ".join(row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+        for statement, parameters in captured
+    ]
+
+
+@pytest.fixture
+def populated(client, auth_header, create_transaction):
+    if db.engine.dialect.name != "sqlite":
+        pytest.skip("query plan assertions are written for SQLite")
+    for i in range(30):
+        create_transaction(auth_header, amount=i + 1, category=["Food", "Rent"][i % 2], date=f"2025-0{i % 6 + 1}-1{i % 9}")
+    client.post("/api/budgets", json={"category": "Food", "limit_amount": 100, "month": "2025-01"}, headers=auth_header)
+    return auth_header
+
+
+class TestQueryPlans:
+    def test_list_by_date_uses_user_date_index(self, client, populated):
+        plans = _query_plans(client, "/api/transactions", populated)
+        assert any("ix_transactions_user_date" in plan for plan in plans)
+        assert not any("SCAN transactions" == p.strip() for plan in plans for p in plan.split("|"))
+
+    def test_list_by_category_uses_category_index(self, client, populated):
+        plans = _query_plans(client, "/api/transactions?category=Food", populated)
+        assert all("USING" in plan and "INDEX ix_transactions_user_" in plan for plan in plans)
+
+    def test_list_sorted_by_amount_uses_amount_index(self, client, populated):
+        plans = _query_plans(client, "/api/transactions?sort_by=amount", populated)
+        assert any("ix_transactions_user_amount" in plan for plan in plans)
+
+    def test_dashboard_uses_indexes(self, client, populated):
+        plans = _query_plans(client, "/api/dashboard", populated)
+        assert any("ix_transactions_user_date" in plan for plan in plans)
+        assert any("sqlite_autoindex_monthly_rollups_1" in plan for plan in plans)
+
+    def test_budgets_use_unique_index(self, client, populated):
+        plans = _query_plans(client, "/api/budgets", populated)
+        assert len(plans) == 1
+        assert "ux_budgets_user_category_month" in plans[0]
+        assert "sqlite_autoindex_monthly_rollups_1" in plans[0]
+
+
+class TestMigrations:
+    LEGACY_SCHEMA = [
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(80) UNIQUE NOT NULL, password_hash TEXT NOT NULL, created_at DATETIME)",
+        "CREATE TABLE transactions (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, amount FLOAT NOT NULL, category VARCHAR(50) NOT NULL, description TEXT, date DATE NOT NULL, type VARCHAR(10) NOT NULL)",
+        "CREATE TABLE budgets (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, category VARCHAR(50) NOT NULL, limit_amount FLOAT NOT NULL, month VARCHAR(7) NOT NULL)",
+        "CREATE TABLE goals (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, target_amount FLOAT NOT NULL, current_amount FLOAT, deadline VARCHAR(10), icon VARCHAR(10), created_at DATETIME)",
+    ]
+
+    def _legacy_engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{os.path.join(tmp_path, 'legacy.db')}")
+        with engine.begin() as conn:
+            for ddl in self.LEGACY_SCHEMA:
+                conn.exec_driver_sql(ddl)
+        return engine
+
+    def test_upgrade_adds_indexes_to_existing_database(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        assert migrations.upgrade(engine) == [v for v, _, _ in migrations.MIGRATIONS]
+        inspector = inspect(engine)
+        names = {ix["name"] for ix in inspector.get_indexes("transactions")}
+        assert {"ix_transactions_user_date", "ix_transactions_user_type_category_date"} <= names
+        unique = {ix["name"]: ix["unique"] for ix in inspector.get_indexes("budgets")}
+        assert unique["ux_budgets_user_category_month"]
+        engine.dispose()
+
+    def test_upgrade_backfills_search_index(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO transactions (user_id, amount, category, description, date, type) VALUES (1, 5, 'Food', 'Coffee shop', '2025-01-01', 'expense')")
+        migrations.upgrade(engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO transactions (user_id, amount_cents, category, description, date, type) VALUES (1, 900, 'Food', 'Coffee beans', '2025-01-02', 'expense')")
+            hits = conn.exec_driver_sql("SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH 'coffee'").all()
+        assert sorted(r[0] for r in hits) == [1, 2]
+        engine.dispose()
+
+    def test_upgrade_scopes_search_index_by_user(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        migrations.upgrade(engine)
+        with engine.begin() as conn:
+            # The index as migration 2 first created it, without user_id.
+            for statement in search.SQLITE_DROP:
+                conn.exec_driver_sql(statement)
+            conn.exec_driver_sql(
+                "CREATE VIRTUAL TABLE transactions_fts USING fts5(description, category, content='transactions', content_rowid='id')"
+            )
+            conn.exec_driver_sql("DELETE FROM schema_migrations WHERE version = 9")
+            for user_id in (1, 2):
+                conn.exec_driver_sql(
+                    "INSERT INTO transactions (user_id, amount_cents, category, description, date, type) "
+                    f"VALUES ({user_id}, 500, 'Food', 'Coffee shop', '2025-01-01', 'expense')"
+                )
+        assert migrations.upgrade(engine) == [9]
+        with engine.begin() as conn:
+            hits = conn.exec_driver_sql(
+                "SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH ?", (search.fts_query(["coffee"], user_id=2),)
+            ).all()
+        assert [r[0] for r in hits] == [2]
+        engine.dispose()
+
+    def test_upgrade_is_idempotent(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        migrations.upgrade(engine)
+        assert migrations.upgrade(engine) == []
+        engine.dispose()
+
+    def test_duplicate_budgets_block_unique_index(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        with engine.begin() as conn:
+            for _ in range(2):
+                conn.exec_driver_sql("INSERT INTO budgets (user_id, category, limit_amount, month) VALUES (1, 'Food', 10, '2025-01')")
+        with pytest.raises(RuntimeError, match="duplicate budgets"):
+            migrations.upgrade(engine)
+        engine.dispose()
+
+    def test_upgrade_converts_money_to_cents(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO transactions (user_id, amount, category, description, date, type) VALUES (1, 0.1, 'Food', '', '2025-01-01', 'expense')")
+            conn.exec_driver_sql("INSERT INTO transactions (user_id, amount, category, description, date, type) VALUES (1, 19.99, 'Food', '', '2025-01-02', 'expense')")
+            conn.exec_driver_sql("INSERT INTO budgets (user_id, category, limit_amount, month) VALUES (1, 'Food', 250.5, '2025-01')")
+            conn.exec_driver_sql("INSERT INTO goals (user_id, name, target_amount, current_amount) VALUES (1, 'Trip', 1000, NULL)")
+        migrations.upgrade(engine)
+        inspector = inspect(engine)
+        columns = {col["name"] for col in inspector.get_columns("transactions")}
+        assert "amount_cents" in columns and "amount" not in columns
+        assert "ix_transactions_user_amount" in {ix["name"] for ix in inspector.get_indexes("transactions")}
+        with engine.begin() as conn:
+            assert conn.exec_driver_sql("SELECT sum(amount_cents) FROM transactions").scalar() == 2009
+            assert conn.exec_driver_sql("SELECT limit_cents FROM budgets").scalar() == 25050
+            assert conn.exec_driver_sql("SELECT target_cents, current_cents FROM goals").one() == (100000, None)
+        engine.dispose()
+
+    def test_upgrade_adds_user_data_version(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO users (username, password_hash) VALUES ('old', 'x')")
+        migrations.upgrade(engine)
+        with engine.begin() as conn:
+            assert conn.exec_driver_sql("SELECT data_version FROM users").scalar() == 0
+        engine.dispose()
+
+    def test_upgrade_adds_currencies(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO users (username, password_hash) VALUES ('old', 'x')")
+            conn.exec_driver_sql("INSERT INTO transactions (user_id, amount, category, description, date, type) VALUES (1, 5, 'Food', '', '2025-01-01', 'expense')")
+        migrations.upgrade(engine)
+        with engine.begin() as conn:
+            assert conn.exec_driver_sql("SELECT base_currency FROM users").scalar() == "USD"
+            assert conn.exec_driver_sql("SELECT currency FROM transactions").scalar() == "USD"
+        engine.dispose()
+
+    def test_upgrade_links_transactions_to_rules(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        migrations.upgrade(engine)
+        inspector = inspect(engine)
+        assert "rule_id" in {col["name"] for col in inspector.get_columns("transactions")}
+        unique = {ix["name"]: ix["unique"] for ix in inspector.get_indexes("transactions")}
+        assert unique["ix_transactions_rule_date"]
+        engine.dispose()
+
+    def test_upgrade_adds_budget_alert_thresholds(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO budgets (user_id, category, limit_amount, month) VALUES (1, 'Food', 10, '2025-01')")
+        migrations.upgrade(engine)
+        with engine.begin() as conn:
+            assert conn.exec_driver_sql("SELECT alert_thresholds FROM budgets").scalar() == "80,100"
+        engine.dispose()
+
+    def test_upgrade_adds_goal_ledger(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO goals (user_id, name, target_amount, current_amount) VALUES (1, 'Trip', 1000, 250)")
+        migrations.upgrade(engine)
+        inspector = inspect(engine)
+        assert "goal_id" in {col["name"] for col in inspector.get_columns("transactions")}
+        assert "ix_transactions_goal_date" in {ix["name"] for ix in inspector.get_indexes("transactions")}
+        with engine.begin() as conn:
+            assert conn.exec_driver_sql("SELECT opening_cents, current_cents FROM goals").one() == (25000, 25000)
+        engine.dispose()
+
+    def test_upgrade_adds_fx_rates_version(self, tmp_path):
+        engine = self._legacy_engine(tmp_path)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE TABLE fx_rates (currency VARCHAR(3) NOT NULL, date DATE NOT NULL, rate FLOAT NOT NULL, PRIMARY KEY (currency, date))")
+            conn.exec_driver_sql("INSERT INTO fx_rates VALUES ('USD', '2025-01-02', 1.1)")
+        migrations.upgrade(engine)
+        assert "ix_fx_rates_version" in {ix["name"] for ix in inspect(engine).get_indexes("fx_rates")}
+        with engine.begin() as conn:
+            assert conn.exec_driver_sql("SELECT version FROM fx_rates").scalar() == 0
+        engine.dispose()
@@ -0,0 +1,136 @@
+import logging
+import re
+
+from app import create_app
+import metrics
+from models import db
+
+
+def _sample(text, name, **labels):
+    """Return the value of the sample ``name{labels}`` in a Prometheus text page, or None."""
+    for line in text.splitlines():
+        match = re.fullmatch(rf"{name}(?:\{{(.*)\}})? (\S+)", line)
+        if match and all(f'{k}="{v}"' in (match.group(1) or "").split(",") for k, v in labels.items()):
+            return float(match.group(2))
+    return None
+
+
+def _scrape(client, **kwargs):
+    resp = client.get("/metrics", **kwargs)
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    return resp.get_data(as_text=True)
+
+
+class TestRegistry:
+    def test_histogram_buckets_are_cumulative(self):
+        registry = metrics.Registry()
+        stats = metrics.RequestStats()
+        for seconds in (0.004, 0.02, 0.02, 20):
+            registry.observe("GET", "/x", 200, seconds, stats, 10)
+        text = registry.render()
+        assert _sample(text, "http_request_duration_seconds_bucket", route="/x", le="0.005") == 1
+        assert _sample(text, "http_request_duration_seconds_bucket", route="/x", le="0.025") == 3
+        assert _sample(text, "http_request_duration_seconds_bucket", route="/x", le="10") == 3
+        assert _sample(text, "http_request_duration_seconds_bucket", route="/x", le="+Inf") == 4
+        assert _sample(text, "http_request_duration_seconds_count", route="/x") == 4
+        assert _sample(text, "http_requests_total", route="/x", status="200") == 4
+
+    def test_label_values_are_escaped(self):
+        registry = metrics.Registry()
+        registry.observe("GET", 'a"b\\c', 200, 0.01, metrics.RequestStats(), None)
+        assert 'route="a\\"b\\\\c"' in registry.render()
+
+
+class TestRequestMetrics:
+    def test_routes_statements_and_sizes(self, client, auth_header):
+        client.post("/api/budgets", json={"category": "Food", "limit_amount": 100, "month": "2025-01"}, headers=auth_header)
+        for _ in range(3):
+            client.get("/api/budgets", headers=auth_header)
+        client.delete("/api/budgets/999", headers=auth_header)
+        client.get("/api/nope")
+        text = _scrape(client)
+        assert _sample(text, "http_requests_total", method="GET", route="/api/budgets", status="200") == 3
+        assert _sample(text, "http_requests_total", method="DELETE", route="/api/budgets/<int:budget_id>", status="404") == 1
+        assert _sample(text, "http_requests_total", method="GET", route="unmatched", status="404") == 1
+        # Each GET is the revocation and ETag version lookups, then the joined budget query (or a cache hit).
+        statements = _sample(text, "http_request_sql_statements_sum", method="GET", route="/api/budgets")
+        assert 6 <= statements <= 9
+        assert _sample(text, "http_request_sql_seconds_total", method="GET", route="/api/budgets") > 0
+        assert _sample(text, "http_request_sql_rows_total", method="POST", route="/api/budgets") >= 1
+        assert _sample(text, "http_response_size_bytes_count", method="GET", route="/api/budgets") == 3
+
+    def test_server_timing_is_opt_in(self, app, client, auth_header):
+        assert "Server-Timing" not in client.get("/api/goals", headers=auth_header).headers
+        app.config["SERVER_TIMING"] = True
+        header = client.get("/api/goals", headers=auth_header).headers["Server-Timing"]
+        assert re.fullmatch(r'app;dur=[\d.]+, sql;dur=[\d.]+;desc="\d+ statements"', header)
+
+    def test_slow_requests_are_logged_with_sql(self, app, client, auth_header, caplog):
+        client.get("/api/goals", headers=auth_header)
+        assert not [r for r in caplog.records if "Slow request" in r.getMessage()]
+        app.config["SLOW_REQUEST_MS"] = 0.001
+        with caplog.at_level(logging.WARNING):
+            client.get("/api/goals?x=1", headers=auth_header)
+        [record] = [r for r in caplog.records if "Slow request" in r.getMessage()]
+        message = record.getMessage()
+        assert message.startswith("Slow request: GET /api/goals?x=1 took")
+        assert "SELECT users.data_version FROM users" in message
+        assert "FROM goals LEFT OUTER JOIN transactions" in message
+
+    def test_sql_outside_requests_is_not_counted(self, client):
+        _scrape(client)
+        db.session.execute(db.text("SELECT 1"))
+        # Only the first scrape is recorded by the time the second renders, and it ran no SQL.
+        assert _sample(_scrape(client), "http_request_sql_statements_sum", route="/metrics") == 0
+
+    def test_token(self, app, client):
+        app.config["METRICS_TOKEN"] = "s3cret"
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        _scrape(client, headers={"Authorization": "Bearer s3cret"})
+
+    def test_can_be_disabled(self):
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "METRICS_ENABLED": "0"})
+        assert metrics.EXTENSION_KEY not in app.extensions
+        assert app.test_client().get("/metrics").status_code == 404
+
+
+class TestCollectors:
+    def test_auth_counters(self, client, auth_header):
+        client.get("/api/goals", headers=auth_header)
+        client.get("/api/goals", headers=auth_header)
+        client.post("/api/logout", headers=auth_header)
+        client.get("/api/goals", headers=auth_header)
+        text = _scrape(client)
+        assert "# TYPE auth_token_cache_hits_total counter" in text
+        assert _sample(text, "auth_token_cache_misses_total") == 1
+        assert _sample(text, "auth_token_cache_hits_total") == 2
+        assert _sample(text, "auth_revoked_tokens_rejected_total") == 1
+        assert _sample(text, "auth_token_cache_size") == 0
+
+    def test_password_hasher_gauges(self, app, client):
+        client.post("/api/signup", json={"username": "metered", "password": "password123"})
+        app.extensions["password_hasher"].queue_limit = 0
+        client.post("/api/login", json={"username": "metered", "password": "password123"})
+        text = _scrape(client)
+        assert "# TYPE password_hash_pending gauge" in text
+        assert _sample(text, "password_hash_pending") == 0
+        assert _sample(text, "password_hash_max_pending") == 1
+        assert _sample(text, "password_hash_completed_total") == 1
+        assert _sample(text, "password_hash_rejected_total") == 1
+
+    def test_response_cache_counters(self, client, auth_header):
+        client.get("/api/dashboard", headers=auth_header)
+        client.get("/api/dashboard", headers=auth_header)
+        client.post("/api/transactions", json={"amount": 5, "category": "Food", "date": "2025-01-01", "type": "expense"},
+                    headers=auth_header)
+        text = _scrape(client)
+        assert _sample(text, "response_cache_hits_total") == 1
+        assert _sample(text, "response_cache_misses_total") == 1
+        assert _sample(text, "response_cache_invalidations_total") == 1
+        assert _sample(text, "response_cache_entries") == 1
+
+    def test_disabled_cache_has_no_samples(self):
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "RESPONSE_CACHE": "none"})
+        assert "response_cache_" not in app.test_client().get("/metrics").get_data(as_text=True)
@@ -0,0 +1,62 @@
+from decimal import Decimal
+from functools import partial
+
+import pytest
+
+from models import db, Transaction
+from money import to_cents, to_decimal
+
+
+@pytest.fixture
+def create_transaction(create_transaction):
+    return partial(create_transaction, amount=0.1, description="Coffee")
+
+
+class TestParsing:
+    @pytest.mark.parametrize("value,expected", [
+        (0.1, "0.10"), (12, "12.00"), ("19.99", "19.99"), (" 5.5 ", "5.50"),
+        (0.125, "0.13"), ("2.345", "2.35"), (1e15, "1000000000000000.00"),
+    ])
+    def test_to_decimal(self, value, expected):
+        assert to_decimal(value) == Decimal(expected)
+
+    @pytest.mark.parametrize("value", ["abc", "", "NaN", "Infinity", float("inf"), True, None, [1]])
+    def test_rejects(self, value):
+        with pytest.raises((ValueError, TypeError)):
+            to_decimal(value)
+
+    def test_to_cents(self):
+        assert to_cents(19.99) == 1999
+        assert to_cents("-0.01") == -1
+
+
+class TestStorage:
+    def test_amount_is_stored_as_cents(self, client, auth_header, create_transaction):
+        txn = create_transaction(auth_header, amount=19.999).get_json()["transaction"]
+        assert txn["amount"] == 20.0
+        assert db.session.execute(db.text("SELECT amount_cents FROM transactions")).scalar() == 2000
+        assert Transaction.query.one().amount == Decimal("20.00")
+
+    def test_rejects_non_numeric_amounts(self, client, auth_header, create_transaction):
+        for amount in ["NaN", "Infinity", True]:
+            assert create_transaction(auth_header, amount=amount).status_code == 400
+
+
+class TestExactTotals:
+    def test_float_drift_does_not_reach_totals(self, client, auth_header, create_transaction):
+        # Summed as floats, a thousand 0.1s come to 99.9999999999986.
+        client.post("/api/transactions/import", json=[
+            {"amount": 0.1, "category": "Food", "date": "2025-01-15", "type": "expense"},
+        ] * 999, headers=auth_header)
+        create_transaction(auth_header)
+        assert client.get("/api/dashboard", headers=auth_header).get_json()["category_spending"] == {"Food": 100.0}
+        analytics_rows = client.get("/api/analytics?group_by=category", headers=auth_header).get_json()["rows"]
+        assert analytics_rows == [{"category": "Food", "sum": 100.0, "count": 1000}]
+
+    def test_budget_spending(self, client, auth_header, create_transaction):
+        client.post("/api/budgets", json={"category": "Food", "limit_amount": 0.3, "month": "2025-01"}, headers=auth_header)
+        for _ in range(3):
+            create_transaction(auth_header)
+        [budget] = client.get("/api/budgets?month=2025-01", headers=auth_header).get_json()["budgets"]
+        assert budget["spent"] == 0.3
+        assert budget["percentage"] == 100.0
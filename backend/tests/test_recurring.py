@@ -0,0 +1,184 @@
+import time
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+import recurring
+import rollups
+from models import db, RecurringRule, Transaction, User
+from run_recurring import main
+
+
+def _rule(frequency="monthly", start=date(2025, 1, 31), interval=1, day_of_month=None, end=None):
+    return SimpleNamespace(frequency=frequency, interval=interval, day_of_month=day_of_month, start_date=start, end_date=end)
+
+
+def _create_rule(client, auth_header, **overrides):
+    data = {
+        "amount": 1200,
+        "category": "Rent",
+        "description": "Flat",
+        "type": "expense",
+        "start_date": "2025-01-01",
+        "frequency": "monthly",
+    }
+    data.update(overrides)
+    return client.post("/api/recurring", json=data, headers=auth_header)
+
+
+def _add_rules(user_id, count, start=date(2025, 1, 1)):
+    rules = [
+        RecurringRule(user_id=user_id, amount=10, category="Rent", type="expense", frequency="monthly",
+                      start_date=start, next_date=start)
+        for _ in range(count)
+    ]
+    db.session.add_all(rules)
+    db.session.commit()
+    return rules
+
+
+def _user_id(username="testuser"):
+    return db.session.query(User.id).filter_by(username=username).scalar()
+
+
+class TestOccurrences:
+    def test_month_end_is_clamped(self):
+        rule = _rule()
+        dates = [rule.start_date]
+        for _ in range(3):
+            dates.append(recurring.following(rule, dates[-1]))
+        assert dates == [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)]
+
+    def test_leap_day_yearly(self):
+        rule = _rule("yearly", start=date(2024, 2, 29))
+        assert recurring.following(rule, date(2024, 2, 29)) == date(2025, 2, 28)
+        assert recurring.following(_rule("yearly", start=date(2024, 2, 29), interval=4), date(2024, 2, 29)) == date(2028, 2, 29)
+
+    def test_weekly_and_daily(self):
+        assert recurring.following(_rule("weekly", interval=2), date(2025, 1, 6)) == date(2025, 1, 20)
+        assert recurring.following(_rule("daily", interval=3), date(2025, 12, 30)) == date(2026, 1, 2)
+
+    def test_first_occurrence_on_day_of_month(self):
+        assert recurring.first_occurrence(_rule(start=date(2025, 1, 10), day_of_month=5)) == date(2025, 2, 5)
+        assert recurring.first_occurrence(_rule(start=date(2025, 2, 10), day_of_month=31)) == date(2025, 2, 28)
+        assert recurring.first_occurrence(_rule(start=date(2025, 1, 10), day_of_month=5, end=date(2025, 1, 31))) is None
+
+    def test_stops_at_end_date(self):
+        rule = _rule(start=date(2025, 1, 15), end=date(2025, 3, 15))
+        rule.next_date = rule.start_date
+        assert recurring._occurrences(rule, date(2025, 12, 31)) == ([date(2025, 1, 15), date(2025, 2, 15), date(2025, 3, 15)], None)
+
+
+class TestMaterialize:
+    def test_rerun_inserts_nothing(self, client, auth_header):
+        [rule] = _add_rules(_user_id(), 1)
+        assert recurring.materialize(date(2025, 3, 15)) == (1, 3)
+        assert recurring.materialize(date(2025, 3, 15)) == (0, 0)
+        assert db.session.get(RecurringRule, rule.id).next_date == date(2025, 4, 1)
+        assert recurring.materialize(date(2025, 4, 1)) == (1, 1)
+        assert Transaction.query.filter_by(rule_id=rule.id).count() == 4
+        assert rollups.verify() == []
+
+    def test_existing_occurrences_are_skipped(self, client, auth_header):
+        # A run that crashed after inserting but before advancing next_date.
+        [rule] = _add_rules(_user_id(), 1)
+        recurring.materialize(date(2025, 2, 1))
+        db.session.get(RecurringRule, rule.id).next_date = date(2025, 1, 1)
+        db.session.commit()
+        assert recurring.materialize(date(2025, 3, 1)) == (1, 1)
+        assert Transaction.query.filter_by(rule_id=rule.id).count() == 3
+        assert rollups.verify() == []
+
+    def test_commits_per_chunk(self, client, auth_header, monkeypatch):
+        _add_rules(_user_id(), 5)
+        calls = []
+        original = recurring._materialize_chunk
+
+        def failing_third_chunk(rules, today):
+            calls.append(len(rules))
+            if len(calls) == 3:
+                raise RuntimeError("worker died")
+            return original(rules, today)
+
+        monkeypatch.setattr(recurring, "_materialize_chunk", failing_third_chunk)
+        with pytest.raises(RuntimeError):
+            recurring.materialize(date(2025, 1, 1), chunk_size=2)
+        db.session.rollback()
+        assert Transaction.query.count() == 4
+        monkeypatch.undo()
+        assert recurring.materialize(date(2025, 1, 1), chunk_size=2) == (1, 1)
+        assert Transaction.query.count() == 5
+        assert rollups.verify() == []
+
+    def test_limited_to_one_user(self, client, auth_header, second_auth_header):
+        _add_rules(_user_id(), 1)
+        _add_rules(_user_id("testuser2"), 1)
+        assert recurring.materialize(date(2025, 1, 1), user_id=_user_id()) == (1, 1)
+        assert recurring.materialize(date(2025, 1, 1)) == (1, 1)
+
+    def test_bumps_owner_versions(self, client, auth_header, second_auth_header):
+        _add_rules(_user_id(), 1)
+        versions = dict(db.session.query(User.username, User.data_version))
+        recurring.materialize(date(2025, 1, 1))
+        after = dict(db.session.query(User.username, User.data_version))
+        assert after == {"testuser": versions["testuser"] + 1, "testuser2": versions["testuser2"]}
+
+    def test_cli(self, app, client, auth_header, capsys):
+        _add_rules(_user_id(), 2)
+        assert main(app, ["--date", "2025-02-01"]) == 0
+        assert "Materialized 4 transactions from 2 due rules" in capsys.readouterr().out
+
+
+class TestRecurringApi:
+    def test_create_materializes_due_occurrences(self, client, auth_header):
+        resp = _create_rule(client, auth_header, start_date="2025-01-31")
+        assert resp.status_code == 201
+        rule = resp.get_json()["rule"]
+        assert (rule["amount"], rule["frequency"], rule["interval"]) == (1200, "monthly", 1)
+        assert date.fromisoformat(rule["next_date"]) > date.today()
+        dates = [d for (d,) in db.session.query(Transaction.date).order_by(Transaction.date).limit(3)]
+        assert dates == [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)]
+        [listed] = client.get("/api/recurring", headers=auth_header).get_json()["rules"]
+        assert listed["id"] == rule["id"]
+        assert rollups.verify() == []
+
+    def test_future_rule_waits(self, client, auth_header):
+        _create_rule(client, auth_header, start_date="2999-01-01")
+        assert Transaction.query.count() == 0
+
+    @pytest.mark.parametrize("overrides", [
+        {"frequency": "hourly"},
+        {"interval": 0},
+        {"interval": "2"},
+        {"day_of_month": 32},
+        {"frequency": "weekly", "day_of_month": 3},
+        {"end_date": "2024-12-31"},
+        {"start_date": None},
+        {"amount": -5},
+    ])
+    def test_rejects_invalid_rules(self, client, auth_header, overrides):
+        assert _create_rule(client, auth_header, **overrides).status_code == 400
+
+    def test_delete_keeps_transactions(self, client, auth_header, second_auth_header):
+        rule = _create_rule(client, auth_header, start_date="2025-01-01", end_date="2025-02-01").get_json()["rule"]
+        assert client.delete(f"/api/recurring/{rule['id']}", headers=second_auth_header).status_code == 404
+        assert client.delete(f"/api/recurring/{rule['id']}", headers=auth_header).status_code == 200
+        assert client.get("/api/recurring", headers=auth_header).get_json()["rules"] == []
+        assert [t.rule_id for t in Transaction.query] == [None, None]
+
+
+class TestScheduler:
+    def test_runs_until_stopped(self, app, client, auth_header):
+        _add_rules(_user_id(), 1, start=date.today())
+        app.config["RECURRING_INTERVAL_SECONDS"] = 0.01
+        scheduler = recurring.init_scheduler(app)
+        deadline = time.monotonic() + 5
+        while scheduler.runs < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        scheduler.stop(timeout=5)
+        assert scheduler.runs >= 2
+        assert Transaction.query.count() == 1
+
+    def test_off_by_default(self, app):
+        assert recurring.init_scheduler(app) is None
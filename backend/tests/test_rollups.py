@@ -0,0 +1,55 @@
+from models import db, MonthlyRollup, Transaction
+import rollups
+
+
+def _rollup_map():
+    return {(r.month, r.type, r.category): (r.total, r.count) for r in MonthlyRollup.query}
+
+
+class TestRollupMaintenance:
+    def test_create_updates_rollup(self, client, auth_header, create_transaction):
+        create_transaction(auth_header, amount=20)
+        create_transaction(auth_header, amount=30)
+        create_transaction(auth_header, amount=5, date="2025-02-01")
+        assert _rollup_map() == {
+            ("2025-01", "expense", "Food"): (50, 2),
+            ("2025-02", "expense", "Food"): (5, 1),
+        }
+
+    def test_delete_updates_rollup(self, client, auth_header, create_transaction):
+        first = create_transaction(auth_header, amount=20).get_json()["transaction"]["id"]
+        create_transaction(auth_header, amount=30)
+        client.delete(f"/api/transactions/{first}", headers=auth_header)
+        assert _rollup_map() == {("2025-01", "expense", "Food"): (30, 1)}
+
+    def test_delete_last_transaction_removes_row(self, client, auth_header, create_transaction):
+        txn_id = create_transaction(auth_header).get_json()["transaction"]["id"]
+        client.delete(f"/api/transactions/{txn_id}", headers=auth_header)
+        assert MonthlyRollup.query.count() == 0
+
+
+class TestRebuildAndVerify:
+    def test_verify_clean(self, client, auth_header, create_transaction):
+        create_transaction(auth_header)
+        create_transaction(auth_header, type="income", category="Salary", amount=1000)
+        assert rollups.verify() == []
+
+    def test_verify_detects_drift_and_rebuild_fixes_it(self, client, auth_header, create_transaction):
+        create_transaction(auth_header)
+        txn = Transaction.query.one()
+        db.session.add(Transaction(user_id=txn.user_id, amount=7, category="Food", date=txn.date, type="expense"))
+        db.session.commit()
+        mismatches = rollups.verify()
+        assert len(mismatches) == 1
+        assert mismatches[0][1] == (57, 2)
+        rollups.rebuild()
+        db.session.commit()
+        assert rollups.verify() == []
+        assert _rollup_map() == {("2025-01", "expense", "Food"): (57, 2)}
+
+    def test_dashboard_reads_rollups(self, client, auth_header, create_transaction):
+        create_transaction(auth_header, amount=40)
+        MonthlyRollup.query.update({MonthlyRollup.total: 999})
+        db.session.commit()
+        data = client.get("/api/dashboard", headers=auth_header).get_json()
+        assert data["expenses"] == 999
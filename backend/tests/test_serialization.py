@@ -0,0 +1,98 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+import serialization
+from models import Transaction
+from serialization import TRANSACTION_FIELDS
+
+
+def _add(client, auth_header, **overrides):
+    data = {"amount": 12.34, "category": "Food", "description": "Lunch", "date": "2025-03-05", "type": "expense"}
+    data.update(overrides)
+    return client.post("/api/transactions", json=data, headers=auth_header).get_json()
+
+
+def _seed(client, auth_header):
+    _add(client, auth_header)
+    _add(client, auth_header, amount=2500, category="Salary", description="Pay", date="2025-03-01", type="income")
+    _add(client, auth_header, amount=7, category="Transport", description="", date="2025-02-20")
+
+
+class TestTransactionRows:
+    def test_rows_match_to_dict(self, app, client, auth_header):
+        _seed(client, auth_header)
+        body = client.get("/api/transactions", headers=auth_header).get_json()
+        with app.app_context():
+            expected = [t.to_dict() for t in Transaction.query.order_by(Transaction.date.desc())]
+        assert body["transactions"] == expected
+
+    def test_columns_format(self, client, auth_header):
+        _seed(client, auth_header)
+        rows = client.get("/api/transactions?sort_by=amount", headers=auth_header).get_json()
+        body = client.get("/api/transactions?sort_by=amount&format=columns", headers=auth_header).get_json()
+        columns = body["transactions"]
+        assert set(columns) == set(TRANSACTION_FIELDS)
+        assert columns == {field: [row[field] for row in rows["transactions"]] for field in TRANSACTION_FIELDS}
+        assert columns["amount"] == [2500, 12.34, 7]
+        assert (body["total"], body["page"]) == (rows["total"], rows["page"])
+
+    def test_columns_format_empty(self, client, auth_header):
+        body = client.get("/api/transactions?format=columns", headers=auth_header).get_json()
+        assert body["transactions"] == {field: [] for field in TRANSACTION_FIELDS}
+
+    def test_columns_with_keyset_pages(self, client, auth_header):
+        _seed(client, auth_header)
+        first = client.get("/api/transactions?format=columns&per_page=2&cursor=", headers=auth_header).get_json()
+        assert first["transactions"]["date"] == ["2025-03-05", "2025-03-01"]
+        rest = client.get(f"/api/transactions?format=columns&per_page=2&cursor={first['next_cursor']}", headers=auth_header)
+        assert rest.get_json()["transactions"]["date"] == ["2025-02-20"]
+
+    def test_unknown_format(self, client, auth_header):
+        resp = client.get("/api/transactions?format=csv", headers=auth_header)
+        assert resp.status_code == 400
+        assert client.get("/api/dashboard?format=csv", headers=auth_header).status_code == 400
+
+
+class TestDashboardColumns:
+    def test_charts_as_columns(self, client, auth_header):
+        _seed(client, auth_header)
+        rows = client.get("/api/dashboard", headers=auth_header).get_json()
+        body = client.get("/api/dashboard?format=columns", headers=auth_header).get_json()
+        monthly = body["monthly_data"]
+        assert set(monthly) == {"month", "income", "expenses"}
+        assert monthly["month"] == [m["month"] for m in rows["monthly_data"]]
+        assert monthly["expenses"] == [m["expenses"] for m in rows["monthly_data"]]
+        recent = body["recent_transactions"]
+        assert recent["id"] == [t["id"] for t in rows["recent_transactions"]]
+        assert (body["balance"], body["category_spending"]) == (rows["balance"], rows["category_spending"])
+
+
+class TestJSONProvider:
+    def test_native_dates_and_decimals(self, app):
+        payload = {"day": date(2025, 1, 2), "at": datetime(2025, 1, 2, 3, 4, 5), "amount": Decimal("1.50"), 3: "int key"}
+        with app.app_context():
+            body = json.loads(app.json.dumps(payload))
+            response = app.json.response(payload)
+        assert body == {"day": "2025-01-02", "at": "2025-01-02T03:04:05", "amount": "1.50", "3": "int key"}
+        assert json.loads(response.get_data()) == body
+
+    def test_stdlib_fallback_matches(self, app, client, auth_header, monkeypatch):
+        _seed(client, auth_header)
+        fast = client.get("/api/transactions?format=columns", headers=auth_header).get_json()
+        monkeypatch.setattr(serialization, "orjson", None)
+        with app.app_context():
+            assert json.loads(app.json.dumps({"day": date(2025, 1, 2)})) == {"day": "2025-01-02"}
+        assert client.get("/api/transactions?format=columns", headers=auth_header).get_json() == fast
+
+    def test_request_bodies(self, client, auth_header):
+        resp = client.post("/api/transactions", data='{"amount": 5, "category": "Food", "date": "2025-01-01", "type": "expense"}',
+                           content_type="application/json", headers=auth_header)
+        assert resp.status_code == 201
+
+    @pytest.mark.skipif(serialization.orjson is None, reason="orjson not installed")
+    def test_uses_orjson(self, app):
+        with app.app_context():
+            assert app.json.dumps({"b": 1, "a": [1, 2]}) == '{"a":[1,2],"b":1}'
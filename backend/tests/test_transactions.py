@@ -1,21 +1,19 @@
-import pytest
+import base64
+import csv
+import gzip
+import io
+import json
+from datetime import date
 
+import pytest
 
-def _create_transaction(client, auth_header, **overrides):
-    data = {
-        "amount": 50.00,
-        "category": "Food",
-        "description": "Lunch",
-        "date": "2025-01-15",
-        "type": "expense",
-    }
-    data.update(overrides)
-    return client.post("/api/transactions", json=data, headers=auth_header)
+import search
+from models import db
 
 
 class TestCreateTransaction:
-    def test_create_transaction_success(self, client, auth_header):
-        resp = _create_transaction(client, auth_header)
+    def test_create_transaction_success(self, client, auth_header, create_transaction):
+        resp = create_transaction(auth_header)
         assert resp.status_code == 201
         data = resp.get_json()
         assert data["transaction"]["amount"] == 50.00
@@ -26,13 +24,13 @@ class TestCreateTransaction:
         resp = client.post("/api/transactions", json={"amount": 50}, headers=auth_header)
         assert resp.status_code == 400
 
-    def test_create_transaction_invalid_type(self, client, auth_header):
-        resp = _create_transaction(client, auth_header, type="invalid")
+    def test_create_transaction_invalid_type(self, client, auth_header, create_transaction):
+        resp = create_transaction(auth_header, type="invalid")
         assert resp.status_code == 400
         assert "Type must be" in resp.get_json()["error"]
 
-    def test_create_transaction_negative_amount(self, client, auth_header):
-        resp = _create_transaction(client, auth_header, amount=-10)
+    def test_create_transaction_negative_amount(self, client, auth_header, create_transaction):
+        resp = create_transaction(auth_header, amount=-10)
         assert resp.status_code == 400
         assert "positive" in resp.get_json()["error"]
 
@@ -49,33 +47,189 @@ class TestGetTransactions:
         assert data["transactions"] == []
         assert data["total"] == 0
 
-    def test_get_transactions_with_data(self, client, auth_header):
-        _create_transaction(client, auth_header)
-        _create_transaction(client, auth_header, amount=100, category="Transport")
+    def test_get_transactions_with_data(self, client, auth_header, create_transaction):
+        create_transaction(auth_header)
+        create_transaction(auth_header, amount=100, category="Transport")
         resp = client.get("/api/transactions", headers=auth_header)
         assert resp.status_code == 200
         assert resp.get_json()["total"] == 2
 
-    def test_get_transactions_filter_by_category(self, client, auth_header):
-        _create_transaction(client, auth_header, category="Food")
-        _create_transaction(client, auth_header, category="Transport")
+    def test_get_transactions_filter_by_category(self, client, auth_header, create_transaction):
+        create_transaction(auth_header, category="Food")
+        create_transaction(auth_header, category="Transport")
         resp = client.get("/api/transactions?category=Food", headers=auth_header)
         assert resp.status_code == 200
         data = resp.get_json()
         assert data["total"] == 1
         assert data["transactions"][0]["category"] == "Food"
 
-    def test_get_transactions_filter_by_type(self, client, auth_header):
-        _create_transaction(client, auth_header, type="expense")
-        _create_transaction(client, auth_header, type="income", category="Salary", amount=3000)
+    def test_get_transactions_filter_by_type(self, client, auth_header, create_transaction):
+        create_transaction(auth_header, type="expense")
+        create_transaction(auth_header, type="income", category="Salary", amount=3000)
         resp = client.get("/api/transactions?type=income", headers=auth_header)
         assert resp.status_code == 200
         assert resp.get_json()["total"] == 1
 
 
+class TestSearch:
+    def _seed(self, client, auth_header, create_transaction):
+        create_transaction(auth_header, description="Groceries at market", category="Food")
+        create_transaction(auth_header, description="Restaurant dinner", category="Food", date="2025-01-20")
+        create_transaction(auth_header, description="Uber ride", category="Transport")
+        create_transaction(auth_header, description="Monthly salary", category="Salary", type="income", amount=4000)
+
+    def test_search_description(self, client, auth_header, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        data = client.get("/api/transactions?search=groceries", headers=auth_header).get_json()
+        assert data["total"] == 1
+        assert data["transactions"][0]["description"] == "Groceries at market"
+
+    def test_search_prefix_and_category(self, client, auth_header, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        data = client.get("/api/transactions?search=foo", headers=auth_header).get_json()
+        assert data["total"] == 2
+        data = client.get("/api/transactions?search=rest din", headers=auth_header).get_json()
+        assert [t["description"] for t in data["transactions"]] == ["Restaurant dinner"]
+
+    def test_search_combines_with_filters(self, client, auth_header, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        data = client.get("/api/transactions?search=monthly&type=expense", headers=auth_header).get_json()
+        assert data["total"] == 0
+        data = client.get("/api/transactions?search=monthly&type=income", headers=auth_header).get_json()
+        assert data["total"] == 1
+
+    def test_search_is_per_user(self, client, auth_header, second_auth_header, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        data = client.get("/api/transactions?search=groceries", headers=second_auth_header).get_json()
+        assert data["total"] == 0
+
+    def test_index_match_is_scoped_to_the_user(self, app, client, auth_header, second_auth_header, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        create_transaction(second_auth_header, description="Groceries again", category="Food")
+        match = search.fts_query(["groceries"], user_id=2)
+        rows = db.session.execute(db.text("SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH :q"), {"q": match}).all()
+        assert [r[0] for r in rows] == [5]
+
+    def test_search_does_not_match_user_ids(self, client, auth_header, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        assert client.get("/api/transactions?search=1", headers=auth_header).get_json()["total"] == 0
+
+    def test_search_sees_deletes(self, client, auth_header, create_transaction):
+        txn_id = create_transaction(auth_header, description="Concert tickets").get_json()["transaction"]["id"]
+        client.delete(f"/api/transactions/{txn_id}", headers=auth_header)
+        create_transaction(auth_header, description="Bus pass")
+        data = client.get("/api/transactions?search=concert", headers=auth_header).get_json()
+        assert data["total"] == 0
+
+    def test_search_ignores_punctuation(self, client, auth_header, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        resp = client.get('/api/transactions?search="uber*', headers=auth_header)
+        assert resp.status_code == 200
+        assert resp.get_json()["total"] == 1
+
+    def test_search_relevance_ranking(self, client, auth_header, create_transaction):
+        create_transaction(auth_header, description="coffee", category="Food", date="2025-01-01")
+        create_transaction(auth_header, description="coffee coffee beans coffee", category="Coffee", date="2025-01-02")
+        data = client.get("/api/transactions?search=coffee&sort_by=relevance", headers=auth_header).get_json()
+        assert data["transactions"][0]["category"] == "Coffee"
+
+    def test_search_with_cursor(self, client, auth_header, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        data = client.get("/api/transactions?search=food&cursor=&per_page=1", headers=auth_header).get_json()
+        assert data["transactions"][0]["description"] == "Restaurant dinner"
+        data = client.get(f"/api/transactions?search=food&cursor={data['next_cursor']}&per_page=1", headers=auth_header).get_json()
+        assert data["transactions"][0]["description"] == "Groceries at market"
+        assert data["next_cursor"] is None
+
+
+class TestCursorPagination:
+    def _seed(self, client, auth_header, create_transaction):
+        amounts = [12, 5, 30, 5, 18, 7, 30, 1, 22, 9, 14]
+        for i, amount in enumerate(amounts):
+            create_transaction(
+                auth_header, amount=amount,
+                category=["Food", "Rent", "Transport"][i % 3],
+                date=f"2025-01-{(i % 4) + 10}",
+            )
+        return client.get("/api/transactions?per_page=100", headers=auth_header).get_json()["transactions"]
+
+    def _walk(self, client, auth_header, query):
+        seen, cursor, pages = [], "", 0
+        while cursor is not None:
+            resp = client.get(f"/api/transactions?per_page=4&cursor={cursor}&{query}", headers=auth_header)
+            assert resp.status_code == 200
+            data = resp.get_json()
+            seen.extend(data["transactions"])
+            cursor = data["next_cursor"]
+            pages += 1
+        return seen, pages
+
+    @pytest.mark.parametrize("sort_by,key", [
+        ("date", lambda t: (t["date"], t["id"])),
+        ("amount", lambda t: (t["amount"], t["id"])),
+        ("category", lambda t: (t["category"], t["date"], t["id"])),
+    ])
+    @pytest.mark.parametrize("sort_order", ["asc", "desc"])
+    def test_cursor_walk_matches_full_ordering(self, client, auth_header, sort_by, key, sort_order, create_transaction):
+        rows = self._seed(client, auth_header, create_transaction)
+        seen, pages = self._walk(client, auth_header, f"sort_by={sort_by}&sort_order={sort_order}")
+        expected = sorted(rows, key=key, reverse=sort_order == "desc")
+        assert [t["id"] for t in seen] == [t["id"] for t in expected]
+        assert pages == 3
+
+    def test_cursor_respects_filters(self, client, auth_header, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        seen, _ = self._walk(client, auth_header, "category=Rent")
+        assert len(seen) == 4
+        assert {t["category"] for t in seen} == {"Rent"}
+
+    def test_cursor_total_is_optional(self, client, auth_header, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        data = client.get("/api/transactions?cursor=", headers=auth_header).get_json()
+        assert "total" not in data
+        data = client.get("/api/transactions?cursor=&include_total=true", headers=auth_header).get_json()
+        assert data["total"] == 11
+
+    def test_cursor_page_is_single_query(self, client, auth_header, count_queries, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        first = client.get("/api/transactions?per_page=3&cursor=", headers=auth_header).get_json()
+        with count_queries() as statements:
+            client.get(f"/api/transactions?per_page=3&cursor={first['next_cursor']}", headers=auth_header)
+        statements = [s for s in statements if "data_version" not in s and "revoked_tokens" not in s]
+        assert len(statements) == 1
+        assert "count(" not in statements[0].lower()
+
+    def test_invalid_cursor(self, client, auth_header):
+        resp = client.get("/api/transactions?cursor=not-a-cursor", headers=auth_header)
+        assert resp.status_code == 400
+
+    @pytest.mark.parametrize("sort_by,key", [
+        ("date", ["2025-01-15", "7"]),
+        ("date", [20250115, 7]),
+        ("amount", ["10.00", 7.5]),
+        ("amount", [10, 7]),
+        ("category", [["Food"], "2025-01-15", 7]),
+        ("category", ["Food", "2025-01-15", True]),
+        ("category", ["Food", None, 7]),
+    ])
+    def test_tampered_cursor_key_rejected(self, client, auth_header, sort_by, key, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        raw = json.dumps({"s": sort_by, "o": "desc", "k": key}).encode("utf-8")
+        cursor = base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+        resp = client.get(f"/api/transactions?cursor={cursor}&sort_by={sort_by}", headers=auth_header)
+        assert resp.status_code == 400
+        assert resp.get_json()["error"] == "Invalid cursor"
+
+    def test_cursor_for_other_sort_rejected(self, client, auth_header, create_transaction):
+        self._seed(client, auth_header, create_transaction)
+        cursor = client.get("/api/transactions?per_page=2&cursor=", headers=auth_header).get_json()["next_cursor"]
+        resp = client.get(f"/api/transactions?cursor={cursor}&sort_by=amount", headers=auth_header)
+        assert resp.status_code == 400
+
+
 class TestDeleteTransaction:
-    def test_delete_transaction_success(self, client, auth_header):
-        resp = _create_transaction(client, auth_header)
+    def test_delete_transaction_success(self, client, auth_header, create_transaction):
+        resp = create_transaction(auth_header)
         txn_id = resp.get_json()["transaction"]["id"]
         resp = client.delete(f"/api/transactions/{txn_id}", headers=auth_header)
         assert resp.status_code == 200
@@ -85,19 +239,67 @@ class TestDeleteTransaction:
         resp = client.delete("/api/transactions/9999", headers=auth_header)
         assert resp.status_code == 404
 
-    def test_delete_transaction_unauthorized(self, client, auth_header, second_auth_header):
-        resp = _create_transaction(client, auth_header)
+    def test_delete_transaction_unauthorized(self, client, auth_header, second_auth_header, create_transaction):
+        resp = create_transaction(auth_header)
         txn_id = resp.get_json()["transaction"]["id"]
         resp = client.delete(f"/api/transactions/{txn_id}", headers=second_auth_header)
         assert resp.status_code == 403
 
 
 class TestExportTransactions:
-    def test_export_csv(self, client, auth_header):
-        _create_transaction(client, auth_header)
+    def test_export_csv(self, client, auth_header, create_transaction):
+        create_transaction(auth_header)
         resp = client.get("/api/transactions/export", headers=auth_header)
         assert resp.status_code == 200
         assert resp.content_type == "text/csv; charset=utf-8"
         csv_text = resp.data.decode("utf-8")
         assert "ID" in csv_text
         assert "Food" in csv_text
+
+    def test_export_is_streamed(self, client, auth_header, create_transaction):
+        create_transaction(auth_header)
+        resp = client.get("/api/transactions/export", headers=auth_header)
+        assert resp.is_streamed
+        assert resp.headers["Content-Disposition"] == "attachment; filename=transactions.csv"
+
+    def test_export_rows_and_order(self, client, auth_header, create_transaction):
+        create_transaction(auth_header, date="2025-01-01", description="Old, with comma")
+        create_transaction(auth_header, date="2025-03-01", amount=12.5)
+        rows = list(csv.reader(io.StringIO(client.get("/api/transactions/export", headers=auth_header).data.decode("utf-8"))))
+        assert rows[0] == ["ID", "Date", "Type", "Category", "Amount", "Currency", "Amount (USD)", "Description"]
+        assert [r[1] for r in rows[1:]] == ["2025-03-01", "2025-01-01"]
+        assert rows[1][4:7] == ["12.5", "USD", "12.5"]
+        assert rows[2][7] == "Old, with comma"
+
+    def test_export_applies_filters(self, client, auth_header, second_auth_header, create_transaction):
+        create_transaction(auth_header, category="Food", date="2025-01-10")
+        create_transaction(auth_header, category="Rent", date="2025-02-10")
+        create_transaction(auth_header, category="Salary", type="income", amount=900, date="2025-02-11")
+        create_transaction(second_auth_header, category="Rent", date="2025-02-10")
+
+        def export(query):
+            text = client.get(f"/api/transactions/export?{query}", headers=auth_header).data.decode("utf-8")
+            return [r[3] for r in list(csv.reader(io.StringIO(text)))[1:]]
+
+        assert export("type=expense") == ["Rent", "Food"]
+        assert export("category=Rent") == ["Rent"]
+        assert export("start_date=2025-02-01&end_date=2025-02-10") == ["Rent"]
+        assert export("search=salary") == ["Salary"]
+
+    def test_export_gzip(self, client, auth_header, create_transaction):
+        for i in range(50):
+            create_transaction(auth_header, description=f"Item {i}")
+        plain = client.get("/api/transactions/export", headers=auth_header).data
+        resp = client.get("/api/transactions/export", headers={**auth_header, "Accept-Encoding": "gzip"})
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(resp.data) == plain
+        assert len(resp.data) < len(plain)
+
+    def test_export_chunks_large_output(self, app, monkeypatch):
+        import app as app_module
+        monkeypatch.setattr(app_module, "EXPORT_CHUNK_BYTES", 100)
+        rows = [(i, date(2025, 1, 1), "expense", "Food", 150, "USD", "x" * 20) for i in range(20)]
+        chunks = list(app_module._csv_chunks(iter(rows), "USD"))
+        assert len(chunks) > 5
+        assert all(len(c) < 200 for c in chunks)
+        assert "".join(chunks).count("\n") == 21
@@ -0,0 +1,94 @@
+"""Validation shared by the single-row and bulk transaction write paths."""
+import re
+from datetime import date
+
+from money import DEFAULT_CURRENCY, currency_code, to_decimal
+import fx
+from recurring import FREQUENCIES
+
+REQUIRED_TRANSACTION_FIELDS = ("amount", "category", "date", "type")
+TRANSACTION_TYPES = ("income", "expense")
+# Budget months are stored and compared as zero-padded strings.
+MONTH_PATTERN = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+
+class ValidationError(ValueError):
+    pass
+
+
+def is_month(value):
+    """True for a ``YYYY-MM`` string; strptime alone also accepts "2025-1"."""
+    return isinstance(value, str) and MONTH_PATTERN.fullmatch(value) is not None
+
+
+def parse_transaction(data, base_currency=DEFAULT_CURRENCY, types=TRANSACTION_TYPES):
+    """Validate a transaction payload and return the column values for a new row.
+
+    ``currency`` defaults to the owner's ``base_currency``; any other must be
+    convertible into it with the loaded rates; ``type`` must be one of
+    ``types``. Raises ValidationError with
+    the message the API reports to clients.
+    """
+    for field in REQUIRED_TRANSACTION_FIELDS:
+        if field not in data:
+            raise ValidationError(f"{field} is required")
+    if data["type"] not in types:
+        raise ValidationError(f"Type must be {' or '.join(types)}")
+    try:
+        amount = to_decimal(data["amount"])
+    except ValueError:
+        raise ValidationError("Invalid amount")
+    if amount <= 0:
+        raise ValidationError("Amount must be positive")
+    try:
+        txn_date = date.fromisoformat(data["date"])
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid date format, use YYYY-MM-DD")
+    try:
+        currency = currency_code(data["currency"]) if data.get("currency") else base_currency
+    except ValueError:
+        raise ValidationError("Invalid currency code")
+    if currency != base_currency and not fx.rates().can_convert(currency, base_currency):
+        raise ValidationError(f"No exchange rates to convert {currency} to {base_currency}")
+    return {
+        "amount": amount,
+        "currency": currency,
+        "category": data["category"],
+        "description": data.get("description", ""),
+        "date": txn_date,
+        "type": data["type"],
+    }
+
+
+def _whole_number(value, low, high):
+    return not isinstance(value, bool) and isinstance(value, int) and low <= value <= high
+
+
+def parse_rule(data, base_currency=DEFAULT_CURRENCY):
+    """Validate a recurring rule payload and return its column values (without ``next_date``).
+
+    The transaction fields follow :func:`parse_transaction`, with ``start_date`` as the date.
+    """
+    if "start_date" not in data:
+        raise ValidationError("start_date is required")
+    values = parse_transaction({**data, "date": data["start_date"]}, base_currency)
+    values["start_date"] = values.pop("date")
+    frequency = data.get("frequency", "monthly")
+    if frequency not in FREQUENCIES:
+        raise ValidationError(f"frequency must be one of {', '.join(FREQUENCIES)}")
+    interval = data.get("interval", 1)
+    if not _whole_number(interval, 1, 366):
+        raise ValidationError("interval must be a whole number from 1 to 366")
+    day_of_month = data.get("day_of_month")
+    if day_of_month is not None and (frequency != "monthly" or not _whole_number(day_of_month, 1, 31)):
+        raise ValidationError("day_of_month must be from 1 to 31, on monthly rules only")
+    end_date = None
+    if data.get("end_date"):
+        try:
+            end_date = date.fromisoformat(data["end_date"])
+        except (ValueError, TypeError):
+            raise ValidationError("Invalid end_date format, use YYYY-MM-DD")
+        if end_date < values["start_date"]:
+            raise ValidationError("end_date is before start_date")
+    values.update(frequency=frequency, interval=interval, day_of_month=day_of_month, end_date=end_date)
+    return values
@@ -0,0 +1,63 @@
+"""Per-user data versions and conditional GET handling.
+
+Every write route calls :func:`bump` inside its own transaction, so
+``users.data_version`` changes exactly when something the user can read
+changes. Read routes wrapped in :func:`conditional` derive an ETag from the
+version and answer a matching ``If-None-Match`` with 304 after a single
+primary-key lookup, before the view (and any aggregation or serialization)
+runs.
+"""
+from datetime import date
+from functools import wraps
+
+from flask import current_app, g, request, Response
+from sqlalchemy import select, update
+
+from models import db, User
+
+
+def bump(user_id):
+    """Increment the user's data version and return the new one; the caller commits."""
+    version = db.session.execute(
+        update(User).where(User.id == user_id).values(data_version=User.data_version + 1).returning(User.data_version)
+    ).scalar()
+    # Lets after-request hooks (analytics.py) tag what this write produced.
+    g.bumped_version = (user_id, version)
+    return version
+
+
+def bump_many(user_ids):
+    """Increment several users' versions, e.g. after a maintenance job; the caller commits."""
+    db.session.execute(update(User).where(User.id.in_(list(user_ids))).values(data_version=User.data_version + 1))
+
+
+def current(user_id):
+    return db.session.execute(select(User.data_version).where(User.id == user_id)).scalar()
+
+
+def make_etag(user_id, version):
+    # The day is part of the tag because the dashboard's month window and
+    # forecasts move with it even when no data changes.
+    return f"{user_id}-{version}-{date.today().isoformat()}"
+
+
+def conditional(f):
+    """Add an ETag to a token-protected GET route and serve 304s. Place below @token_required."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        version = current(request.user_id)
+        if version is None:
+            return f(*args, **kwargs)
+        g.data_version = version
+        etag = make_etag(request.user_id, version)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        response.vary.add("Authorization")
+        return response
+    return decorated
@@ -7,6 +7,7 @@ import Transactions from "./components/Transactions";
 import AddTransaction from "./components/AddTransaction";
 import Budgets from "./components/Budgets";
 import Goals from "./components/Goals";
+import { logout } from "./utils/api";
 
 function ProtectedRoute({ children }) {
   const token = localStorage.getItem("token");
@@ -64,7 +65,7 @@ export default function App() {
   const [isLoggedIn, setIsLoggedIn] = useState(!!localStorage.getItem("token"));
   const navigate = useNavigate();
   const handleLogin = (token, username) => { localStorage.setItem("token", token); localStorage.setItem("username", username); setIsLoggedIn(true); navigate("/"); };
-  const handleLogout = () => { localStorage.removeItem("token"); localStorage.removeItem("username"); setIsLoggedIn(false); navigate("/login"); };
+  const handleLogout = () => { logout().catch(() => {}); localStorage.removeItem("token"); localStorage.removeItem("username"); setIsLoggedIn(false); navigate("/login"); };
 
   return (
     <div className="min-h-screen bg-gray-50 dark:bg-gray-900 transition-colors duration-300">
@@ -136,11 +136,11 @@ export default function Dashboard() {
           </div>
           <div className="grid grid-cols-1 sm:grid-cols-3 gap-4">
             <div className="bg-white/10 backdrop-blur-sm rounded-xl p-3">
-              <p className="text-white/70 text-xs uppercase tracking-wider mb-1">Avg Spending</p>
+              <p className="text-white/70 text-xs uppercase tracking-wider mb-1">Expected Spending</p>
               <p className="text-xl font-bold">${(data.forecast.avg_monthly_expenses || 0).toLocaleString("en-US", { minimumFractionDigits: 2 })}</p>
             </div>
             <div className="bg-white/10 backdrop-blur-sm rounded-xl p-3">
-              <p className="text-white/70 text-xs uppercase tracking-wider mb-1">Avg Income</p>
+              <p className="text-white/70 text-xs uppercase tracking-wider mb-1">Expected Income</p>
               <p className="text-xl font-bold">${(data.forecast.avg_monthly_income || 0).toLocaleString("en-US", { minimumFractionDigits: 2 })}</p>
             </div>
             <div className="bg-white/10 backdrop-blur-sm rounded-xl p-3">
@@ -222,9 +222,9 @@ export default function Dashboard() {
                     </td>
                     <td className="py-3 text-sm text-gray-600 dark:text-gray-400">{t.description}</td>
                     <td className={`py-3 text-sm font-semibold text-right ${
-                      t.type === "income" ? "text-emerald-500" : "text-rose-500"
+                      t.type === "income" || t.type === "withdrawal" ? "text-emerald-500" : "text-rose-500"
                     }`}>
-                      {t.type === "income" ? "+" : "-"}${Math.abs(t.amount).toFixed(2)}
+                      {t.type === "income" || t.type === "withdrawal" ? "+" : "-"}${Math.abs(t.amount).toFixed(2)}
                     </td>
                   </tr>
                 ))}
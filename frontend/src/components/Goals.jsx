@@ -1,5 +1,5 @@
 import { useState, useEffect } from "react";
-import { getGoals, createGoal, updateGoal, deleteGoal } from "../utils/api";
+import { getGoals, createGoal, updateGoal, deleteGoal, addGoalContribution } from "../utils/api";
 
 const GOAL_ICONS = [
   { name: "Vacation", icon: "🏖️" },
@@ -89,11 +89,14 @@ export default function Goals() {
 
   const handleAddFunds = async (g, amount) => {
     try {
-      await updateGoal(g.id, { ...g, current_amount: g.current_amount + amount });
-      load();
+      // Recorded as a contribution; the server adds it to the goal's total.
+      const res = await addGoalContribution(g.id, amount);
+      setGoals((prev) => prev.map((goal) => (goal.id === g.id ? res.data.goal : goal)));
     } catch { setError("Failed to update"); }
   };
 
+  const formatDate = (iso) => new Date(`${iso}T00:00:00`).toLocaleDateString("en-US", { month: "short", year: "numeric" });
+
   const getColor = (pct) => {
     if (pct >= 100) return "#10b981";
     if (pct >= 60) return "#6366f1";
@@ -193,8 +196,8 @@ export default function Goals() {
           </div>
         ) : (
           goals.map((g, i) => {
-            const pct = g.target_amount > 0 ? (g.current_amount / g.target_amount) * 100 : 0;
-            const remaining = Math.max(0, g.target_amount - g.current_amount);
+            const pct = g.percentage;
+            const remaining = g.remaining;
             const color = getColor(pct);
             const daysLeft = g.deadline ? Math.max(0, Math.ceil((new Date(g.deadline) - new Date()) / (1000 * 60 * 60 * 24))) : null;
 
@@ -243,6 +246,19 @@ export default function Goals() {
                       )}
                     </div>
 
+                    {pct < 100 && (g.monthly_rate !== null || g.required_monthly !== null) && (
+                      <div className="flex flex-wrap gap-x-3 gap-y-1 mt-2 text-xs text-gray-400 dark:text-gray-500">
+                        {g.monthly_rate !== null && g.projected_completion && (
+                          <span className={g.on_track === false ? "text-amber-500" : ""}>
+                            ${g.monthly_rate.toLocaleString("en-US", { minimumFractionDigits: 2 })}/mo · done {formatDate(g.projected_completion)}
+                          </span>
+                        )}
+                        {g.required_monthly !== null && (
+                          <span>Needs ${g.required_monthly.toLocaleString("en-US", { minimumFractionDigits: 2 })}/mo</span>
+                        )}
+                      </div>
+                    )}
+
                     {/* Quick add buttons */}
                     {pct < 100 && (
                       <div className="flex gap-2 mt-3">
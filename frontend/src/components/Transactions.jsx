@@ -1,5 +1,9 @@
-import { useState, useEffect, useCallback } from "react";
-import { getTransactions, deleteTransaction, exportTransactions } from "../utils/api";
+import { useState, useEffect, useCallback, useRef } from "react";
+import { getTransactions, deleteTransaction, exportTransactions, importTransactions } from "../utils/api";
+
+const TYPE_LABELS = { income: "Income", expense: "Expense", saving: "Saving", withdrawal: "Withdrawal" };
+// Money coming back to the account: income, and withdrawals from a savings goal.
+const isInflow = (t) => t.type === "income" || t.type === "withdrawal";
 
 function SkeletonRow() {
   return (
@@ -25,6 +29,9 @@ export default function Transactions() {
   const [page, setPage] = useState(1);
   const [totalPages, setTotalPages] = useState(1);
   const [deletingId, setDeletingId] = useState(null);
+  const [importing, setImporting] = useState(false);
+  const [notice, setNotice] = useState("");
+  const fileInput = useRef(null);
 
   const load = useCallback(() => {
     setLoading(true);
@@ -77,6 +84,26 @@ export default function Transactions() {
     }
   };
 
+  const handleImport = async (e) => {
+    const file = e.target.files[0];
+    e.target.value = "";
+    if (!file) return;
+    setImporting(true);
+    setError("");
+    setNotice("");
+    try {
+      const res = await importTransactions(file);
+      const { imported, failed, errors } = res.data;
+      setNotice(`Imported ${imported} transaction${imported === 1 ? "" : "s"}` + (failed ? `, ${failed} failed` : ""));
+      if (errors.length) setError(errors.slice(0, 3).map((err) => `Row ${err.row}: ${err.error}`).join("; "));
+      setPage(1);
+      load();
+    } catch (err) {
+      setError(err.response?.data?.error || "Import failed");
+    }
+    setImporting(false);
+  };
+
   const SortIcon = ({ field }) => (
     <span className="ml-1 inline-block">
       {sortBy === field ? (
@@ -98,15 +125,28 @@ export default function Transactions() {
           <span className="text-2xl">📋</span>
           Transactions
         </h2>
-        <button
-          onClick={handleExport}
-          className="flex items-center gap-2 bg-gradient-to-r from-green-500 to-emerald-600 text-white px-4 py-2 rounded-xl text-sm font-medium hover:shadow-lg transition-all duration-200 hover:-translate-y-0.5"
-        >
-          <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-            <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M12 10v6m0 0l-3-3m3 3l3-3m2 8H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
-          </svg>
-          Export CSV
-        </button>
+        <div className="flex items-center gap-2">
+          <input ref={fileInput} type="file" accept=".csv,.json,text/csv,application/json" className="hidden" onChange={handleImport} />
+          <button
+            onClick={() => fileInput.current.click()}
+            disabled={importing}
+            className="flex items-center gap-2 border border-gray-200 dark:border-gray-600 text-gray-700 dark:text-gray-300 px-4 py-2 rounded-xl text-sm font-medium hover:bg-gray-50 dark:hover:bg-gray-700 disabled:opacity-40 transition-all duration-200"
+          >
+            <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+              <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M4 16v1a3 3 0 003 3h10a3 3 0 003-3v-1m-4-8l-4-4m0 0L8 8m4-4v12" />
+            </svg>
+            {importing ? "Importing..." : "Import"}
+          </button>
+          <button
+            onClick={handleExport}
+            className="flex items-center gap-2 bg-gradient-to-r from-green-500 to-emerald-600 text-white px-4 py-2 rounded-xl text-sm font-medium hover:shadow-lg transition-all duration-200 hover:-translate-y-0.5"
+          >
+            <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+              <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M12 10v6m0 0l-3-3m3 3l3-3m2 8H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
+            </svg>
+            Export CSV
+          </button>
+        </div>
       </div>
 
       {/* Filters */}
@@ -134,6 +174,10 @@ export default function Transactions() {
         </select>
       </div>
 
+      {notice && (
+        <div className="bg-emerald-50 dark:bg-emerald-900/20 border border-emerald-200 dark:border-emerald-800 text-emerald-700 dark:text-emerald-400 p-3 rounded-xl text-sm">{notice}</div>
+      )}
+
       {error && (
         <div className="bg-red-50 dark:bg-red-900/20 border border-red-200 dark:border-red-800 text-red-700 dark:text-red-400 p-3 rounded-xl text-sm animate-shake">{error}</div>
       )}
@@ -180,11 +224,11 @@ export default function Transactions() {
                     <td className="py-3 px-4 text-sm text-gray-600 dark:text-gray-400">{t.date}</td>
                     <td className="py-3 px-4">
                       <span className={`text-xs font-semibold px-2.5 py-1 rounded-full ${
-                        t.type === "income"
+                        isInflow(t)
                           ? "bg-emerald-100 dark:bg-emerald-900/30 text-emerald-700 dark:text-emerald-400"
                           : "bg-rose-100 dark:bg-rose-900/30 text-rose-700 dark:text-rose-400"
                       }`}>
-                        {t.type === "income" ? "Income" : "Expense"}
+                        {TYPE_LABELS[t.type] || t.type}
                       </span>
                     </td>
                     <td className="py-3 px-4">
@@ -194,9 +238,9 @@ export default function Transactions() {
                     </td>
                     <td className="py-3 px-4 text-sm text-gray-600 dark:text-gray-400">{t.description}</td>
                     <td className={`py-3 px-4 text-sm font-semibold text-right ${
-                      t.type === "income" ? "text-emerald-500" : "text-rose-500"
+                      isInflow(t) ? "text-emerald-500" : "text-rose-500"
                     }`}>
-                      {t.type === "income" ? "+" : "-"}${Math.abs(t.amount).toFixed(2)}
+                      {isInflow(t) ? "+" : "-"}${Math.abs(t.amount).toFixed(2)}
                     </td>
                     <td className="py-3 px-4 text-center">
                       <button
@@ -5,18 +5,37 @@ const API_BASE = process.env.REACT_APP_API_URL || "http://localhost:5001/api";
 const api = axios.create({
   baseURL: API_BASE,
   headers: { "Content-Type": "application/json" },
+  validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
 });
 
+// Last ETag and body per GET URL; the server answers If-None-Match with an
+// empty 304 when the user's data has not changed since.
+const etagCache = new Map();
+
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem("token");
   if (token) config.headers.Authorization = `Bearer ${token}`;
+  if ((config.method || "get").toLowerCase() === "get" && config.responseType !== "blob") {
+    const cached = etagCache.get(api.getUri(config));
+    if (cached) config.headers["If-None-Match"] = cached.etag;
+  }
   return config;
 });
 
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const key = api.getUri(response.config);
+    if (response.status === 304) {
+      const cached = etagCache.get(key);
+      if (cached) return { ...response, status: 200, data: cached.data };
+    } else if (response.headers.etag) {
+      etagCache.set(key, { etag: response.headers.etag, data: response.data });
+    }
+    return response;
+  },
   (error) => {
     if (error.response && error.response.status === 401) {
+      etagCache.clear();
       localStorage.removeItem("token");
       localStorage.removeItem("username");
       if (window.location.pathname !== "/login") window.location.href = "/login";
@@ -27,12 +46,21 @@ api.interceptors.response.use(
 
 export const signup = (username, password) => api.post("/signup", { username, password });
 export const login = (username, password) => api.post("/login", { username, password });
+export const logout = () => {
+  const request = api.post("/logout");
+  etagCache.clear();
+  return request;
+};
 export const getMe = () => api.get("/me");
 export const getDashboard = () => api.get("/dashboard");
 export const getTransactions = (params) => api.get("/transactions", { params });
 export const addTransaction = (data) => api.post("/transactions", data);
 export const deleteTransaction = (id) => api.delete(`/transactions/${id}`);
 export const exportTransactions = () => api.get("/transactions/export", { responseType: "blob" });
+export const importTransactions = (file) =>
+  api.post("/transactions/import", file, {
+    headers: { "Content-Type": file.type === "application/json" ? "application/json" : "text/csv" },
+  });
 export const getBudgets = (month) => api.get("/budgets", { params: { month } });
 export const createBudget = (data) => api.post("/budgets", data);
 export const updateBudget = (id, data) => api.put(`/budgets/${id}`, data);
@@ -42,4 +70,5 @@ export const getGoals = () => api.get("/goals");
 export const createGoal = (data) => api.post("/goals", data);
 export const updateGoal = (id, data) => api.put(`/goals/${id}`, data);
 export const deleteGoal = (id) => api.delete(`/goals/${id}`);
+export const addGoalContribution = (id, amount) => api.post(`/goals/${id}/contributions`, { amount });
 export default api;